@@ -0,0 +1 @@
+"""Shared building blocks for the STONKS strategies, paper trader and dashboard."""
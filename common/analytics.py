@@ -0,0 +1,183 @@
+"""Portfolio analytics: mark-to-market equity, drawdown and performance metrics.
+
+Everything is column-wise NumPy, so one call scores a single equity curve or
+a (time x run) matrix of thousands of sweep results:
+
+    equity = equity_from_trades(trades, store.close_matrix(tickers), 100000)
+    performance(equity['equity'])          # Series of metrics for one curve
+    performance(equity_matrix)             # DataFrame, one row per column
+
+RunningMetrics keeps the same statistics incrementally (O(1) per update) for
+the live paper trader.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_YEAR = 252  # Daily bars
+
+
+def equity_from_trades(trades, close, initial_cash):
+    """Mark-to-market equity on close's index from a trades frame (timestamp, action, ticker, shares, value).
+
+    Each trade lands on the last bar at or before its timestamp; holdings are
+    marked at that bar's close (forward-filled). Returns a DataFrame with
+    equity, cash and invested (market value of positions).
+    """
+    close = close.ffill()
+    index, tickers = close.index, list(close.columns)
+    shares = np.zeros(close.shape)
+    cash = np.zeros(len(index))
+    if len(trades):
+        rows = np.maximum(index.searchsorted(pd.DatetimeIndex(trades['timestamp']), side='right') - 1, 0)
+        cols = pd.Index(tickers).get_indexer(trades['ticker'])
+        if (cols < 0).any():
+            raise ValueError(f"No prices for {sorted(set(trades['ticker'][cols < 0]))}")
+        signed = np.where(trades['action'].to_numpy() == 'BUY', 1, -1) * trades['shares'].to_numpy()
+        np.add.at(shares, (rows, cols), signed)
+        np.add.at(cash, rows, trades['value'].to_numpy(np.float64))
+    shares = np.cumsum(shares, axis=0)
+    cash = initial_cash + np.cumsum(cash)
+    invested = np.nansum(shares * close.to_numpy(np.float64), axis=1)
+    return pd.DataFrame({'equity': cash + invested, 'cash': cash, 'invested': invested}, index=index)
+
+
+def drawdown(equity):
+    """Fractional drop from the running peak (same shape as equity)."""
+    if isinstance(equity, (pd.Series, pd.DataFrame)):
+        return equity / equity.cummax() - 1
+    equity = np.asarray(equity, dtype=np.float64)
+    return equity / np.maximum.accumulate(equity, axis=0) - 1
+
+
+def _years(equity, periods_per_year):
+    index = getattr(equity, 'index', None)
+    if isinstance(index, pd.DatetimeIndex) and len(index) > 1:
+        return (index[-1] - index[0]).days / 365.25
+    return (len(equity) - 1) / periods_per_year
+
+
+def performance(equity, periods_per_year=PERIODS_PER_YEAR):
+    """total_return, cagr, volatility, sharpe, sortino, max_drawdown per equity column.
+
+    A Series (or 1-D array) gives a Series of metrics; a DataFrame / 2-D array
+    gives a DataFrame with one row per column.
+    """
+    values = np.asarray(equity, dtype=np.float64)
+    one = values.ndim == 1
+    values = values[:, None] if one else values
+    columns = equity.columns if isinstance(equity, pd.DataFrame) else None
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = values[1:] / values[:-1] - 1
+        total = values[-1] / values[0] - 1 if len(values) else np.zeros(values.shape[1])
+        years = _years(equity, periods_per_year)
+        cagr = (1 + total) ** (1 / years) - 1 if years > 0 else np.full(values.shape[1], np.nan)
+        missing = np.full(values.shape[1], np.nan)
+        mean = returns.mean(axis=0) if len(returns) else missing
+        std = returns.std(axis=0, ddof=1) if len(returns) > 1 else missing
+        downside = np.sqrt((np.minimum(returns, 0) ** 2).mean(axis=0)) if len(returns) else missing
+        scale = math.sqrt(periods_per_year)
+        table = pd.DataFrame({
+            'total_return': total,
+            'cagr': cagr,
+            'volatility': std * scale,
+            'sharpe': mean / std * scale,
+            'sortino': mean / downside * scale,
+            'max_drawdown': drawdown(values).min(axis=0) if len(values) else np.zeros(values.shape[1]),
+        }, index=columns)
+    return table.iloc[0] if one else table
+
+
+def round_trips(trades):
+    """Realized P&L of each SELL against the average cost of the position it closes."""
+    if not len(trades):
+        return pd.DataFrame(columns=['timestamp', 'ticker', 'shares', 'pnl'])
+    trades = trades.sort_values('timestamp', kind='stable')
+    ticker = trades['ticker'].to_numpy()
+    buy = (trades['action'] == 'BUY').to_numpy()
+    position = pd.Series(np.where(buy, 1, -1) * trades['shares'].to_numpy()).groupby(ticker).cumsum()
+    # An episode starts with a buy from flat; avg cost is its buy value / buy shares so far
+    was_flat = (position == 0).groupby(ticker).shift(1, fill_value=True).to_numpy()
+    episode = pd.Series(was_flat & buy).groupby(ticker).cumsum().to_numpy()
+    keys = [ticker, episode]
+    buy_shares = pd.Series(np.where(buy, trades['shares'], 0)).groupby(keys).cumsum().to_numpy()
+    buy_cost = pd.Series(np.where(buy, trades['shares'] * trades['price'], 0.0)).groupby(keys).cumsum().to_numpy()
+    sells = ~buy
+    avg_cost = buy_cost[sells] / np.maximum(buy_shares[sells], 1)
+    out = trades.loc[sells, ['timestamp', 'ticker', 'shares']].reset_index(drop=True)
+    out['pnl'] = trades['value'].to_numpy()[sells] - out['shares'].to_numpy() * avg_cost  # Net of sell costs
+    return out
+
+
+def trade_stats(trades, equity=None, periods_per_year=PERIODS_PER_YEAR):
+    """hit_rate (share of profitable closing trades), trades and annualized turnover."""
+    closed = round_trips(trades)
+    stats = {'trades': len(trades), 'hit_rate': float((closed['pnl'] > 0).mean()) if len(closed) else np.nan}
+    if equity is not None and len(equity) > 1:
+        traded = float((trades['shares'] * trades['price']).sum()) if len(trades) else 0.0
+        stats['turnover'] = traded / float(np.mean(equity)) / max(_years(equity, periods_per_year), 1 / periods_per_year)
+    return stats
+
+
+def summary(equity, trades=None, exposure=None, periods_per_year=PERIODS_PER_YEAR):
+    """performance() plus mean exposure (invested / equity per bar) and trade_stats() as one dict."""
+    out = performance(equity, periods_per_year).to_dict()
+    if exposure is not None:
+        out['exposure'] = float(np.mean(exposure))
+    if trades is not None:
+        out.update(trade_stats(trades, equity, periods_per_year))
+    return out
+
+
+class RunningMetrics:
+    """Incremental drawdown / Sharpe / Sortino / exposure over a stream of equity marks."""
+
+    def __init__(self, periods_per_year=PERIODS_PER_YEAR):
+        self.periods_per_year = periods_per_year
+        self.first = None
+        self.last = None
+        self.peak = -math.inf
+        self.max_drawdown = 0.0
+        self.n = 0          # Returns seen
+        self.mean = 0.0     # Welford running mean / M2 of per-period returns
+        self.m2 = 0.0
+        self.downside = 0.0  # Sum of squared negative returns
+        self.exposure_sum = 0.0
+        self.marks = 0
+
+    def update(self, equity, invested=0.0):
+        if self.first is None:
+            self.first = equity
+        elif self.last:
+            r = equity / self.last - 1
+            self.n += 1
+            delta = r - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (r - self.mean)
+            self.downside += min(r, 0.0) ** 2
+        self.last = equity
+        self.peak = max(self.peak, equity)
+        self.max_drawdown = min(self.max_drawdown, equity / self.peak - 1)
+        self.exposure_sum += invested / equity if equity else 0.0
+        self.marks += 1
+        return self
+
+    @property
+    def drawdown(self):
+        return self.last / self.peak - 1 if self.marks else 0.0
+
+    @property
+    def sharpe(self):
+        std = math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+        return self.mean / std * math.sqrt(self.periods_per_year) if std else math.nan
+
+    @property
+    def sortino(self):
+        down = math.sqrt(self.downside / self.n) if self.n else 0.0
+        return self.mean / down * math.sqrt(self.periods_per_year) if down else math.nan
+
+    def to_dict(self):
+        return {'total_return': self.last / self.first - 1 if self.marks else 0.0, 'sharpe': self.sharpe,
+                'sortino': self.sortino, 'drawdown': self.drawdown, 'max_drawdown': self.max_drawdown,
+                'exposure': self.exposure_sum / self.marks if self.marks else 0.0}
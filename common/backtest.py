@@ -0,0 +1,158 @@
+"""Backtest engine shared by the three strategies.
+
+Two paths over a wide (time x ticker) close matrix from the market data store:
+
+- backtest_vectorized: signal-only fast path. Holdings follow the signal state,
+  each position is weighted max_position_size (or volatility-targeted), gross
+  exposure is capped and costs are charged on turnover.
+- backtest_event: bar-by-bar replay through common.execution, the same order
+  sizing and portfolio caps (common.risk), batch fills (next-bar open, volume
+  caps), costs and intrabar fixed / trailing stop-losses the paper trader
+  applies live.
+
+Both return a dict with 'equity' (Series), 'trades' (DataFrame), 'exposure'
+(invested fraction per bar), 'total_return' and 'final_value'; score them with
+common.analytics.summary. A cache mapping is passed through to signal_matrix so sweeps
+can reuse rolling windows across parameter combos.
+"""
+import numpy as np
+import pandas as pd
+
+from common import execution, risk
+from common.signals import signal_matrix
+
+
+def _config(config):
+    return {**execution.EXECUTION_DEFAULTS, **(config or {})}
+
+
+def _holdings(signals, strat):
+    """Signal matrix -> 1 while a position is held, else 0 (buy if flat, sell if held)."""
+    values = signals.to_numpy()
+    if strat == 'momentum':
+        return (values > 0).astype(np.float64)  # Held exactly while in the top N
+    rows = np.arange(len(values))[:, None]
+    last = np.maximum.accumulate(np.where(values != 0, rows, 0), axis=0)  # Row of the last non-zero signal
+    return (values[last, np.arange(values.shape[1])] > 0).astype(np.float64)
+
+
+def _volatility(close, bars, config):
+    """Volatility matrix for 'volatility' sizing, else None."""
+    if config['sizing'] != 'volatility':
+        return None
+    return risk.volatility_matrix(close, bars.get('High'), bars.get('Low'), config['vol_window'],
+                                  config['vol_method']).to_numpy(np.float64)
+
+
+def backtest_vectorized(close, strat, params=None, config=None, signal_close=None, start=None, cache=None, bars=None):
+    """Fast path: whole-history array ops, no integer share or cash bookkeeping (sector caps not applied)."""
+    config = _config(config)
+    signals = signal_matrix(close if signal_close is None else signal_close, strat, params, cache)
+    holdings = _holdings(signals, strat)
+    first = 0 if start is None else int(close.index.searchsorted(pd.Timestamp(start)))
+    holdings[:first] = 0
+    vol = _volatility(close, bars or {}, config)
+    target = risk.target_weights(config, None if vol is None else vol.ravel(), holdings.size).reshape(holdings.shape)
+    weights = holdings * target
+    gross = weights.sum(axis=1, keepdims=True) / config['max_gross_exposure']
+    weights = weights / np.maximum(gross, 1.0)  # Scale every bar down to the gross cap
+    prev_weights = np.vstack([np.zeros((1, weights.shape[1])), weights[:-1]])
+    changes = np.diff(holdings, axis=0, prepend=0)
+    turnover = (np.abs(changes) * np.where(changes > 0, weights, prev_weights)).sum(axis=1)
+    prices = close.ffill().to_numpy(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = np.nan_to_num(prices / np.vstack([prices[:1], prices[:-1]]) - 1)
+    cost_rate = execution.cost_rate(config)
+    strategy_returns = (prev_weights * returns).sum(axis=1) - turnover * cost_rate
+    equity = pd.Series(config['initial_cash'] * np.cumprod(1 + strategy_returns), index=close.index, name='equity')
+    equity = equity.iloc[first:]
+    rows, cols = np.nonzero(changes)
+    trades = pd.DataFrame({'timestamp': close.index[rows], 'ticker': close.columns[cols],
+                           'side': changes[rows, cols].astype(np.int64)})  # 1=entry, -1=exit
+    return {
+        'equity': equity,
+        'trades': trades,
+        'weights': pd.DataFrame(weights, index=close.index, columns=close.columns),
+        'exposure': pd.Series(weights.sum(axis=1), index=close.index, name='exposure').iloc[first:],
+        'final_value': float(equity.iloc[-1]) if len(equity) else config['initial_cash'],
+        'total_return': float(equity.iloc[-1] / config['initial_cash'] - 1) if len(equity) else 0.0,
+    }
+
+
+def backtest_event(close, strat, params=None, config=None, signal_close=None, start=None, cache=None, bars=None):
+    """Bar-by-bar replay through the paper trader's batch fill simulator and stop-loss rules.
+
+    bars: optional {'Open', 'High', 'Low', 'Volume': DataFrame like close} for
+    next-open fills, intrabar stops, trailing peaks, ATR sizing and volume caps;
+    without them fills use the close and are uncapped.
+    """
+    config = _config(config)
+    tickers = list(close.columns)
+    signals = signal_matrix(close if signal_close is None else signal_close, strat, params, cache)
+    bars = bars or {}
+    prices_matrix = close.ffill().to_numpy(np.float64)
+    open_matrix = bars['Open'].reindex_like(close).to_numpy(np.float64) if 'Open' in bars else close.to_numpy(np.float64)
+    low_matrix = bars['Low'].reindex_like(close).to_numpy(np.float64) if 'Low' in bars else close.to_numpy(np.float64)
+    high_matrix = bars['High'].reindex_like(close).to_numpy(np.float64) if 'High' in bars else close.to_numpy(np.float64)
+    vol_matrix = _volatility(close, bars, config)
+    volume_matrix = bars['Volume'].reindex_like(close).to_numpy(np.float64) if 'Volume' in bars else None
+    signal_values = signals.to_numpy()
+    portfolio = execution.new_portfolio(tickers, config['initial_cash'], strat=strat, params=params)
+    first = 0 if start is None else int(close.index.searchsorted(pd.Timestamp(start)))
+    index = close.index[first:]
+    equity = np.empty(len(index))
+    invested = np.empty(len(index))
+    next_open = config['fill_at'] == 'next_open'
+    columns = np.arange(len(tickers))  # Portfolio index == close column
+    pending = None  # (idx, side, shares) decided at the previous close
+
+    for i, row in enumerate(range(first, len(close))):
+        timestamp = index[i]
+        volume = None if volume_matrix is None else volume_matrix[row]
+
+        # Yesterday's orders at today's open, then stops against today's low
+        if pending is not None:
+            idx, side, shares = pending
+            execution.fill_orders(portfolio, config, idx, side, shares, open_matrix[row, idx],
+                                  None if volume is None else volume[idx], timestamp)
+            pending = None
+        idx, stop_price = execution.stop_orders(portfolio, config, low_matrix[row], open_matrix[row])
+        if len(idx):
+            execution.fill_orders(portfolio, config, idx, np.full(len(idx), -1), portfolio.shares[idx],
+                                  stop_price, None if volume is None else volume[idx], timestamp)
+        risk.update_peaks(portfolio, high_matrix[row])  # After the stop check: the bar's high may come after its low
+        prices = dict(zip(tickers, prices_matrix[row]))
+        execution.mark_to_market(portfolio, prices)  # Sizes new entries off the latest value
+
+        row_signals = signal_values[row].astype(np.int64)
+        if strat == 'momentum':
+            row_signals[(row_signals == 0) & (portfolio.shares[:len(tickers)] > 0)] = -1  # Dropped out of the top N
+        orders = execution.signal_orders(portfolio, config, columns, row_signals, prices_matrix[row],
+                                         None if vol_matrix is None else vol_matrix[row])
+        if next_open:
+            pending = orders
+        else:
+            idx = orders[0]
+            execution.fill_orders(portfolio, config, *orders, prices_matrix[row, idx],
+                                  None if volume is None else volume[idx], timestamp)
+        equity[i] = execution.mark_to_market(portfolio, prices)
+        invested[i] = equity[i] - portfolio.cash
+
+    equity = pd.Series(equity, index=index, name='equity')
+    return {
+        'equity': equity,
+        'trades': pd.DataFrame(list(portfolio.trades), columns=['timestamp', 'action', 'ticker', 'shares', 'price', 'value', 'fees']),
+        'exposure': pd.Series(invested / equity.to_numpy(), index=index, name='exposure'),
+        'portfolio': portfolio,
+        'final_value': float(equity.iloc[-1]) if len(equity) else config['initial_cash'],
+        'total_return': float(equity.iloc[-1] / config['initial_cash'] - 1) if len(equity) else 0.0,
+    }
+
+
+def run_backtest(close, strat, params=None, config=None, mode='event', **kwargs):
+    """Dispatch to the 'event' (default, stateful rules) or 'vectorized' path."""
+    if mode == 'event':
+        return backtest_event(close, strat, params, config, **kwargs)
+    if mode == 'vectorized':
+        return backtest_vectorized(close, strat, params, config, **kwargs)
+    raise ValueError(f"Unknown backtest mode: {mode}")
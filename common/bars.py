@@ -0,0 +1,191 @@
+"""Streaming multi-timeframe bar aggregation.
+
+A BarAggregator takes 1-minute bars (or raw ticks) for a whole universe once
+and keeps 5m / 15m / 1h / 1d OHLCV in preallocated ring buffers, one
+(capacity x tickers) array per field and timeframe. Intraday buckets are
+aligned to the session open (09:15, 09:20, ... IST), as exchange bars are.
+
+    agg = BarAggregator(tickers, timeframes=('5m', '15m', '1d'))
+    agg.subscribe('5m', on_five_minute_bar)   # called as fn(timeframe, buffer, bar_time)
+    agg.update(ts, open_, high, low, close, volume)   # arrays aligned to tickers; NaN = no print
+    agg.flush(now)                            # close bars whose interval has ended
+    agg['15m'].frame('close', 50)             # last 50 bars as a (time x ticker) DataFrame
+
+The newest bar of each buffer is still forming until the next bucket starts or
+flush() passes its end; subscribers are called once per bar, when it closes.
+seed() preloads closed bars from stored history (e.g. the store's 1h / 1d
+bars), so long windows are warm at start-up; minutes that fall in a bar that
+has already closed are then ignored and 1m input only builds the forming bar.
+"""
+from datetime import time as dt_time
+
+import numpy as np
+import pandas as pd
+
+# Bar width in minutes; None = one bar per session
+TIMEFRAMES = {'1m': 1, '5m': 5, '15m': 15, '1h': 60, '1d': None}
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+_MINUTE = 60 * 10**9  # ns
+
+
+def _offset(t):
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * 10**9
+
+
+class BarBuffer:
+    """Ring of the last `capacity` bars of one timeframe for every ticker."""
+
+    def __init__(self, tickers, capacity):
+        self.tickers = list(tickers)
+        self.capacity = capacity
+        self.time = np.zeros(capacity, dtype=np.int64)  # Bar start, ns since epoch (naive exchange time)
+        for field in FIELDS:
+            setattr(self, field, np.full((capacity, len(self.tickers)), np.nan))
+        self.count = 0       # Bars held, capped at capacity
+        self.pos = 0         # Next slot to write
+        self.forming = False  # Newest bar still open
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def last_time(self):
+        return int(self.time[(self.pos - 1) % self.capacity]) if self.count else None
+
+    def _start(self, bucket, open_, high, low, close, volume):
+        i = self.pos
+        self.time[i] = bucket
+        self.open[i], self.high[i], self.low[i], self.close[i] = open_, high, low, close
+        self.volume[i] = np.nan_to_num(volume)
+        self.pos = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.forming = True
+
+    def _merge(self, open_, high, low, close, volume):
+        i = (self.pos - 1) % self.capacity
+        self.open[i] = np.where(np.isnan(self.open[i]), open_, self.open[i])  # First print of the bucket
+        self.high[i] = np.fmax(self.high[i], high)
+        self.low[i] = np.fmin(self.low[i], low)
+        self.close[i] = np.where(np.isnan(close), self.close[i], close)
+        self.volume[i] += np.nan_to_num(volume)
+
+    def _rows(self, n=None, closed_only=False):
+        rows = np.arange(self.pos - self.count, self.pos) % self.capacity
+        if closed_only and self.forming:
+            rows = rows[:-1]
+        return rows if n is None else rows[-n:]
+
+    def values(self, field='close', n=None, closed_only=False):
+        """Last n bars of field in time order, shape (n, tickers)."""
+        return getattr(self, field)[self._rows(n, closed_only)]
+
+    def frame(self, field='close', n=None, closed_only=False):
+        """Last n bars of field as a (time x ticker) DataFrame."""
+        rows = self._rows(n, closed_only)
+        return pd.DataFrame(getattr(self, field)[rows], index=pd.DatetimeIndex(self.time[rows].astype('datetime64[ns]')),
+                            columns=self.tickers)
+
+
+class BarAggregator:
+    """Aggregates 1-minute bars / ticks into every configured timeframe at once."""
+
+    def __init__(self, tickers, timeframes=('5m', '15m', '1h', '1d'), capacity=500,
+                 session_open=dt_time(9, 15), session_close=dt_time(15, 30)):
+        self.tickers = list(tickers)
+        self.capacity = capacity
+        self.widths = {tf: TIMEFRAMES[tf] for tf in timeframes}
+        self.buffers = {tf: BarBuffer(self.tickers, capacity) for tf in timeframes}
+        self.session_open = _offset(session_open)
+        self.session_close = _offset(session_close)
+        self._subscribers = {tf: [] for tf in timeframes}
+        self.last_update = None  # ns of the newest input bar
+
+    def __getitem__(self, timeframe):
+        return self.buffers[timeframe]
+
+    def subscribe(self, timeframe, callback):
+        """callback(timeframe, buffer, bar_time) runs each time a bar of timeframe closes."""
+        self._subscribers[timeframe].append(callback)
+
+    def _bucket(self, ts, width):
+        day = ts - ts % (86400 * 10**9)
+        if width is None:
+            return day
+        session = day + self.session_open
+        return session + (ts - session) // (width * _MINUTE) * (width * _MINUTE)
+
+    def _end(self, bucket, width):
+        return bucket + self.session_close if width is None else bucket + width * _MINUTE
+
+    def _close(self, timeframe):
+        buffer = self.buffers[timeframe]
+        buffer.forming = False
+        bar_time = pd.Timestamp(buffer.last_time)
+        for callback in self._subscribers[timeframe]:
+            callback(timeframe, buffer, bar_time)
+
+    def update(self, ts, open_, high, low, close, volume):
+        """One 1-minute bar for every ticker (arrays aligned to tickers, NaN where nothing traded)."""
+        ts = pd.Timestamp(ts).value
+        for timeframe, width in self.widths.items():
+            buffer = self.buffers[timeframe]
+            bucket = self._bucket(ts, width)
+            if buffer.count and (bucket < buffer.last_time or (bucket == buffer.last_time and not buffer.forming)):
+                continue  # Minute of a bar that already closed (e.g. seeded from history)
+            if buffer.count and buffer.last_time == bucket:
+                buffer._merge(open_, high, low, close, volume)
+                continue
+            if buffer.forming:
+                self._close(timeframe)  # First print of a new bucket closes the previous bar
+            buffer._start(bucket, open_, high, low, close, volume)
+        self.last_update = ts
+
+    def tick(self, ts, prices, sizes=None):
+        """Raw trades/quotes: one price (and optional size) per ticker."""
+        prices = np.asarray(prices, dtype=np.float64)
+        self.update(ts, prices, prices, prices, prices, np.zeros(len(prices)) if sizes is None else sizes)
+
+    def flush(self, now):
+        """Close forming bars whose interval ended at or before now (e.g. the scheduler's bar boundary)."""
+        now = pd.Timestamp(now).value
+        for timeframe, width in self.widths.items():
+            buffer = self.buffers[timeframe]
+            if buffer.forming and self._end(buffer.last_time, width) <= now:
+                self._close(timeframe)
+
+    def seed(self, timeframe, bars, now=None):
+        """Preload closed bars of timeframe from {'Open', ..., 'Volume': (time x ticker) DataFrame} history.
+
+        Bars in or after the bucket forming at now are skipped (the 1m feed builds
+        that one). Subscribers are not called. Returns the bars loaded.
+        """
+        width, buffer = self.widths[timeframe], self.buffers[timeframe]
+        frames = [bars[col].reindex(columns=self.tickers) for col in ('Open', 'High', 'Low', 'Close', 'Volume')]
+        buckets = np.array([self._bucket(ts, width) for ts in frames[0].index.asi8], dtype=np.int64)
+        rows = np.arange(len(buckets))
+        if now is not None:
+            rows = rows[buckets < self._bucket(pd.Timestamp(now).value, width)]
+        rows = rows[-self.capacity:]
+        values = [f.to_numpy(np.float64) for f in frames]
+        for row in rows:
+            buffer._start(buckets[row], *(v[row] for v in values))
+        buffer.forming = False
+        return len(rows)
+
+    def feed(self, bars, until=None):
+        """Replay {'Open', 'High', 'Low', 'Close', 'Volume': (time x ticker) DataFrame} of 1m bars.
+
+        Only minutes after the last one fed, and (with until) only minutes that
+        have fully elapsed, so a still-forming 1m bar is never merged twice.
+        """
+        frames = [bars[col].reindex(columns=self.tickers) for col in ('Open', 'High', 'Low', 'Close', 'Volume')]
+        keep = np.ones(len(frames[0]), dtype=bool)
+        if self.last_update is not None:
+            keep &= frames[0].index.asi8 > self.last_update
+        if until is not None:
+            keep &= frames[0].index.asi8 + _MINUTE <= pd.Timestamp(until).value
+        frames = [f[keep] for f in frames]
+        values = [f.to_numpy(np.float64) for f in frames]
+        for row, ts in enumerate(frames[0].index):
+            self.update(ts, *(v[row] for v in values))
+        return len(frames[0])
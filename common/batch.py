@@ -0,0 +1,123 @@
+"""Universe-wide and walk-forward runs for the strategy scripts.
+
+- run_universe: call a per-ticker function for every ticker on a process
+  pool and collect the returned dicts into one table (a failing ticker gets an
+  'error' column entry instead of stopping the batch).
+- walk_forward: rolling train/test splits. On each training window the grid
+  is scored with the vectorized backtest; the best combo is then replayed
+  out-of-sample on the following test window through the event backtest
+  (costs, next-open fills, stops).
+- strategy_parser / resolve_tickers: the command line shared by
+  m_avg/ma_crossover.py and mean_rev/mean_reversion.py.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from common import analytics
+from common.backtest import run_backtest
+from common.screen import NIFTY_50, load_universe
+from common.signal_store import SIGNALS_DIR
+from common.sweep import _valid, expand_grid
+
+WF_METRICS = ['total_return', 'cagr', 'sharpe', 'sortino', 'max_drawdown']
+
+
+def _call(fn, ticker, kwargs):
+    try:
+        return {'ticker': ticker, **fn(ticker, **kwargs)}
+    except Exception as e:  # One bad ticker (no data, too short) must not sink the batch
+        return {'ticker': ticker, 'error': repr(e)}
+
+
+def run_universe(fn, tickers, workers=None, **kwargs):
+    """fn(ticker, **kwargs) -> dict for every ticker, on a process pool; one row per ticker."""
+    if workers == 1 or len(tickers) == 1:
+        rows = [_call(fn, t, kwargs) for t in tickers]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(_call, [fn] * len(tickers), tickers, [kwargs] * len(tickers)))
+    return pd.DataFrame(rows).set_index('ticker')
+
+
+def walk_forward_windows(n, train, test, step=None):
+    """[(train_start, train_end, test_end)] row positions of rolling splits over n bars."""
+    step = step or test
+    return [(lo, lo + train, min(lo + train + test, n)) for lo in range(0, n - train - 1, step)
+            if lo + train < n]
+
+
+def _slice(bars, end):
+    return None if bars is None else {col: frame.iloc[:end] for col, frame in bars.items()}
+
+
+def walk_forward(close, strat, grid, train=252, test=63, step=None, config=None, bars=None,
+                 signal_close=None, metric='sharpe'):
+    """One row per window: best params in-sample and their out-of-sample event-backtest stats.
+
+    Indicators warm up on all bars before each window, so no window starts cold;
+    signals at bar t only read bars up to t, so there is no look-ahead.
+    """
+    combos = [p for p in expand_grid(grid) if _valid(strat, p)]
+    cache = {}  # Rolling windows shared by every combo and window
+    rows = []
+    for lo, mid, hi in walk_forward_windows(len(close), train, test, step):
+        start = close.index[lo]
+        curves = {}
+        for i, params in enumerate(combos):
+            result = run_backtest(close, strat, params, config, mode='vectorized', signal_close=signal_close,
+                                  start=start, cache=cache)
+            curves[i] = result['equity'].iloc[:mid - lo].to_numpy()
+        scores = analytics.performance(pd.DataFrame(curves, index=close.index[lo:mid]))[metric]
+        best = int(scores.fillna(-np.inf).idxmax())  # Max drawdown is negative: higher is better too
+        params = combos[best]
+        oos = run_backtest(close.iloc[:hi], strat, params, config, start=close.index[mid], bars=_slice(bars, hi),
+                           signal_close=None if signal_close is None else signal_close.iloc[:hi])
+        stats = analytics.summary(oos['equity'], oos['trades'], oos['exposure'])
+        rows.append({'train_start': start.date(), 'test_start': close.index[mid].date(),
+                     'test_end': close.index[hi - 1].date(), **params, f"train_{metric}": float(scores[best]),
+                     **{f"test_{k}": stats[k] for k in ('total_return', 'sharpe', 'max_drawdown', 'trades')}})
+    return pd.DataFrame(rows)
+
+
+def walk_forward_summary(windows):
+    """Chain the out-of-sample windows: compounded return, mean Sharpe, worst drawdown, windows."""
+    if windows.empty:
+        return {'wf_windows': 0}
+    return {'wf_windows': len(windows), 'wf_return': float(np.prod(1 + windows['test_total_return']) - 1),
+            'wf_sharpe': float(windows['test_sharpe'].mean()), 'wf_max_drawdown': float(windows['test_max_drawdown'].min())}
+
+
+def strategy_parser(description, default_tickers, period='1y'):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--tickers', default=','.join(default_tickers), help="Comma-separated, e.g. RELIANCE.NS,TCS.NS")
+    parser.add_argument('--universe', help="'nifty50' or a published screener universe (output/universes/)")
+    parser.add_argument('--period', default=period, help="Evaluation window; earlier stored bars warm up indicators")
+    parser.add_argument('--workers', type=int, default=None, help="Processes (default: one per CPU)")
+    parser.add_argument('--walk-forward', metavar='TRAIN,TEST', help="Rolling splits in bars, e.g. 252,63")
+    parser.add_argument('--metric', default='sharpe', choices=WF_METRICS, help="Walk-forward selection metric")
+    parser.add_argument('--plot', action='store_true', help="Save a PNG per ticker (headless)")
+    parser.add_argument('--show', action='store_true', help="Also open plot windows (single ticker)")
+    parser.add_argument('--data-dir', default='output/market_data')
+    parser.add_argument('--out-dir', default='output')
+    parser.add_argument('--signals-dir', default=SIGNALS_DIR, help="Per-bar signals dataset ('' to skip)")
+    return parser
+
+
+def resolve_tickers(args):
+    if args.universe == 'nifty50':
+        return list(NIFTY_50)
+    if args.universe:
+        return load_universe(args.universe, out_dir=os.path.join(args.out_dir, 'universes'))
+    return args.tickers.split(',')
+
+
+def parse_walk_forward(value):
+    """'252,63' -> (252, 63); None -> None"""
+    if not value:
+        return None
+    train, test = (int(v) for v in value.split(','))
+    return train, test
@@ -0,0 +1,305 @@
+"""Benchmarks for the hot paths on synthetic market data (no network).
+
+Usage (from the repo root):
+    python -m common.bench --tickers 500 --years 10
+    python -m common.bench --tickers 50 --years 2 --only backtest --compare output/bench/baseline.json
+
+Bars come from common.synthetic (seeded GBM with regime switches). Each case
+runs --repeat times; best/median seconds and items/sec are written to
+output/bench/bench_<tickers>x<years>y_<interval>_<time>.json with the sizes and
+library versions, so runs at different universe / history sizes line up.
+--compare prints the ratio to a baseline file per case and exits non-zero when
+any case is slower by more than --tolerance.
+
+Cases:
+    store_refresh / store_matrices   backfill a fresh MarketDataStore / read all columns back
+    signals_<strat>                  last-bar batch signals (the paper trader's per-tick pass)
+    signal_matrix_<strat>            full-history signal matrix
+    backtest_<strat>_<mode>          event replay with OHLCV bars / vectorized path
+    momentum_rebalance               one momentum tick: rank, size, fill across the universe
+    pairs_scan                       cointegration scan of every pair over the last 252 bars
+    fill_orders / execute_trade      batch fills / single-order throughput
+    paper_trader_tick                PaperTrader.tick over the universe for every strat, on a synthetic store
+    journal_write / journal_recover  trades + fsync'd snapshots / restart recovery
+    dashboard_load                   dashboard.py's load_portfolio on a cold journal tail + drawdown
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from common import analytics, execution
+from common.backtest import run_backtest
+from common.data_store import MarketDataStore
+from common.journal import Journal
+from common.pairs import scan_pairs
+from common.portfolio import Portfolio
+from common.quotes import QuoteService
+from common.signals import compute_signals, signal_matrix
+from common.synthetic import SyntheticProvider, generate, synthetic_tickers
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STRATS = {
+    'ma_crossover': {'short_window': 50, 'long_window': 200},
+    'mean_reversion': {'period': 20, 'z_threshold': 2},
+    'momentum': {'lookback': 10, 'top_n': 5},
+}
+
+
+def _timed(fn, repeat):
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return runs
+
+
+def _held_portfolio(tickers, close, cash=1e7):
+    """Portfolio holding every other ticker at the last close."""
+    portfolio = Portfolio(tickers, cash)
+    last = close.iloc[-1].to_numpy(np.float64)
+    portfolio.shares[::2] = 10
+    portfolio.avg_price[::2] = last[::2]
+    portfolio.peak[::2] = last[::2]
+    portfolio.total_value = cash + float(portfolio.shares @ last)
+    return portfolio
+
+
+def _load_script(path, cwd):
+    """Import a top-level script (paper_trader.py, dashboard.py) as a module; its setup runs in cwd."""
+    spec = importlib.util.spec_from_file_location(f"bench_{os.path.splitext(os.path.basename(path))[0]}", path)
+    module = importlib.util.module_from_spec(spec)
+    os.makedirs(cwd, exist_ok=True)
+    home = os.getcwd()
+    os.chdir(cwd)  # Relative output/ paths (journals, metrics) land in the bench's tmp dir
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            spec.loader.exec_module(module)
+    finally:
+        os.chdir(home)
+    return module
+
+
+def cases(bars, tmp, args):
+    """[(name, make)] over the synthetic bars; make() sets the case up and returns (fn, items).
+
+    fn is timed and items scale throughput. Setup (store backfill, journal
+    writes, script imports) happens in make(), so cases skipped by --only cost nothing.
+    """
+    close = bars['Close']
+    tickers = list(close.columns)
+    cells = close.size
+    config = dict(execution.EXECUTION_DEFAULTS)
+    out = []
+    built = {}
+
+    def once(key, build):
+        """Setup shared by several cases, built by the first one selected."""
+        if key not in built:
+            built[key] = build()
+        return built[key]
+
+    # Market data store
+    provider = SyntheticProvider(args.years, seed=args.seed)
+    stores = iter(range(10**6))
+
+    def backfill(root):
+        store = MarketDataStore(root, provider, fetch_chunk=50)
+        return store, sum(store.refresh(tickers, args.interval).values())
+
+    def populated():
+        return once('store', lambda: backfill(os.path.join(tmp, 'store')))
+
+    out.append(('store_refresh', lambda: (lambda: backfill(os.path.join(tmp, f"store{next(stores)}")),
+                                          populated()[1])))
+    out.append(('store_matrices', lambda: (lambda: populated()[0].matrices(tickers, args.interval), populated()[1])))
+
+    # Signals
+    for strat, params in STRATS.items():
+        held = np.arange(len(tickers)) % 2 == 0 if strat == 'momentum' else None
+        out.append((f"signals_{strat}", lambda s=strat, p=params, h=held: (
+            lambda: compute_signals(close, s, p, held=h), len(tickers))))
+        out.append((f"signal_matrix_{strat}", lambda s=strat, p=params: (lambda: signal_matrix(close, s, p), cells)))
+
+    # Backtests
+    for strat, params in STRATS.items():
+        for mode in args.modes:
+            out.append((f"backtest_{strat}_{mode}", lambda s=strat, p=params, m=mode: (
+                lambda: run_backtest(close, s, p, config, mode=m, bars=bars), cells)))
+
+    # Execution
+    def rebalance():
+        portfolio = _held_portfolio(tickers, close)
+        signals = compute_signals(close, 'momentum', {'lookback': 10, 'top_n': max(len(tickers) // 10, 1)},
+                                  held=portfolio.shares > 0)
+        signals[(signals == 0) & (portfolio.shares > 0)] = -1
+        idx, side, shares = execution.orders_from_signals(portfolio, config, signals, close.iloc[-1])
+        execution.fill_orders(portfolio, config, idx, side, shares, close.iloc[-1].to_numpy()[idx])
+    out.append(('momentum_rebalance', lambda: (rebalance, len(tickers))))
+    out.append(('pairs_scan', lambda: (lambda: scan_pairs(close, min(len(close), 252), workers=1),
+                                       len(tickers) * (len(tickers) - 1) // 2)))
+
+    last = close.iloc[-1].to_numpy(np.float64)
+    side = np.where(np.arange(len(tickers)) % 2 == 0, -1, 1)
+
+    def fill_batch():
+        portfolio = _held_portfolio(tickers, close)
+        execution.fill_orders(portfolio, config, np.arange(len(tickers)), side, np.full(len(tickers), 5), last)
+    out.append(('fill_orders', lambda: (fill_batch, len(tickers))))
+
+    def single_orders():
+        portfolio = _held_portfolio(tickers, close)
+        for i in range(args.orders):
+            t = i % len(tickers)
+            execution.execute_trade(portfolio, config, tickers[t], 'buy' if side[t] > 0 else 'sell', last[t], 1)
+    out.append(('execute_trade', lambda: (single_orders, args.orders)))
+
+    # Paper trader: one tick of every strat over the universe, quotes delta-refreshed from the synthetic store
+    def make_tick():
+        store, _ = populated()
+        pt = _load_script(os.path.join(REPO, 'paper_trader.py', 'paper_trader.py'), os.path.join(tmp, 'paper_trader'))
+        pt.STORE = store
+        pt.QUOTES = QuoteService(pt._store_quotes, ttl=0)  # Every tick rereads quotes, as 5 minutes apart would
+        pt.CONFIG['data_interval'] = args.interval
+        trader_config = {**pt.CONFIG, 'tickers': tickers, 'journal_dir': os.path.join(tmp, 'paper_trader', 'journal')}
+        with contextlib.redirect_stdout(io.StringIO()):
+            trader = pt.PaperTrader(trader_config, [{'name': s, 'strat': s, 'params': p} for s, p in STRATS.items()])
+        now = close.index[-1].to_pydatetime()
+
+        def tick():
+            with contextlib.redirect_stdout(io.StringIO()):
+                trader.tick(now)
+        return tick, len(tickers) * len(STRATS)
+    out.append(('paper_trader_tick', make_tick))
+
+    # Journal and dashboard reads
+    runs = iter(range(10**6))
+    trades = [{'timestamp': datetime(2024, 1, 1).isoformat(), 'action': 'BUY', 'ticker': tickers[i % len(tickers)],
+               'shares': 1, 'price': 100.0, 'value': -100.2, 'fees': 0.2} for i in range(args.journal_trades)]
+    snapshot_every = max(args.journal_trades // args.journal_snapshots, 1)
+    portfolio = _held_portfolio(tickers, close)
+    records = args.journal_trades + args.journal_trades // snapshot_every
+
+    def journal_write(root=None):
+        journal = Journal(root or os.path.join(tmp, f"journal{next(runs)}"), compact_every=10**9)
+        for i, trade in enumerate(trades, 1):
+            journal.record_trade(trade)
+            if i % snapshot_every == 0:
+                journal.snapshot(portfolio)
+        journal.close()
+
+    def written():
+        """A journaled portfolio 'bench' under <tmp>/journals, as paper_trader.py lays them out."""
+        def build():
+            root = os.path.join(tmp, 'journals', 'bench')
+            journal_write(root)
+            return root
+        return once('journal', build)
+
+    out.append(('journal_write', lambda: (journal_write, records)))
+    out.append(('journal_recover', lambda: (lambda: Journal(written()).recover(config['initial_cash']), records)))
+
+    def make_dashboard():
+        import streamlit
+        import streamlit.logger
+        streamlit.config.get_option('logger.level')  # Parse the config first, it resets the level
+        streamlit.logger.set_log_level('error')  # Bare mode (no `streamlit run`) warns on every st call
+        root = written()
+        dashboard = _load_script(os.path.join(REPO, 'dashboard', 'dashboard.py'), os.path.join(tmp, 'dashboard'))
+        dashboard.JOURNAL_DIR = os.path.dirname(root)
+
+        def load():
+            dashboard.journal_tail.clear()  # Cold: a fresh server process parses the whole journal
+            _, _, snapshots = dashboard.load_portfolio(os.path.basename(root))
+            analytics.drawdown(snapshots.set_index('timestamp')['total_value'])
+        return load, records
+    out.append(('dashboard_load', make_dashboard))
+    return out
+
+
+def run(args):
+    tickers = synthetic_tickers(args.tickers)
+    t0 = time.perf_counter()
+    bars = generate(tickers, args.years, args.interval, seed=args.seed)
+    print(f"Generated {len(bars['Close'])} x {len(tickers)} {args.interval} bars in {time.perf_counter() - t0:.2f}s")
+    tmp = tempfile.mkdtemp(prefix='bench_')
+    results = {}
+    try:
+        for name, make in cases(bars, tmp, args):
+            if args.only and not any(key in name for key in args.only):
+                continue
+            fn, items = make()
+            runs = _timed(fn, args.repeat)
+            best = min(runs)
+            results[name] = {'best_sec': best, 'median_sec': statistics.median(runs), 'runs': runs,
+                             'items': items, 'items_per_sec': items / best if best else None}
+            print(f"{name:34s} best {best * 1000:10.2f} ms   median {statistics.median(runs) * 1000:10.2f} ms   "
+                  f"{items / best if best else float('inf'):14,.0f} items/s")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        'meta': {'timestamp': datetime.now().isoformat(timespec='seconds'), 'tickers': args.tickers,
+                 'years': args.years, 'interval': args.interval, 'bars': len(bars['Close']), 'seed': args.seed,
+                 'repeat': args.repeat, 'python': platform.python_version(), 'numpy': np.__version__,
+                 'pandas': pd.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()},
+        'results': results,
+    }
+
+
+def compare(report, baseline_path, tolerance):
+    """Print best-time ratios against a baseline report; returns the names that regressed."""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    if (baseline['meta']['tickers'], baseline['meta']['bars']) != (report['meta']['tickers'], report['meta']['bars']):
+        print(f"Note: baseline ran {baseline['meta']['tickers']} tickers x {baseline['meta']['bars']} bars")
+    regressed = []
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['best_sec'] / base['best_sec'] if base['best_sec'] else float('inf')
+        flag = ratio > 1 + tolerance
+        regressed += [name] if flag else []
+        print(f"{name:34s} {ratio:6.2f}x baseline" + ("  REGRESSION" if flag else ""))
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the hot paths on synthetic OHLCV")
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--years', type=float, default=10)
+    parser.add_argument('--interval', default='1d', choices=['1m', '5m', '15m', '1h', '1d'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--modes', default='event,vectorized', type=lambda s: s.split(','), help="Backtest modes")
+    parser.add_argument('--orders', type=int, default=2000, help="Single orders in the execute_trade case")
+    parser.add_argument('--journal-trades', type=int, default=5000)
+    parser.add_argument('--journal-snapshots', type=int, default=250)
+    parser.add_argument('--only', action='append', help="Run cases whose name contains this (repeatable)")
+    parser.add_argument('--out-dir', default='output/bench')
+    parser.add_argument('--compare', help="Baseline JSON from an earlier run")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    report = run(args)
+    os.makedirs(args.out_dir, exist_ok=True)
+    years = f"{args.years:g}".replace('.', '_')
+    path = os.path.join(args.out_dir, f"bench_{args.tickers}x{years}y_{args.interval}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults -> {path}")
+    if args.compare and compare(report, args.compare, args.tolerance):
+        sys.exit(1)
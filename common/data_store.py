@@ -0,0 +1,232 @@
+"""Local OHLCV store shared by the strategies and the paper trader.
+
+Bars live under <root>/<interval>/<ticker>/ as one raw column file per field
+(little-endian, read back with np.memmap) plus a small meta.json. A refresh only
+asks the provider for bars newer than the last stored timestamp and appends them
+in place, so a tick costs one delta fetch per universe instead of a full download
+per ticker.
+"""
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+EXCHANGE_TZ = 'Asia/Kolkata'  # Timestamps are stored as naive IST wall-clock
+
+# History pulled the first time a ticker/interval is seen (yfinance limits intraday)
+BACKFILL = {'1m': '7d', '5m': '60d', '15m': '60d', '1h': '730d', '1d': '5y', '1wk': '10y'}
+
+
+def period_start(period, now=None):
+    """'6mo' / '1y' / '60d' / '2wk' -> naive timestamp that many units before now"""
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        raise ValueError(f"Unknown period: {period}")
+    n, unit = int(match.group(1)), match.group(2)
+    offset = {'d': pd.DateOffset(days=n), 'wk': pd.DateOffset(weeks=n),
+              'mo': pd.DateOffset(months=n), 'y': pd.DateOffset(years=n)}[unit]
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    return (now - offset).normalize()
+
+
+def _normalize(df):
+    """Coerce a provider frame to COLUMNS with an ascending naive IST index."""
+    df = df.reindex(columns=COLUMNS)
+    if 'Adj Close' in df and df['Adj Close'].isna().all():
+        df['Adj Close'] = df['Close']
+    df = df.dropna(subset=['Close'])
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_convert(EXCHANGE_TZ).tz_localize(None)
+    df.index = index
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    return df.astype(np.float64)
+
+
+# Providers: anything with fetch(tickers, interval, start=None, period=None)
+class DataProvider:
+    """Source of OHLCV bars. fetch() returns {ticker: DataFrame[COLUMNS]}."""
+
+    def fetch(self, tickers, interval, start=None, period=None):
+        raise NotImplementedError
+
+
+class YFinanceProvider(DataProvider):
+    """Fetches the whole universe in one yf.download call."""
+
+    def fetch(self, tickers, interval, start=None, period=None):
+        import yfinance as yf
+        window = {'start': start} if start is not None else {'period': period}
+        raw = yf.download(list(tickers), interval=interval, group_by='ticker',
+                          auto_adjust=False, progress=False, threads=True, **window)
+        frames = {}
+        for ticker in tickers:
+            if isinstance(raw.columns, pd.MultiIndex):
+                if ticker not in raw.columns.get_level_values(0):
+                    continue
+                df = raw[ticker]
+            else:
+                df = raw  # Older yfinance flattens single-ticker downloads
+            df = _normalize(df)
+            if not df.empty:
+                frames[ticker] = df
+        return frames
+
+
+class FileProvider(DataProvider):
+    """Serves bars from <root>/<ticker>_<interval>.csv; stands in for yfinance offline."""
+
+    def __init__(self, root):
+        self.root = root
+        self.calls = []  # (tickers, interval, start, period) per fetch, for inspection
+
+    def fetch(self, tickers, interval, start=None, period=None):
+        self.calls.append((list(tickers), interval, start, period))
+        frames = {}
+        for ticker in tickers:
+            path = os.path.join(self.root, f"{ticker}_{interval}.csv")
+            if not os.path.exists(path):
+                continue
+            df = _normalize(pd.read_csv(path, index_col=0, parse_dates=True))
+            if start is not None:
+                df = df[df.index >= pd.Timestamp(start)]
+            elif period is not None:
+                df = df[df.index >= period_start(period, df.index[-1] if len(df) else None)]
+            if not df.empty:
+                frames[ticker] = df
+        return frames
+
+
+class MarketDataStore:
+    """Per (ticker, interval) columnar bar store with incremental refresh."""
+
+    def __init__(self, root='output/market_data', provider=None, fetch_chunk=None, max_workers=4):
+        self.root = root
+        self.provider = provider if provider is not None else YFinanceProvider()
+        self.fetch_chunk = fetch_chunk  # Tickers per provider request; None = one request per batch
+        self.max_workers = max_workers  # Chunk requests in flight at once
+
+    # --- Layout ---
+    def _dir(self, ticker, interval):
+        return os.path.join(self.root, interval, ticker)
+
+    def _col_path(self, ticker, interval, col):
+        name = 'ts' if col == 'ts' else col.lower().replace(' ', '_')
+        return os.path.join(self._dir(ticker, interval), f"{name}.bin")
+
+    def _meta(self, ticker, interval):
+        path = os.path.join(self._dir(ticker, interval), 'meta.json')
+        if not os.path.exists(path):
+            return {'rows': 0, 'last_ts': None}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _write_meta(self, ticker, interval, meta):
+        path = os.path.join(self._dir(ticker, interval), 'meta.json')
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)  # Atomic: meta['rows'] is the commit point
+
+    def _column(self, ticker, interval, col, rows):
+        if rows == 0:
+            return np.empty(0, dtype=np.int64 if col == 'ts' else np.float64)
+        dtype = np.int64 if col == 'ts' else np.float64
+        return np.memmap(self._col_path(ticker, interval, col), dtype=dtype, mode='r', shape=(rows,))
+
+    def last_timestamp(self, ticker, interval='1d'):
+        last = self._meta(ticker, interval)['last_ts']
+        return None if last is None else pd.Timestamp(last)
+
+    # --- Writes ---
+    def _append(self, ticker, interval, df):
+        """Append df, overwriting any stored bars at or after its first timestamp."""
+        os.makedirs(self._dir(ticker, interval), exist_ok=True)
+        meta = self._meta(ticker, interval)
+        ts_new = df.index.values.astype('datetime64[ns]').astype(np.int64)
+        keep = int(np.searchsorted(self._column(ticker, interval, 'ts', meta['rows']), ts_new[0]))
+        for col in ['ts'] + COLUMNS:
+            path = self._col_path(ticker, interval, col)
+            values = ts_new if col == 'ts' else df[col].to_numpy(np.float64)
+            with open(path, 'ab') as f:
+                f.truncate(keep * 8)  # Drop revised tail bars and any torn write
+                f.write(values.astype('<i8' if col == 'ts' else '<f8').tobytes())
+        meta = {'rows': keep + len(df), 'last_ts': str(df.index[-1])}
+        self._write_meta(ticker, interval, meta)
+        return len(df)
+
+    def refresh(self, tickers, interval='1d'):
+        """Pull only the bars missing since each ticker's last stored timestamp.
+
+        Returns {ticker: bars written}. New tickers are backfilled in one batch,
+        known ones share a single delta fetch starting at the oldest last bar.
+        With fetch_chunk set, each batch is split into chunks fetched concurrently.
+        """
+        last = {t: self.last_timestamp(t, interval) for t in tickers}
+        fresh = [t for t, ts in last.items() if ts is None]
+        known = [t for t, ts in last.items() if ts is not None]
+        requests = []  # (tickers, start, period)
+        if fresh:
+            requests += [(chunk, None, BACKFILL.get(interval, '1y')) for chunk in self._chunks(fresh)]
+        if known:
+            start = min(last[t] for t in known)
+            if interval in ('1d', '1wk'):
+                start = start.normalize()
+            requests += [(chunk, start, None) for chunk in self._chunks(known)]
+        frames = {}
+        if len(requests) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(requests))) as pool:
+                results = list(pool.map(lambda r: self.provider.fetch(r[0], interval, start=r[1], period=r[2]), requests))
+        else:
+            results = [self.provider.fetch(r[0], interval, start=r[1], period=r[2]) for r in requests]
+        for result in results:
+            frames.update(result)
+        written = {}
+        for ticker, df in frames.items():
+            if last[ticker] is not None:
+                df = df[df.index >= last[ticker]]  # Re-write the last bar, it may have been live
+            written[ticker] = self._append(ticker, interval, df) if len(df) else 0
+        return written
+
+    def _chunks(self, tickers):
+        size = self.fetch_chunk or len(tickers)
+        return [tickers[i:i + size] for i in range(0, len(tickers), size)]
+
+    # --- Reads ---
+    def history(self, ticker, interval='1d', start=None, end=None, bars=None, columns=None):
+        """Slice of stored bars as a DataFrame; only the requested rows are copied."""
+        rows = self._meta(ticker, interval)['rows']
+        ts = self._column(ticker, interval, 'ts', rows)
+        lo = 0 if start is None else int(np.searchsorted(ts, pd.Timestamp(start).value))
+        hi = rows if end is None else int(np.searchsorted(ts, pd.Timestamp(end).value, side='right'))
+        if bars is not None:
+            lo = max(lo, hi - bars)
+        columns = COLUMNS if columns is None else columns
+        data = {col: np.array(self._column(ticker, interval, col, rows)[lo:hi]) for col in columns}
+        index = pd.DatetimeIndex(np.array(ts[lo:hi]).astype('datetime64[ns]'), name='Date')
+        return pd.DataFrame(data, index=index, columns=columns)
+
+    def close_matrix(self, tickers, interval='1d', column='Close', start=None, end=None, bars=None):
+        """Wide (time x ticker) frame of one column, outer-joined on timestamps."""
+        series = {t: self.history(t, interval, start, end, bars, [column])[column] for t in tickers}
+        wide = pd.DataFrame(series, columns=list(tickers))
+        return wide if bars is None else wide.tail(bars)
+
+    def matrices(self, tickers, interval='1d', columns=('Open', 'High', 'Low', 'Close', 'Volume'),
+                 start=None, end=None, bars=None):
+        """{column: wide frame} for several columns from one history read per ticker."""
+        frames = {t: self.history(t, interval, start, end, bars, list(columns)) for t in tickers}
+        out = {}
+        for column in columns:
+            wide = pd.DataFrame({t: df[column] for t, df in frames.items()}, columns=list(tickers))
+            out[column] = wide if bars is None else wide.tail(bars)
+        return out
+
+    def latest(self, tickers, interval='1d', column='Close'):
+        """Last stored value per ticker as a Series."""
+        return pd.Series({t: self.history(t, interval, bars=1, columns=[column])[column].iloc[-1]
+                          for t in tickers if self._meta(t, interval)['rows']}, dtype=np.float64)
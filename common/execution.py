@@ -0,0 +1,176 @@
+"""Order execution rules shared by the paper trader and the backtest engine.
+
+Orders are simulated in batches: parallel arrays of portfolio ticker index,
+side (+1 buy / -1 sell) and shares, filled all at once against a bar. A bar is
+open/low/volume arrays aligned to the orders; the live trader passes its
+quotes as open and low, replays pass the next bar's OHLCV.
+
+- fill_orders: market orders at the given price with slippage in bps,
+  brokerage and STT, capped at max_volume_pct of the bar's volume (partial
+  fills; the remainder is cancelled). Sells settle before buys, and buys are
+  accepted in order while cash lasts.
+- stop_orders: held positions whose stop (avg_price * (1 - stop_loss_pct),
+  raised to peak * (1 - trailing_stop_pct) with a trailing stop) traded
+  through the bar low, filled at the stop or at the open if it gapped below.
+- orders_from_signals / signal_orders: {ticker: 1/-1/0} (or aligned arrays)
+  -> buy if flat, sell everything if held. Buys are sized together by
+  common.risk (fixed or volatility-targeted, sector / gross / cash caps).
+
+Functions mutate a common.portfolio.Portfolio, so a replay applies exactly the
+same costs, caps and stop-loss as live paper trading.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from common import risk
+from common.portfolio import Portfolio
+
+# Keys the execution rules read; paper_trader.CONFIG carries the same ones
+EXECUTION_DEFAULTS = {
+    **risk.RISK_DEFAULTS,
+    'initial_cash': 100000,
+    'brokerage_fee': 0.001,   # 0.1% of traded value
+    'stt': 0.001,             # Securities transaction tax, 0.1% of value on both sides (delivery)
+    'slippage_bps': 5,        # Fill price moves 5 bps against the order
+    'max_volume_pct': 0.1,    # Fill at most 10% of the bar's volume; the rest is cancelled
+    'max_position_size': 0.1, # 10% of portfolio per trade
+    'stop_loss_pct': 0.02,    # 2% stop-loss
+    'fill_at': 'next_open',   # 'next_open' (orders from bar t fill at bar t+1's open) or 'close'
+}
+
+
+def new_portfolio(tickers, cash, **kwargs):
+    return Portfolio(tickers, cash, **kwargs)
+
+
+def cost_rate(config):
+    """Round-trip-agnostic cost per unit of traded value: slippage + brokerage + STT."""
+    return config['slippage_bps'] / 1e4 + config['brokerage_fee'] + config['stt']
+
+
+def fill_orders(portfolio, config, idx, side, shares, price, volume=None, timestamp=None):
+    """Fill a batch of market orders (one per ticker) at price; returns the trade dicts.
+
+    idx indexes portfolio.tickers; side, shares, price and volume are per order.
+    Orders with no price, no shares left after the volume cap, no holding to
+    sell or no cash to buy are dropped.
+    """
+    idx = np.asarray(idx, dtype=np.int64)
+    if not len(idx):
+        return []
+    side = np.asarray(side, dtype=np.int64)
+    price = np.asarray(price, dtype=np.float64)
+    held = portfolio.shares[idx]
+    shares = np.where(side < 0, np.minimum(shares, held), shares).astype(np.float64)
+    if volume is not None:
+        volume = np.asarray(volume, dtype=np.float64)
+        cap = np.floor(np.where(np.isnan(volume), np.inf, volume) * config['max_volume_pct'])
+        shares = np.minimum(shares, cap)
+    shares = shares.astype(np.int64)
+
+    fill_price = price * (1 + side * config['slippage_bps'] / 1e4)  # Slippage works against the order
+    gross = shares * fill_price
+    fees = gross * (config['brokerage_fee'] + config['stt'])
+    cash_delta = -side * gross - fees  # Sells net of costs, buys pay them on top
+    ok = (shares > 0) & np.isfinite(fill_price)
+
+    # Sells settle first; buys are taken in order while the cash lasts
+    sells = ok & (side < 0)
+    cash = portfolio.cash + cash_delta[sells].sum()
+    buys = np.flatnonzero(ok & (side > 0))
+    affordable = np.cumsum(-cash_delta[buys]) <= cash
+    filled = sells.copy()
+    filled[buys[affordable]] = True
+
+    i, n = idx[filled], shares[filled]
+    buy = side[filled] > 0
+    new_shares = portfolio.shares[i] + np.where(buy, n, -n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_buy = (portfolio.avg_price[i] * portfolio.shares[i] + n * fill_price[filled]) / new_shares
+    portfolio.avg_price[i] = np.where(buy, avg_buy, np.where(new_shares == 0, 0.0, portfolio.avg_price[i]))
+    peak = np.where(portfolio.shares[i] > 0, portfolio.peak[i], 0.0)  # A new position's peak starts at its fill
+    portfolio.peak[i] = np.where(buy, np.fmax(peak, fill_price[filled]), np.where(new_shares == 0, 0.0, peak))
+    portfolio.shares[i] = new_shares
+    portfolio.cash += float(cash_delta[filled].sum())
+
+    timestamp = datetime.now() if timestamp is None else timestamp
+    trades = [{'timestamp': timestamp, 'action': 'BUY' if s > 0 else 'SELL', 'ticker': portfolio.tickers[t],
+               'shares': int(k), 'price': float(p), 'value': float(v), 'fees': float(f)}
+              for t, s, k, p, v, f in zip(i, side[filled], n, fill_price[filled], cash_delta[filled], fees[filled])]
+    portfolio.trades.extend(trades)
+    return trades
+
+
+def execute_trade(portfolio, config, ticker, action, price, shares, timestamp=None, volume=None):
+    """Single-order convenience over fill_orders. Returns the trade dict, or None if rejected."""
+    trades = fill_orders(portfolio, config, [portfolio.add_ticker(ticker)], [1 if action == 'buy' else -1],
+                         [shares], [price], None if volume is None else [volume], timestamp)
+    return trades[0] if trades else None
+
+
+def stop_orders(portfolio, config, low, open_):
+    """(idx, stop fill price) for held positions whose stop traded through low.
+
+    low and open_ are aligned to portfolio.tickers; NaN (no bar) never triggers.
+    """
+    held = np.flatnonzero(portfolio.shares)
+    stop = risk.stop_prices(portfolio, config, held)
+    with np.errstate(invalid='ignore'):
+        hit = low[held] <= stop
+    price = np.fmin(open_[held], stop)  # Gapped below the stop: filled at the open
+    return held[hit], price[hit]
+
+
+def mark_to_market(portfolio, prices):
+    """Recompute total_value from cash and the given {ticker: price}.
+
+    A held ticker with no quote (absent or NaN) keeps its last mark, or its
+    avg_price if it was never marked, so one stale symbol neither raises nor
+    turns total_value into NaN.
+    """
+    held = np.flatnonzero(portfolio.shares)
+    if not len(held):
+        portfolio.total_value = portfolio.cash
+        return portfolio.total_value
+    quotes = np.array([prices.get(portfolio.tickers[i], np.nan) for i in held], dtype=np.float64)
+    last = np.where(portfolio.mark[held] > 0, portfolio.mark[held], portfolio.avg_price[held])
+    marks = np.where(np.isnan(quotes), last, quotes)
+    portfolio.mark[held] = marks
+    portfolio.total_value = portfolio.cash + float(portfolio.shares[held] @ marks)
+    return portfolio.total_value
+
+
+def signal_orders(portfolio, config, idx, signal, price, vol=None, marks=None):
+    """Array form of orders_from_signals: per-ticker signal, price (and volatility) at portfolio index idx.
+
+    marks: current price per portfolio ticker for the exposure caps; defaults
+    to price where given and avg_price elsewhere.
+    """
+    idx = np.asarray(idx, dtype=np.int64)
+    price = np.asarray(price, dtype=np.float64)
+    held = portfolio.shares[idx]
+    buy = (signal == 1) & (held == 0) & (price > 0)  # Buy if flat
+    sell = (signal == -1) & (held > 0)                # Sell if held
+    if marks is None:
+        marks = np.full(len(portfolio.shares), np.nan)
+        marks[idx] = price
+    shares = held.copy()
+    if buy.any():
+        shares[buy] = risk.size_buys(portfolio, config, idx[buy], price[buy], marks,
+                                     None if vol is None else np.asarray(vol, dtype=np.float64)[buy], idx[sell])
+    keep = sell | (buy & (shares > 0))
+    return idx[keep], np.where(buy, 1, -1)[keep], shares[keep]
+
+
+def orders_from_signals(portfolio, config, signals, prices, vol=None):
+    """{ticker: 1/-1/0}, {ticker: price} and optional {ticker: volatility} -> (idx, side, shares)."""
+    signals = pd.Series(signals, dtype=np.float64)
+    signals = signals[signals != 0]
+    idx = [portfolio.add_ticker(t) for t in signals.index]
+    prices = pd.Series(prices, dtype=np.float64)
+    price = prices.reindex(signals.index).to_numpy()
+    marks = prices.reindex(portfolio.tickers).to_numpy()
+    vol = None if vol is None else pd.Series(vol, dtype=np.float64).reindex(signals.index).to_numpy()
+    return signal_orders(portfolio, config, idx, signals.to_numpy(), price, vol, marks)
@@ -0,0 +1,124 @@
+"""Fundamentals cache for the screener.
+
+yf.Ticker(t).info is slow and changes at most quarterly, so values are kept in
+one JSON file with a fetch time per field. Callers pass the fields they use:
+refresh() re-fetches only tickers with one of those fields stale or missing
+(concurrently on a bounded thread pool with retry/backoff) and re-stamps just
+the expired fields, so a 7-day beta never drags 30-day fields along with it.
+table() serves the cached values as a DataFrame for vectorized screening
+without touching the network.
+"""
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Field -> how long a cached value stays fresh
+FIELD_TTL = {
+    'netIncomeToCommon': timedelta(days=30),
+    'returnOnEquity': timedelta(days=30),
+    'beta': timedelta(days=7),
+    'sector': timedelta(days=90),
+    'longName': timedelta(days=90),
+}
+
+
+def yfinance_info(ticker):
+    import yfinance as yf
+    return yf.Ticker(ticker).info
+
+
+class FundamentalsCache:
+    """On-disk {ticker: {field: {'value', 'fetched_at'}}} with per-field TTLs."""
+
+    def __init__(self, path='output/fundamentals.json', fetch_info=None, ttl=None,
+                 max_workers=8, retries=3, backoff=1.0):
+        self.path = path
+        self.fetch_info = fetch_info if fetch_info is not None else yfinance_info
+        self.ttl = FIELD_TTL if ttl is None else ttl
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff  # Seconds before the first retry, doubled each attempt
+        self.entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+    def expired(self, ticker, fields=None, now=None):
+        """Fields (default: every tracked one) missing for ticker or past their own TTL."""
+        now = datetime.now() if now is None else now
+        cached = self.entries.get(ticker, {})
+        out = []
+        for field in self.ttl if fields is None else fields:
+            entry = cached.get(field)
+            if entry is None or now - datetime.fromisoformat(entry['fetched_at']) > self.ttl[field]:
+                out.append(field)
+        return out
+
+    def stale(self, ticker, fields=None, now=None):
+        """True if any of fields is missing or past its TTL."""
+        return bool(self.expired(ticker, fields, now))
+
+    def _fetch_one(self, ticker):
+        for attempt in range(self.retries + 1):
+            try:
+                return self.fetch_info(ticker)
+            except Exception as e:
+                if attempt == self.retries:
+                    print(f"Error fetching {ticker}: {e}")
+                    return None
+                time.sleep(self.backoff * 2 ** attempt * (1 + random.random() * 0.25))  # Jittered backoff
+
+    def refresh(self, tickers, fields=None, force=False):
+        """Fetch info for tickers with a stale field concurrently; returns the tickers fetched.
+
+        Only the expired fields (all of fields with force) are updated; the
+        others keep their value and fetch time.
+        """
+        fields = list(self.ttl) if fields is None else list(fields)
+        now = datetime.now()
+        todo = {t: fields if force else self.expired(t, fields, now) for t in tickers}
+        todo = {t: due for t, due in todo.items() if due}
+        if not todo:
+            return []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            infos = list(pool.map(self._fetch_one, todo))
+        fetched = []
+        for (ticker, due), info in zip(todo.items(), infos):
+            if info is None:
+                continue
+            stamp = datetime.now().isoformat()
+            cached = self.entries.setdefault(ticker, {})
+            for field in due:
+                cached[field] = {'value': info.get(field), 'fetched_at': stamp}
+            fetched.append(ticker)
+        self.save()
+        return fetched
+
+    def table(self, tickers=None, fields=None):
+        """Cached values as a DataFrame (index=ticker, columns=fields); missing values are NaN."""
+        tickers = list(self.entries) if tickers is None else list(tickers)
+        fields = list(self.ttl) if fields is None else list(fields)
+        rows = {t: {f: self.entries.get(t, {}).get(f, {}).get('value') for f in fields} for t in tickers}
+        df = pd.DataFrame.from_dict(rows, orient='index', columns=fields)
+        df.index.name = 'Ticker'
+        for field in fields:
+            numeric = pd.to_numeric(df[field], errors='coerce')
+            if numeric.notna().sum() >= df[field].notna().sum():  # Keep text fields (sector) as-is
+                df[field] = numeric.astype(np.float64)
+        return df
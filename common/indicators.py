@@ -0,0 +1,149 @@
+"""Streaming indicators for the live path: seed once from history, then O(1) per bar.
+
+Every indicator keeps a fixed-size ring buffer, so memory does not grow with
+history. update() pushes a new bar; replace_last() revises the most recent bar,
+which is what the live daily bar needs while the session is still open.
+"""
+import math
+
+import numpy as np
+
+
+class RollingMean:
+    """Simple moving average over the last `window` values (running sum + ring buffer)."""
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = np.zeros(window)
+        self.count = 0  # Values seen, capped at window
+        self.pos = 0    # Next slot to write
+        self.total = 0.0
+        self._since_resum = 0
+
+    def seed(self, values):
+        for value in np.asarray(values, dtype=np.float64)[-self.window:]:
+            self.update(value)
+        return self
+
+    def update(self, value):
+        value = float(value)
+        if self.count == self.window:
+            self.total -= self.buffer[self.pos]
+        else:
+            self.count += 1
+        self.buffer[self.pos] = value
+        self.total += value
+        self.pos = (self.pos + 1) % self.window
+        self._since_resum += 1
+        if self._since_resum >= self.window:  # Bound float drift, amortized O(1)
+            self.total = float(self.buffer[:self.count].sum())
+            self._since_resum = 0
+        return self.value
+
+    def replace_last(self, value):
+        last = (self.pos - 1) % self.window
+        self.total += float(value) - self.buffer[last]
+        self.buffer[last] = float(value)
+        return self.value
+
+    @property
+    def ready(self):
+        return self.count == self.window
+
+    @property
+    def value(self):
+        return self.total / self.window if self.ready else math.nan
+
+
+class RollingStats:
+    """Windowed mean/sample variance via Welford updates over a ring buffer."""
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = np.zeros(window)
+        self.count = 0
+        self.pos = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+
+    def seed(self, values):
+        for value in np.asarray(values, dtype=np.float64)[-self.window:]:
+            self.update(value)
+        return self
+
+    def _swap(self, old, new):
+        """Replace one in-window value with another at constant count."""
+        mean = self.mean + (new - old) / self.count
+        self.m2 += (new - old) * (new - mean + old - self.mean)
+        self.mean = mean
+
+    def update(self, value):
+        value = float(value)
+        if self.count == self.window:
+            self._swap(self.buffer[self.pos], value)
+        else:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        self.buffer[self.pos] = value
+        self.pos = (self.pos + 1) % self.window
+        return self.zscore
+
+    def replace_last(self, value):
+        last = (self.pos - 1) % self.window
+        self._swap(self.buffer[last], float(value))
+        self.buffer[last] = float(value)
+        return self.zscore
+
+    @property
+    def ready(self):
+        return self.count == self.window
+
+    @property
+    def last(self):
+        return self.buffer[(self.pos - 1) % self.window]
+
+    @property
+    def std(self):
+        return math.sqrt(max(self.m2, 0.0) / (self.count - 1)) if self.ready and self.count > 1 else math.nan
+
+    @property
+    def zscore(self):
+        std = self.std
+        return (self.last - self.mean) / std if std > 0 else math.nan
+
+
+class CrossoverDetector:
+    """Tracks a short and long SMA; signal is 1 on a golden cross, -1 on a death cross."""
+
+    def __init__(self, short_window=50, long_window=200):
+        self.short = RollingMean(short_window)
+        self.long = RollingMean(long_window)
+        self.prev = (math.nan, math.nan)  # (short, long) before the latest bar
+
+    def seed(self, values):
+        for value in np.asarray(values, dtype=np.float64)[-(self.long.window + 1):]:
+            self.update(value)
+        return self
+
+    def update(self, value):
+        self.prev = (self.short.value, self.long.value)
+        self.short.update(value)
+        self.long.update(value)
+        return self.signal
+
+    def replace_last(self, value):
+        self.short.replace_last(value)
+        self.long.replace_last(value)
+        return self.signal
+
+    @property
+    def signal(self):
+        prev_short, prev_long = self.prev
+        curr_short, curr_long = self.short.value, self.long.value
+        if prev_short <= prev_long and curr_short > curr_long:
+            return 1
+        if prev_short >= prev_long and curr_short < curr_long:
+            return -1
+        return 0  # NaN (not warmed up) compares False
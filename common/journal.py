@@ -0,0 +1,241 @@
+"""Append-only trade and portfolio journal.
+
+Everything the paper trader used to rewrite each tick (trades.csv, a new
+portfolio_*.json) goes into one JSON-lines log instead:
+
+    <root>/journal.<generation>.jsonl  {"type": "trade", ...} / {"type": "snapshot", ...} lines
+    <root>/state.json                  latest snapshot, its generation and the byte offset
+                                       just past it (the "latest state" pointer)
+
+Lines are buffered and fsync'd in batches (every `sync_every` records and at each
+snapshot), so per-tick I/O is a few appended lines no matter how long the
+history is. recover() rebuilds the portfolio after a restart from state.json plus
+any records logged after it. compact() periodically rewrites the log into the
+next generation, keeping every trade but only the latest snapshot; state.json
+is the commit point, so a crash mid-compaction leaves the old generation in use.
+"""
+import glob
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+STATE_FILE = 'state.json'
+
+
+def journal_path(root, generation):
+    return os.path.join(root, f"journal.{generation}.jsonl")
+
+
+def read_state(root):
+    path = os.path.join(root, STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def read_records(path, offset=0):
+    """Yield (end_offset, record) for complete lines from offset; a torn final line is skipped."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                return  # Partial write from a crash; the writer truncates it on open
+            offset += len(line)
+            yield offset, json.loads(line)
+
+
+def apply_trade(state, trade):
+    """Replay one journaled trade onto a {'cash', 'positions'} state (mirrors execution.fill_orders)."""
+    pos = state['positions'].setdefault(trade['ticker'], {'shares': 0, 'avg_price': 0})
+    state['cash'] += trade['value']  # Signed: negative for buys
+    if trade['action'] == 'BUY':
+        pos['avg_price'] = (pos['avg_price'] * pos['shares'] + trade['shares'] * trade['price']) / (pos['shares'] + trade['shares'])
+        pos['shares'] += trade['shares']
+    else:
+        pos['shares'] -= trade['shares']
+        if pos['shares'] == 0:
+            pos['avg_price'] = 0
+    return state
+
+
+def _dumps(record):
+    return (json.dumps(record, default=str) + '\n').encode()
+
+
+class Journal:
+    """Writer side: one instance per process."""
+
+    def __init__(self, root='output/journal', sync_every=64, compact_every=5000):
+        self.root = root
+        self.sync_every = sync_every
+        self.compact_every = compact_every  # Snapshots between compactions
+        os.makedirs(root, exist_ok=True)
+        state = read_state(root) or {}
+        self.generation = state.get('generation', self._oldest_generation())
+        self.snapshots_since_compact = state.get('snapshots_since_compact', 0)
+        self.path = journal_path(root, self.generation)
+        self._remove_other_generations()
+        self._truncate_torn_tail()
+        self._file = open(self.path, 'ab')
+        self._pending = 0
+
+    def _oldest_generation(self):
+        """Without state.json, the oldest log is the one that was never superseded by a commit."""
+        found = [int(os.path.basename(p).split('.')[1]) for p in glob.glob(os.path.join(self.root, 'journal.*.jsonl'))]
+        return min(found) if found else 0
+
+    def _remove_other_generations(self):
+        """Drop leftovers of an interrupted compaction (or an already-committed one)."""
+        for path in glob.glob(os.path.join(self.root, 'journal.*.jsonl')):
+            if path != self.path:
+                os.remove(path)
+
+    def _truncate_torn_tail(self):
+        if not os.path.exists(self.path):
+            return
+        end = 0
+        for end, _ in read_records(self.path):
+            pass
+        if end != os.path.getsize(self.path):
+            os.truncate(self.path, end)
+
+    # --- Writes ---
+    def append(self, kind, payload):
+        self._file.write(_dumps({'type': kind, **payload}))
+        self._pending += 1
+        if self._pending >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def record_trade(self, trade):
+        self.append('trade', trade)
+
+    def snapshot(self, portfolio, timestamp=None):
+        """Log cash/positions/total_value, fsync, and repoint state.json at it."""
+        snapshot = {
+            'timestamp': (timestamp or datetime.now()).isoformat(),
+            'cash': portfolio.cash,
+            'positions': portfolio.positions,
+            'total_value': portfolio.total_value,
+        }
+        self.append('snapshot', snapshot)
+        self.sync()
+        self.snapshots_since_compact += 1
+        self._write_state(snapshot, self._file.tell())
+        if self.snapshots_since_compact >= self.compact_every:
+            self.compact()
+
+    def _write_state(self, snapshot, offset):
+        state = {'generation': self.generation, 'offset': offset,
+                 'snapshots_since_compact': self.snapshots_since_compact, 'snapshot': snapshot}
+        path = os.path.join(self.root, STATE_FILE)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def compact(self):
+        """Rewrite into the next generation keeping every trade and only the latest snapshot."""
+        self.sync()
+        last_snapshot = None
+        new_path = journal_path(self.root, self.generation + 1)
+        with open(new_path, 'wb') as out:
+            for _, record in read_records(self.path):
+                if record['type'] == 'snapshot':
+                    last_snapshot = record
+                else:
+                    out.write(_dumps(record))
+            if last_snapshot is not None:
+                out.write(_dumps(last_snapshot))
+            out.flush()
+            os.fsync(out.fileno())
+            offset = out.tell()
+        self._file.close()
+        old_path = self.path
+        self.generation += 1
+        self.snapshots_since_compact = 0
+        self.path = new_path
+        snapshot = {k: v for k, v in (last_snapshot or {}).items() if k != 'type'}
+        self._write_state(snapshot, offset if last_snapshot is not None else 0)  # Commit point
+        os.remove(old_path)
+        self._file = open(self.path, 'ab')
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+    # --- Recovery ---
+    def recover(self, initial_cash):
+        """Latest {'cash', 'positions', 'total_value'} or None if nothing was ever journaled."""
+        state = read_state(self.root)
+        offset, current = 0, None
+        if state is not None and state.get('snapshot'):
+            offset = state['offset']
+            current = {k: state['snapshot'][k] for k in ('cash', 'positions', 'total_value')}
+        for _, record in read_records(self.path, offset):  # Anything logged after the pointer
+            if current is None:
+                current = {'cash': initial_cash, 'positions': {}, 'total_value': initial_cash}
+            if record['type'] == 'snapshot':
+                current = {k: record[k] for k in ('cash', 'positions', 'total_value')}
+            elif record['type'] == 'trade':
+                apply_trade(current, record)
+        return current
+
+
+class JournalTail:
+    """Reader side: keeps parsed trades/snapshots and reads only bytes appended since the last poll.
+
+    Compaction bumps the generation in state.json; the tail then rereads the
+    new (smaller) log from the start.
+    """
+
+    TRADE_COLUMNS = {'timestamp': 'datetime64[ns]', 'action': object, 'ticker': object,
+                     'shares': 'int64', 'price': 'float64', 'value': 'float64'}
+    SNAPSHOT_COLUMNS = {'timestamp': 'datetime64[ns]', 'cash': 'float64', 'total_value': 'float64'}
+
+    def __init__(self, root='output/journal'):
+        self.root = root
+        self.generation = None
+        self.offset = 0
+        self.state = None
+        self.trades = self._frame([], self.TRADE_COLUMNS)
+        self.snapshots = self._frame([], self.SNAPSHOT_COLUMNS)
+        self._lock = threading.Lock()  # Streamlit sessions share one instance
+
+    @staticmethod
+    def _frame(records, columns):
+        df = pd.DataFrame(records, columns=list(columns))
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df.astype(columns)
+
+    def poll(self):
+        """Read new records; returns (state, trades, snapshots)."""
+        with self._lock:
+            state = read_state(self.root)
+            generation = state['generation'] if state else 0
+            if generation != self.generation:
+                self.generation, self.offset = generation, 0
+                self.trades = self._frame([], self.TRADE_COLUMNS)
+                self.snapshots = self._frame([], self.SNAPSHOT_COLUMNS)
+            trades, snapshots = [], []
+            for offset, record in read_records(journal_path(self.root, generation), self.offset):
+                (trades if record['type'] == 'trade' else snapshots).append(record)
+                self.offset = offset
+            if trades:
+                self.trades = pd.concat([self.trades, self._frame(trades, self.TRADE_COLUMNS)], ignore_index=True)
+            if snapshots:
+                self.snapshots = pd.concat([self.snapshots, self._frame(snapshots, self.SNAPSHOT_COLUMNS)], ignore_index=True)
+            self.state = state
+            return state, self.trades, self.snapshots
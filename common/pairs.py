@@ -0,0 +1,207 @@
+"""Pairs / cointegration scan over a (time x ticker) close matrix.
+
+Every pair (a, b) of the universe is fit on log closes over the last
+`lookback` bars: log a = alpha + beta * log b + spread. All hedge ratios come
+from one covariance matrix (a single matmul over the universe); spreads are
+then built for blocks of pairs at once as (time x pairs) arrays and tested
+with an Engle-Granger / Dickey-Fuller regression column-wise:
+
+    scan = scan_pairs(close, lookback=252, z_window=20)     # one row per pair
+    ranked = rank_pairs(scan, significance=0.05)            # cointegrated, most negative t first
+    chosen = select_pairs(ranked, top_n=5)                  # no ticker in two pairs
+
+Blocks are spread over a process pool that maps the log prices read-only
+from a .npy file (as common/sweep.py does), and a finished scan is cached
+under output/pairs/cache/ keyed by the tickers, the window's bars and the
+parameters, so a rerun on the same bars is a file read. Nifty 500 (~125k
+pairs) scans in seconds.
+
+spread_signals() turns the chosen pairs into per-ticker buy/sell signals from
+the live spread z-score. Trading is long-only (cash equities): a spread below
+-entry_z buys the cheap leg a, above +entry_z buys b, and a spread back inside
+exit_z sells whichever leg is held.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+PAIRS_DIR = 'output/pairs'
+CHUNK = 10000  # Pairs per block: a (lookback x CHUNK) float64 spread array per pass
+
+# MacKinnon (2010) Engle-Granger critical values, two variables with a constant:
+# tau = b0 + b1 / T + b2 / T^2
+EG_CRITICAL = {0.01: (-3.89644, -10.9519, -22.527), 0.05: (-3.33613, -6.1101, -6.823),
+               0.10: (-3.04445, -4.2412, -2.720)}
+
+
+def critical_value(significance, nobs):
+    b0, b1, b2 = EG_CRITICAL[significance]
+    return b0 + b1 / nobs + b2 / nobs ** 2
+
+
+def pair_index(n):
+    """(i, j) arrays of every pair i < j of n tickers."""
+    return np.triu_indices(n, k=1)
+
+
+def _scan_block(log_prices, i, j, z_window):
+    """Hedge ratio, Dickey-Fuller t, half-life and z-score for pairs (i[k], j[k]) over log_prices."""
+    mean = log_prices.mean(axis=0)
+    centered = log_prices - mean
+    var = (centered ** 2).sum(axis=0)
+    cov = np.einsum('tk,tk->k', centered[:, i], centered[:, j])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        beta = cov / var[j]
+        corr = cov / np.sqrt(var[i] * var[j])
+        spread = centered[:, i] - centered[:, j] * beta  # Zero-mean residual of log a on log b
+        # Dickey-Fuller without lags: d(spread) = rho * spread[t-1] + e
+        lag, diff = spread[:-1], np.diff(spread, axis=0)
+        sxx = (lag ** 2).sum(axis=0)
+        rho = (lag * diff).sum(axis=0) / sxx
+        resid = diff - rho * lag
+        se = np.sqrt((resid ** 2).sum(axis=0) / (len(diff) - 1) / sxx)
+        half_life = np.where(rho < 0, -np.log(2) / np.log1p(rho), np.inf)
+        tail = spread[-z_window:]
+        z = (tail[-1] - tail.mean(axis=0)) / tail.std(axis=0, ddof=1)
+    return {'beta': beta, 'alpha': mean[i] - beta * mean[j], 'corr': corr, 'adf_t': rho / se,
+            'half_life': half_life, 'spread_std': spread.std(axis=0, ddof=1), 'z': z}
+
+
+# Worker state: the log price window, mapped read-only
+_LOG_PRICES = None
+
+
+def _init_worker(path):
+    global _LOG_PRICES
+    _LOG_PRICES = np.load(path, mmap_mode='r')
+
+
+def _scan_chunk(lo, hi, z_window):
+    i, j = pair_index(_LOG_PRICES.shape[1])
+    return lo, _scan_block(np.asarray(_LOG_PRICES), i[lo:hi], j[lo:hi], z_window)
+
+
+def _cache_key(window, lookback, z_window):
+    payload = json.dumps([list(window.columns), str(window.index[0]), str(window.index[-1]), lookback, z_window,
+                          float(np.round(window.to_numpy().sum(), 6))])
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def scan_pairs(close, lookback=252, z_window=20, workers=None, chunk=CHUNK, cache_dir=None):
+    """One row per pair (a, b) of close's tickers: beta, alpha, corr, adf_t, half_life, spread_std, z.
+
+    Tickers missing a bar (or with a non-positive close) in the last `lookback`
+    rows are left out. workers=1 scans in-process; cache_dir reuses a scan of
+    the same window.
+    """
+    window = close.iloc[-lookback:]
+    window = window.loc[:, window.notna().all() & (window > 0).all()]
+    columns = ['a', 'b', 'beta', 'alpha', 'corr', 'adf_t', 'half_life', 'spread_std', 'z']
+    if window.shape[1] < 2 or len(window) < max(z_window, 3):
+        return pd.DataFrame(columns=columns)
+
+    path = None
+    if cache_dir:
+        path = os.path.join(cache_dir, f"scan_{_cache_key(window, lookback, z_window)}.parquet")
+        if os.path.exists(path):
+            return pd.read_parquet(path)
+
+    log_prices = np.log(window.to_numpy(np.float64))
+    i, j = pair_index(log_prices.shape[1])
+    bounds = [(lo, min(lo + chunk, len(i))) for lo in range(0, len(i), chunk)]
+    if workers == 1 or len(bounds) == 1:
+        blocks = [(lo, _scan_block(log_prices, i[lo:hi], j[lo:hi], z_window)) for lo, hi in bounds]
+    else:
+        tmp = tempfile.mkdtemp(prefix='pairs_')
+        try:
+            np.save(os.path.join(tmp, 'log_prices.npy'), log_prices)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(os.path.join(tmp, 'log_prices.npy'),)) as pool:
+                blocks = list(pool.map(_scan_chunk, *zip(*bounds), [z_window] * len(bounds)))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    blocks.sort(key=lambda block: block[0])
+
+    tickers = np.asarray(window.columns, dtype=object)
+    scan = pd.DataFrame({'a': tickers[i], 'b': tickers[j],
+                         **{k: np.concatenate([block[k] for _, block in blocks]) for k in columns[2:]}})
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        scan.to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+    return scan
+
+
+def rank_pairs(scan, significance=0.05, nobs=252, max_half_life=None, min_corr=None):
+    """Pairs whose spread rejects a unit root at `significance`, most negative Dickey-Fuller t first."""
+    keep = (scan['adf_t'] < critical_value(significance, nobs)) & (scan['half_life'] > 0)
+    if max_half_life is not None:
+        keep &= scan['half_life'] <= max_half_life
+    if min_corr is not None:
+        keep &= scan['corr'] >= min_corr
+    ranked = scan[keep].sort_values(['adf_t', 'half_life']).reset_index(drop=True)
+    ranked.insert(0, 'rank', np.arange(1, len(ranked) + 1))
+    return ranked
+
+
+def select_pairs(ranked, top_n=5):
+    """Greedy top_n pairs in rank order with no ticker shared between two pairs."""
+    used, rows = set(), []
+    for row in ranked.itertuples(index=False):
+        if row.a in used or row.b in used:
+            continue
+        used.update((row.a, row.b))
+        rows.append(row)
+        if len(rows) == top_n:
+            break
+    return pd.DataFrame(rows, columns=ranked.columns)
+
+
+def spread_z(close, pairs, z_window=20):
+    """Last-bar spread z-score per pair (log a - beta * log b - alpha over the last z_window bars)."""
+    tail = np.log(close[list(pairs['a'])].to_numpy(np.float64)[-z_window:]) \
+        - np.log(close[list(pairs['b'])].to_numpy(np.float64)[-z_window:]) * pairs['beta'].to_numpy() \
+        - pairs['alpha'].to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (tail[-1] - tail.mean(axis=0)) / tail.std(axis=0, ddof=1)
+
+
+def spread_signals(close, pairs, z_window=20, entry_z=2, exit_z=0.5, held=None):
+    """Series of 1=buy, -1=sell, 0=hold over close's columns from each pair's live spread z-score."""
+    signal = pd.Series(0, index=close.columns, dtype=np.int64)
+    if pairs.empty or len(close) < z_window:
+        return signal
+    held = pd.Series(False if held is None else held, index=close.columns, dtype=bool)
+    z = spread_z(close, pairs, z_window)
+    for (a, b), value in zip(zip(pairs['a'], pairs['b']), z):
+        if value <= -entry_z:    # a cheap against b
+            signal[a], signal[b] = 1, -int(held[b])
+        elif value >= entry_z:   # b cheap against a
+            signal[a], signal[b] = -int(held[a]), 1
+        elif abs(value) <= exit_z:  # Spread reverted: close either leg
+            signal[a], signal[b] = -int(held[a]), -int(held[b])
+    return signal
+
+
+def write_pairs(ranked, name='pairs', out_dir=PAIRS_DIR):
+    """Write <name>_<date>.csv and repoint <name>_latest.csv; returns the dated path."""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{name}_{pd.Timestamp.now():%Y%m%d}.csv")
+    for target in (path, os.path.join(out_dir, f"{name}_latest.csv")):
+        ranked.to_csv(target + '.tmp', index=False)
+        os.replace(target + '.tmp', target)
+    return path
+
+
+def load_pairs(name='pairs', out_dir=PAIRS_DIR):
+    """Latest published ranked pairs (empty if the scanner has not run)."""
+    path = os.path.join(out_dir, f"{name}_latest.csv")
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=['rank', 'a', 'b', 'beta', 'alpha'])
+    return pd.read_csv(path)
@@ -0,0 +1,75 @@
+"""Compact portfolio state for running many strategy variants in one process.
+
+A Portfolio keeps cash plus per-ticker shares/avg_price/peak/mark in NumPy arrays indexed
+by its universe (no per-position dicts) and uses __slots__, so a hundred
+variants over a 50-name universe stay a few kilobytes each. The `positions`
+property renders the dict form used by journal snapshots and the dashboard.
+"""
+from collections import deque
+
+import numpy as np
+
+
+class Portfolio:
+    __slots__ = ('name', 'strat', 'params', 'tickers', 'index', 'cash', 'shares', 'avg_price', 'peak', 'mark',
+                 'total_value', 'initial_cash', 'trades')
+
+    def __init__(self, tickers, cash, name='default', strat=None, params=None, max_trades=None):
+        self.name = name
+        self.strat = strat
+        self.params = dict(params or {})
+        self.tickers = []
+        self.index = {}
+        self.shares = np.zeros(0, dtype=np.int64)
+        self.avg_price = np.zeros(0, dtype=np.float64)
+        self.peak = np.zeros(0, dtype=np.float64)  # Highest price since entry, for trailing stops
+        self.mark = np.zeros(0, dtype=np.float64)  # Last valid price, for marking when a quote is missing
+        self.cash = float(cash)
+        self.total_value = float(cash)
+        self.initial_cash = float(cash)
+        self.trades = deque(maxlen=max_trades)  # Recent trades; the journal keeps full history
+        for ticker in tickers:
+            self.add_ticker(ticker)
+
+    def __repr__(self):
+        return f"Portfolio({self.name}: {self.strat}, value ₹{self.total_value:.2f}, {len(self.held())} held)"
+
+    def add_ticker(self, ticker):
+        """Index of ticker, growing the arrays if it is new (e.g. a resumed position)."""
+        if ticker not in self.index:
+            self.index[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+            self.shares = np.append(self.shares, 0)
+            self.avg_price = np.append(self.avg_price, 0.0)
+            self.peak = np.append(self.peak, 0.0)
+            self.mark = np.append(self.mark, 0.0)
+        return self.index[ticker]
+
+    def held(self):
+        """Tickers with a non-zero position, in universe order."""
+        return [self.tickers[i] for i in np.flatnonzero(self.shares)]
+
+    def shares_of(self, ticker):
+        i = self.index.get(ticker)
+        return 0 if i is None else int(self.shares[i])
+
+    @property
+    def positions(self):
+        return {self.tickers[i]: {'shares': int(self.shares[i]), 'avg_price': float(self.avg_price[i])}
+                for i in np.flatnonzero(self.shares)}
+
+    def restore(self, state):
+        """Load {'cash', 'positions', 'total_value'} from a journal recovery (trailing peaks restart at avg_price)."""
+        self.cash = float(state['cash'])
+        self.total_value = float(state['total_value'])
+        self.shares[:] = 0
+        self.avg_price[:] = 0.0
+        self.peak[:] = 0.0
+        self.mark[:] = 0.0
+        for ticker, pos in state['positions'].items():
+            i = self.add_ticker(ticker)
+            self.shares[i] = pos['shares']
+            self.avg_price[i] = pos['avg_price']
+            self.peak[i] = pos['avg_price']
+            self.mark[i] = pos['avg_price']
+        return self
@@ -0,0 +1,59 @@
+"""Shared last-price service for the dashboard and the paper trader.
+
+get() answers from an in-process cache while quotes are younger than `ttl`
+seconds and fetches every missing or stale symbol in one batched request, so a
+refresh costs one round-trip however many positions are held. A quote the
+refetch did not cover is dropped rather than served past its TTL.
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def yfinance_quotes(tickers):
+    """Latest 1-minute close for each symbol (full symbol, e.g. 'TCS.NS'), one yf.download call."""
+    import yfinance as yf
+    raw = yf.download(list(tickers), period='1d', interval='1m', group_by='column',
+                      auto_adjust=False, progress=False)
+    if raw.empty:
+        return pd.Series(dtype=np.float64)
+    close = raw['Close']
+    if isinstance(close, pd.Series):  # Older yfinance flattens single-ticker downloads
+        close = close.to_frame(tickers[0])
+    return close.ffill().iloc[-1].dropna()
+
+
+class QuoteService:
+    """TTL cache of last prices in front of a batched fetch(tickers) -> {ticker: price}."""
+
+    def __init__(self, fetch=None, ttl=15):
+        self.fetch = fetch if fetch is not None else yfinance_quotes
+        self.ttl = ttl
+        self._quotes = {}  # ticker -> (price, monotonic fetch time)
+        self._lock = threading.Lock()  # Streamlit sessions share one instance
+        self.fetches = 0
+
+    def get(self, tickers):
+        """Series of prices at most ttl seconds old; symbols without one (the refetch had no price) are omitted."""
+        tickers = list(tickers)
+        with self._lock:
+            now = time.monotonic()
+            stale = [t for t in tickers if t not in self._quotes or now - self._quotes[t][1] > self.ttl]
+            if stale:
+                self.fetches += 1
+                for ticker, price in dict(self.fetch(stale)).items():
+                    if price is not None and not np.isnan(price):
+                        self._quotes[ticker] = (float(price), now)
+                for ticker in stale:  # Not refreshed: expired, callers see it as missing
+                    if now - self._quotes.get(ticker, (None, -np.inf))[1] > self.ttl:
+                        self._quotes.pop(ticker, None)
+            return pd.Series({t: self._quotes[t][0] for t in tickers if t in self._quotes}, dtype=np.float64)
+
+    def invalidate(self, tickers=None):
+        with self._lock:
+            if tickers is None:
+                self._quotes.clear()
+            for ticker in tickers or []:
+                self._quotes.pop(ticker, None)
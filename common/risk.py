@@ -0,0 +1,129 @@
+"""Portfolio-level position sizing and trailing stops.
+
+All candidate buys on a bar are sized together, as arrays over the universe,
+instead of one ticker at a time in signal order:
+
+1. target weight per name: max_position_size ('fixed'), or target_vol / the
+   name's volatility capped at max_position_size ('volatility', ATR or
+   close-to-close std over vol_window bars);
+2. each sector's new buys are scaled down so held + new stays within
+   max_sector_exposure of equity;
+3. all new buys are scaled down so invested + new stays within
+   max_gross_exposure of equity;
+4. all new buys are scaled down so their cost (slippage, brokerage, STT) fits
+   the cash left after this bar's sells.
+
+Every constraint scales the candidates pro rata, so with 50+ tickers the first
+signal no longer takes all the cash. Trailing stops track the highest price
+since entry in Portfolio.peak.
+"""
+import numpy as np
+import pandas as pd
+
+# Keys the sizing rules read; execution.EXECUTION_DEFAULTS and paper_trader.CONFIG carry them
+RISK_DEFAULTS = {
+    'sizing': 'fixed',            # 'fixed': max_position_size of equity per entry; 'volatility': volatility-targeted
+    'vol_method': 'atr',          # 'atr' (needs High/Low, else falls back to 'std') or 'std' of close returns
+    'vol_window': 14,             # Bars in the volatility estimate
+    'target_vol': 0.002,          # Equity fraction one position may move per bar (weight * vol)
+    'max_gross_exposure': 1.0,    # Invested value <= this x equity (1.0 = no leverage)
+    'max_sector_exposure': None,  # e.g. 0.3 of equity per sector; needs 'sectors'
+    'sectors': None,              # {ticker: sector}; tickers without one share an 'Unknown' bucket
+    'trailing_stop_pct': None,    # e.g. 0.05: exit 5% below the highest price since entry
+}
+
+
+def volatility_matrix(close, high=None, low=None, window=14, method='atr'):
+    """Per-bar volatility as a fraction of price, same shape as close.
+
+    'atr': simple moving average of the true range over window bars / close;
+    'std': rolling std of close-to-close returns.
+    """
+    if method == 'atr' and high is not None and low is not None:
+        prev = close.shift(1)
+        high, low = high.reindex_like(close), low.reindex_like(close)
+        true_range = np.fmax(high - low, np.fmax((high - prev).abs(), (low - prev).abs()))
+        return true_range.rolling(window, min_periods=window).mean() / close
+    return close.pct_change(fill_method=None).rolling(window, min_periods=window).std()
+
+
+def volatility(close, high=None, low=None, window=14, method='atr'):
+    """Latest volatility per ticker (Series) from the last window + 1 bars."""
+    tail = window + 1
+    vol = volatility_matrix(close.tail(tail), None if high is None else high.tail(tail),
+                            None if low is None else low.tail(tail), window, method)
+    return vol.iloc[-1] if len(vol) else pd.Series(np.nan, index=close.columns)
+
+
+def target_weights(config, vol=None, n=None):
+    """Equity fraction per candidate before portfolio caps; NaN volatility (no history yet) sizes as 'fixed'."""
+    cap = config['max_position_size']
+    if config['sizing'] != 'volatility' or vol is None:
+        return np.full(len(vol) if n is None else n, cap, dtype=np.float64)
+    vol = np.asarray(vol, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.minimum(config['target_vol'] / vol, cap)
+    return np.where(np.isfinite(weight) & (vol > 0), weight, cap)
+
+
+def sector_codes(tickers, sectors):
+    """Integer sector code per ticker (missing sectors share one code)."""
+    names = [(sectors or {}).get(t) or 'Unknown' for t in tickers]
+    lookup = {name: code for code, name in enumerate(dict.fromkeys(names))}
+    return np.array([lookup[name] for name in names], dtype=np.int64)
+
+
+def size_buys(portfolio, config, idx, price, marks, vol=None, sell_idx=None):
+    """Shares for every candidate buy at portfolio index idx, sized together.
+
+    price: entry price per candidate; marks: current price per portfolio ticker
+    (held positions' market value); vol: per-candidate volatility for
+    'volatility' sizing; sell_idx: positions sold on this bar, whose proceeds
+    count toward cash and whose value leaves the exposure caps.
+    """
+    idx = np.asarray(idx, dtype=np.int64)
+    price = np.asarray(price, dtype=np.float64)
+    if not len(idx):
+        return np.zeros(0, dtype=np.int64)
+    equity = portfolio.total_value
+    value = target_weights(config, vol, len(idx)) * equity
+    held_value = np.nan_to_num(portfolio.shares * np.where(np.isnan(marks), portfolio.avg_price, marks))
+    selling = np.zeros(len(portfolio.shares), dtype=bool)
+    if sell_idx is not None:
+        selling[np.asarray(sell_idx, dtype=np.int64)] = True
+    costs = config['brokerage_fee'] + config['stt']
+    proceeds = float(held_value[selling].sum()) * (1 - config['slippage_bps'] / 1e4) * (1 - costs)
+    held_value = np.where(selling, 0.0, held_value)
+
+    scale = np.ones(len(idx))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if config.get('max_sector_exposure') is not None:
+            codes = sector_codes(portfolio.tickers, config.get('sectors'))
+            n_sectors = codes.max() + 1
+            held = np.bincount(codes, weights=held_value, minlength=n_sectors)
+            new = np.bincount(codes[idx], weights=value, minlength=n_sectors)
+            room = np.clip((config['max_sector_exposure'] * equity - held) / new, 0, 1)
+            scale *= np.nan_to_num(room[codes[idx]], nan=1.0)
+        value = value * scale
+        total = float(value.sum())
+        if total > 0:
+            gross_room = config['max_gross_exposure'] * equity - float(held_value.sum())
+            unit_cost = (1 + config['slippage_bps'] / 1e4) * (1 + costs)  # Per rupee of buy value, all-in
+            value = value * min(max(gross_room / total, 0.0), (portfolio.cash + proceeds) / (total * unit_cost), 1.0)
+        shares = np.floor(value / price)
+    return np.where(np.isfinite(shares) & (price > 0), shares, 0).astype(np.int64)
+
+
+def update_peaks(portfolio, high):
+    """Raise each held position's highest-price-since-entry to this bar's high (aligned to portfolio.tickers)."""
+    held = portfolio.shares > 0
+    portfolio.peak = np.where(held, np.fmax(portfolio.peak, high), 0.0)
+    return portfolio.peak
+
+
+def stop_prices(portfolio, config, idx):
+    """Stop level per position at idx: fixed stop below avg_price, raised by the trailing stop if set."""
+    stop = portfolio.avg_price[idx] * (1 - config['stop_loss_pct'])
+    if config.get('trailing_stop_pct'):
+        stop = np.fmax(stop, portfolio.peak[idx] * (1 - config['trailing_stop_pct']))
+    return stop
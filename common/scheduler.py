@@ -0,0 +1,147 @@
+"""Deadline-aware asyncio scheduler aligned to exchange bar boundaries.
+
+Ticks fire at market_open + k * interval in exchange time (09:15, 09:20, ...
+IST for a 5-minute interval) plus a short settle delay for the closing bar to
+publish, through market_close on trading weekdays. tick(boundary) gets the
+bar boundary it fires for (the 15:30 tick starts at 15:30:02, after the close)
+and runs in a worker thread so the event loop keeps time while it blocks on I/O:
+
+- a tick still running at its deadline is reported as an overrun;
+- a boundary that arrives while the previous tick is still running is skipped
+  (its work is coalesced into the in-flight tick's successor);
+- waking up late past several boundaries runs once, for the latest one.
+
+Start lag behind the boundary, duration, overruns and skips are kept in
+TickMetrics.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from common.data_store import EXCHANGE_TZ
+
+TRADING_WEEKDAYS = (0, 1, 2, 3, 4)  # Mon-Fri; exchange holidays are not modelled
+
+
+def next_boundary(now, interval, market_open, market_close, weekdays=TRADING_WEEKDAYS):
+    """First bar boundary at or after now (tz-aware), within trading hours on a trading day."""
+    day = now.date()
+    while True:
+        if day.weekday() in weekdays:
+            open_dt = datetime.combine(day, market_open, now.tzinfo)
+            close_dt = datetime.combine(day, market_close, now.tzinfo)
+            k = max(0, math.ceil((now - open_dt) / interval))
+            boundary = open_dt + k * interval
+            if boundary <= close_dt:
+                return boundary
+        day += timedelta(days=1)
+        now = datetime.combine(day, market_open, now.tzinfo)
+
+
+def in_market_hours(now, market_open, market_close, weekdays=TRADING_WEEKDAYS):
+    return now.weekday() in weekdays and market_open <= now.time() <= market_close
+
+
+class TickMetrics:
+    """Recent tick timings plus overrun/skip/error counters."""
+
+    def __init__(self, maxlen=1000):
+        self.records = deque(maxlen=maxlen)  # (boundary, lag_sec, duration_sec, overrun)
+        self.overruns = 0
+        self.skipped = 0
+        self.errors = 0
+
+    def record(self, boundary, lag, duration, overrun):
+        self.records.append((boundary, lag, duration, overrun))
+        self.overruns += overrun
+
+    def summary(self):
+        """p50/p95/max of start lag and duration over the kept ticks."""
+        if not self.records:
+            return {'ticks': 0, 'overruns': self.overruns, 'skipped': self.skipped, 'errors': self.errors}
+        lag = np.array([r[1] for r in self.records])
+        duration = np.array([r[2] for r in self.records])
+        out = {'ticks': len(self.records), 'overruns': self.overruns, 'skipped': self.skipped, 'errors': self.errors}
+        for name, values in (('lag', lag), ('duration', duration)):
+            out[f"{name}_p50"], out[f"{name}_p95"] = (round(float(v), 3) for v in np.percentile(values, [50, 95]))
+            out[f"{name}_max"] = round(float(values.max()), 3)
+        return out
+
+
+class MarketScheduler:
+    """Runs tick() once per bar boundary during market hours."""
+
+    def __init__(self, tick, interval_min, market_open, market_close, deadline_sec=None,
+                 settle_sec=2, tz=EXCHANGE_TZ, weekdays=TRADING_WEEKDAYS):
+        self.tick = tick
+        self.interval = timedelta(minutes=interval_min)
+        self.market_open = market_open
+        self.market_close = market_close
+        self.deadline_sec = deadline_sec if deadline_sec is not None else 0.8 * self.interval.total_seconds()
+        self.settle = timedelta(seconds=settle_sec)
+        self.tz = ZoneInfo(tz)
+        self.weekdays = weekdays
+        self.metrics = TickMetrics()
+        self._running = None  # Future of the in-flight tick
+
+    def now(self):
+        return datetime.now(self.tz)
+
+    def _next(self, after):
+        return next_boundary(after, self.interval, self.market_open, self.market_close, self.weekdays)
+
+    def _timed_tick(self, boundary):
+        """Worker-thread body: run tick and record its timing."""
+        start = self.now()
+        lag = (start - boundary - self.settle).total_seconds()
+        t0 = time.perf_counter()
+        try:
+            self.tick(boundary)
+        except Exception as e:  # Keep the loop alive; the next boundary retries
+            self.metrics.errors += 1
+            print(f"Tick {boundary:%H:%M} failed: {e!r}")
+        duration = time.perf_counter() - t0
+        overrun = duration > self.deadline_sec
+        self.metrics.record(boundary, lag, duration, overrun)
+        print(f"Tick {boundary:%H:%M}: started {lag:+.2f}s after bar close, took {duration:.2f}s"
+              + (f" (OVERRUN, deadline {self.deadline_sec:g}s)" if overrun else ""))
+
+    async def _sleep_until(self, when):
+        while (delay := (when - self.now()).total_seconds()) > 0:
+            await asyncio.sleep(min(delay, 60))  # Re-check the wall clock after long sleeps
+
+    async def run(self, max_ticks=None):
+        loop = asyncio.get_running_loop()
+        last, ticks = None, 0
+        while max_ticks is None or ticks < max_ticks:
+            boundary = self._next(self.now() - self.settle)
+            if last is not None and boundary <= last:
+                boundary = self._next(last + timedelta(microseconds=1))
+            if last is not None and boundary.date() != last.date():
+                print(f"Session {last:%Y-%m-%d} tick metrics: {self.metrics.summary()}")
+            await self._sleep_until(boundary + self.settle)
+
+            # Woke up late (suspend, long GC, overrun): run once for the latest passed boundary
+            close_dt = datetime.combine(boundary.date(), self.market_close, self.tz)
+            while boundary + self.interval <= min(self.now() - self.settle, close_dt):
+                boundary += self.interval
+                self.metrics.skipped += 1
+            last = boundary
+            ticks += 1
+
+            if self._running is not None and not self._running.done():
+                self.metrics.skipped += 1
+                print(f"Tick {boundary:%H:%M} skipped: previous tick still running")
+                continue
+            self._running = loop.run_in_executor(None, self._timed_tick, boundary)
+            done, _ = await asyncio.wait({self._running}, timeout=self.deadline_sec)
+            if not done:
+                print(f"Tick {boundary:%H:%M} missed its {self.deadline_sec:g}s deadline; "
+                      f"boundaries until it finishes are skipped")
+        if self._running is not None:
+            await self._running
@@ -0,0 +1,193 @@
+"""Declarative screens over the cached fundamentals table.
+
+Build predicates from fields and compose them, then sort and take the top N:
+
+    blue_chips = Screen('blue_chips',
+                        where=(F('netIncomeToCommon') > 0) & (F('returnOnEquity') * 100 > 15) & (F('beta') < 1),
+                        sort_by=F('returnOnEquity'), top=20)
+    result = blue_chips.run(ScreenTable(cache.table()))
+
+ScreenTable holds each column as a NumPy array, so a screen is a handful of
+vectorized array ops with no network access. Results are published as
+versioned universe files (output/universes/<name>_v<N>.json plus
+<name>_latest.json) that paper_trader.py loads at startup.
+"""
+import glob
+import json
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+UNIVERSE_DIR = 'output/universes'
+
+# Latest Nifty 50 constituents (as of Nov 4, 2025; update if needed via NSE site)
+NIFTY_50 = [
+    'RELIANCE.NS', 'HDFCBANK.NS', 'BHARTIARTL.NS', 'TCS.NS', 'ICICIBANK.NS',
+    'SBIN.NS', 'BAJFINANCE.NS', 'INFY.NS', 'HINDUNILVR.NS', 'LT.NS',
+    'ITC.NS', 'MARUTI.NS', 'M&M.NS', 'KOTAKBANK.NS', 'HCLTECH.NS',
+    'SUNPHARMA.NS', 'AXISBANK.NS', 'ULTRACEMCO.NS', 'BAJAJFINSV.NS', 'TITAN.NS',
+    'NTPC.NS', 'ONGC.NS', 'ADANIPORTS.NS', 'ZOMATO.NS', 'BEL.NS',
+    'JSWSTEEL.NS', 'ADANIENT.NS', 'POWERGRID.NS', 'WIPRO.NS', 'BAJAJ-AUTO.NS',
+    'NESTLEIND.NS', 'ASIANPAINT.NS', 'COALINDIA.NS', 'TATASTEEL.NS', 'INDIGO.NS',
+    'SBILIFE.NS', 'GRASIM.NS', 'JIOFIN.NS', 'EICHERMOT.NS', 'HINDALCO.NS',
+    'TRENT.NS', 'HDFCLIFE.NS', 'TATAMOTORS.NS', 'SHRIRAMFIN.NS', 'TECHM.NS',
+    'CIPLA.NS', 'TATACONSUM.NS', 'APOLLOHOSP.NS', 'MAXHEALTH.NS', 'DRREDDY.NS'
+]
+
+
+class ScreenTable:
+    """Column arrays of a fundamentals DataFrame, converted once and reused across screens."""
+
+    def __init__(self, df):
+        self.index = df.index.to_numpy()
+        self.columns = {col: df[col].to_numpy() for col in df.columns}
+
+    def __len__(self):
+        return len(self.index)
+
+
+class Expr:
+    """A column expression; comparison operators return a Predicate."""
+
+    def __init__(self, fn, text):
+        self.fn = fn
+        self.text = text
+
+    def __call__(self, table):
+        return self.fn(table)
+
+    def __repr__(self):
+        return self.text
+
+    def _arith(self, other, op, symbol):
+        if isinstance(other, Expr):
+            return Expr(lambda t: op(self(t), other(t)), f"({self.text} {symbol} {other.text})")
+        return Expr(lambda t: op(self(t), other), f"({self.text} {symbol} {other!r})")
+
+    def _compare(self, other, op, symbol):
+        value = other if isinstance(other, Expr) else None
+
+        def fn(table):
+            with np.errstate(invalid='ignore'):  # NaN compares False: missing data never passes
+                return op(self(table), value(table) if value is not None else other)
+        return Predicate(fn, f"{self.text} {symbol} {other.text if value is not None else repr(other)}")
+
+    def __add__(self, other): return self._arith(other, np.add, '+')
+    def __sub__(self, other): return self._arith(other, np.subtract, '-')
+    def __mul__(self, other): return self._arith(other, np.multiply, '*')
+    def __truediv__(self, other): return self._arith(other, np.true_divide, '/')
+    def __gt__(self, other): return self._compare(other, np.greater, '>')
+    def __ge__(self, other): return self._compare(other, np.greater_equal, '>=')
+    def __lt__(self, other): return self._compare(other, np.less, '<')
+    def __le__(self, other): return self._compare(other, np.less_equal, '<=')
+    def __eq__(self, other): return self._compare(other, np.equal, '==')
+    def __ne__(self, other): return self._compare(other, np.not_equal, '!=')
+    __hash__ = None
+
+    def isin(self, values):
+        values = list(values)
+        return Predicate(lambda t: np.isin(self(t), values), f"{self.text} in {values!r}")
+
+    def between(self, low, high):
+        return (self >= low) & (self <= high)
+
+    def notna(self):
+        return Predicate(lambda t: ~pd.isna(self(t)), f"{self.text} is not null")
+
+
+def F(name):
+    """Reference a column of the screen table."""
+    return Expr(lambda t: t.columns[name], name)
+
+
+class Predicate:
+    """Boolean row mask; combine with &, | and ~."""
+
+    def __init__(self, fn, text):
+        self.fn = fn
+        self.text = text
+
+    def __call__(self, table):
+        return np.asarray(self.fn(table), dtype=bool)
+
+    def __repr__(self):
+        return self.text
+
+    def __and__(self, other):
+        return Predicate(lambda t: self(t) & other(t), f"({self.text}) & ({other.text})")
+
+    def __or__(self, other):
+        return Predicate(lambda t: self(t) | other(t), f"({self.text}) | ({other.text})")
+
+    def __invert__(self):
+        return Predicate(lambda t: ~self(t), f"~({self.text})")
+
+
+class Screen:
+    """Filter -> sort -> top N over a ScreenTable, with optional derived output columns."""
+
+    def __init__(self, name, where=None, sort_by=None, ascending=False, top=None, select=None):
+        self.name = name
+        self.where = where
+        self.sort_by = sort_by
+        self.ascending = ascending
+        self.top = top
+        self.select = select  # {output column: Expr}; default is every table column
+
+    def __repr__(self):
+        order = 'asc' if self.ascending else 'desc'
+        return (f"Screen({self.name}: where {self.where!r}, sort by {self.sort_by!r} {order}, "
+                f"top {self.top})")
+
+    def rows(self, table):
+        """Positions of matching rows in output order."""
+        rows = np.arange(len(table)) if self.where is None else np.flatnonzero(self.where(table))
+        if self.sort_by is not None and len(rows):
+            keys = np.asarray(self.sort_by(table), dtype=np.float64)[rows]
+            keys = np.where(np.isnan(keys), np.inf, keys if self.ascending else -keys)  # NaN last
+            rows = rows[np.argsort(keys, kind='stable')]
+        return rows if self.top is None else rows[:self.top]
+
+    def run(self, table):
+        """Matching rows as a DataFrame indexed by ticker."""
+        if isinstance(table, pd.DataFrame):
+            table = ScreenTable(table)
+        rows = self.rows(table)
+        if self.select is None:
+            data = {col: values[rows] for col, values in table.columns.items()}
+        else:
+            data = {col: np.asarray(expr(table))[rows] for col, expr in self.select.items()}
+        return pd.DataFrame(data, index=pd.Index(table.index[rows], name='Ticker'))
+
+
+# Versioned universe files
+def _versions(name, out_dir):
+    pattern = re.compile(rf"{re.escape(name)}_v(\d+)\.json$")
+    found = (pattern.search(os.path.basename(p)) for p in glob.glob(os.path.join(out_dir, f"{name}_v*.json")))
+    return sorted(int(m.group(1)) for m in found if m)
+
+
+def write_universe(name, tickers, screen=None, out_dir=UNIVERSE_DIR):
+    """Write <name>_v<N+1>.json and repoint <name>_latest.json; returns the versioned path."""
+    os.makedirs(out_dir, exist_ok=True)
+    versions = _versions(name, out_dir)
+    version = versions[-1] + 1 if versions else 1
+    payload = {'name': name, 'version': version, 'created_at': datetime.now().isoformat(),
+               'screen': repr(screen) if screen is not None else None, 'tickers': list(tickers)}
+    path = os.path.join(out_dir, f"{name}_v{version}.json")
+    for target in (path, os.path.join(out_dir, f"{name}_latest.json")):
+        tmp = target + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp, target)
+    return path
+
+
+def load_universe(name, version=None, out_dir=UNIVERSE_DIR):
+    """Tickers of a published universe (latest unless a version is given)."""
+    suffix = 'latest' if version is None else f"v{version}"
+    with open(os.path.join(out_dir, f"{name}_{suffix}.json"), 'r') as f:
+        return json.load(f)['tickers']
@@ -0,0 +1,90 @@
+"""Per-bar strategy output as a partitioned Parquet dataset.
+
+    output/signals/strategy=ma_crossover/ticker=RELIANCE.NS/year=2024/part-0.parquet
+
+Each strategy run writes one frame per ticker: timestamp, Close, Signal,
+Position and its indicator columns (SMA_Short, Z_Score, ...). A rewrite of a
+ticker replaces its bars from the frame's first timestamp on (older years
+and earlier bars of the first year are kept), so reruns are idempotent and
+workers writing different tickers never touch the same files.
+
+read() opens one strategy's partition and pushes the filters down: ticker and
+year prune directories, the timestamp range skips row groups by their
+min/max statistics. One ticker's last year reads the same few files however
+many tickers and years the dataset holds.
+"""
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+SIGNALS_DIR = 'output/signals'
+PARTITIONING = ds.partitioning(pa.schema([('ticker', pa.string()), ('year', pa.int32())]), flavor='hive')
+ROW_GROUP = 50000  # Rows per row group: the unit skipped by timestamp filters
+
+
+class SignalStore:
+    def __init__(self, root=SIGNALS_DIR):
+        self.root = root
+
+    def _dir(self, strategy):
+        return os.path.join(self.root, f"strategy={strategy}")
+
+    def write(self, strategy, ticker, frame):
+        """Store a per-bar frame (DatetimeIndex) for one ticker; returns rows written."""
+        if frame.empty:
+            return 0
+        df = frame.reset_index(names='timestamp')
+        df['timestamp'] = pd.to_datetime(df['timestamp']).astype('datetime64[ns]')
+        df = df.sort_values('timestamp')
+        first = df['timestamp'].iloc[0]
+        kept = self.read(strategy, ticker, start=pd.Timestamp(first.year, 1, 1), end=first - pd.Timedelta(1))
+        if not kept.empty:  # Earlier bars of a partially covered first year survive the rewrite
+            df = pd.concat([kept.drop(columns='ticker').reset_index(), df], ignore_index=True)
+        df['ticker'] = ticker
+        df['year'] = df['timestamp'].dt.year.astype('int32')
+        ds.write_dataset(pa.Table.from_pandas(df, preserve_index=False), self._dir(strategy), format='parquet',
+                         partitioning=PARTITIONING, existing_data_behavior='delete_matching',
+                         basename_template='part-{i}.parquet', max_rows_per_group=ROW_GROUP,
+                         min_rows_per_group=min(len(df), ROW_GROUP))
+        return len(df)
+
+    def strategies(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d.split('=', 1)[1] for d in os.listdir(self.root) if d.startswith('strategy='))
+
+    def tickers(self, strategy):
+        path = self._dir(strategy)
+        if not os.path.isdir(path):
+            return []
+        return sorted(d.split('=', 1)[1] for d in os.listdir(path) if d.startswith('ticker='))
+
+    def read(self, strategy, tickers=None, start=None, end=None, columns=None):
+        """Rows for the given tickers in [start, end], sorted by ticker and time; empty if none stored."""
+        path = self._dir(strategy)
+        if not os.path.isdir(path):
+            return pd.DataFrame()
+        dataset = ds.dataset(path, format='parquet', partitioning=PARTITIONING)
+        expr = None
+        clauses = []
+        if tickers is not None:
+            tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+            clauses.append(ds.field('ticker').isin(tickers))
+        if start is not None:
+            start = pd.Timestamp(start)
+            clauses += [ds.field('year') >= start.year, ds.field('timestamp') >= pa.scalar(start, pa.timestamp('ns'))]
+        if end is not None:
+            end = pd.Timestamp(end)
+            clauses += [ds.field('year') <= end.year, ds.field('timestamp') <= pa.scalar(end, pa.timestamp('ns'))]
+        for clause in clauses:
+            expr = clause if expr is None else expr & clause
+        if columns is not None:
+            columns = ['timestamp', 'ticker'] + [c for c in columns if c not in ('timestamp', 'ticker')]
+        df = dataset.to_table(columns=columns, filter=expr).to_pandas()
+        if df.empty:
+            return df
+        df['ticker'] = df['ticker'].astype(str)
+        df = df.drop(columns=['year'], errors='ignore').sort_values(['ticker', 'timestamp'])
+        return df.set_index('timestamp')
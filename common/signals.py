@@ -0,0 +1,154 @@
+"""Batch signal engine: one pass over a wide (time x ticker) price matrix.
+
+Each function returns a Series of 1=buy, -1=sell, 0=hold indexed by ticker and
+matches the per-ticker functions in paper_trader.py bar for bar. Only the tail
+rows a signal needs are touched, so cost is flat in history length and a single
+array op in universe size.
+"""
+import numpy as np
+import pandas as pd
+
+
+def bars_needed(strat, params=None):
+    """Rows of history the strategy's signal reads."""
+    params = params or {}
+    if strat == 'ma_crossover':
+        return params.get('long_window', 200) + 1
+    if strat == 'mean_reversion':
+        return params.get('period', 20)
+    if strat == 'momentum':
+        return params.get('lookback', 10) + 1
+    if strat == 'pairs':
+        return params.get('z_window', 20)
+    raise ValueError("Unknown strat")
+
+
+def _to_signal(close, buy, sell):
+    signal = np.where(buy, 1, np.where(sell, -1, 0))
+    return pd.Series(signal, index=close.columns, dtype=np.int64)
+
+
+def ma_crossover_signals(close, short_window=50, long_window=200):
+    """Buy where SMA short crosses above SMA long on the last bar, sell on the cross below."""
+    values = close.to_numpy(np.float64)
+    if len(values) < long_window + 1:
+        return _to_signal(close, False, False)
+    tail = values[-(long_window + 1):]
+    curr_short = tail[-short_window:].mean(axis=0)
+    prev_short = tail[-short_window - 1:-1].mean(axis=0)
+    curr_long = tail[1:].mean(axis=0)
+    prev_long = tail[:-1].mean(axis=0)
+    with np.errstate(invalid='ignore'):  # NaN (missing bars) compares False -> hold
+        buy = (prev_short <= prev_long) & (curr_short > curr_long)
+        sell = (prev_short >= prev_long) & (curr_short < curr_long)
+    return _to_signal(close, buy, sell)
+
+
+def mean_reversion_signals(close, period=20, z_threshold=2):
+    """Buy below -z_threshold, sell above +z_threshold of the rolling z-score."""
+    values = close.to_numpy(np.float64)
+    if len(values) < period:
+        return _to_signal(close, False, False)
+    tail = values[-period:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (tail[-1] - tail.mean(axis=0)) / tail.std(axis=0, ddof=1)
+        return _to_signal(close, z < -z_threshold, z > z_threshold)
+
+
+def momentum_signals(close, lookback=10, top_n=1, held=None):
+    """Buy the top_n mean returns over lookback; sell held names that dropped out."""
+    values = close.to_numpy(np.float64)[-(lookback + 1):]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = values[1:] / values[:-1] - 1
+        valid = ~np.isnan(returns)
+        scores = np.where(valid, returns, 0).sum(axis=0) / valid.sum(axis=0)  # NaN-skipping mean
+    ranked = np.argsort(-np.where(np.isnan(scores), -np.inf, scores), kind='stable')
+    top = np.zeros(len(scores), dtype=bool)
+    top[ranked[:top_n]] = True
+    top &= ~np.isnan(scores)
+    held = np.zeros(len(scores), dtype=bool) if held is None else np.asarray(held, dtype=bool)
+    return _to_signal(close, top, ~top & held)
+
+
+def compute_signals(close, strat, params=None, held=None):
+    """Dispatch to the batch signal function for strat."""
+    params = params or {}
+    if strat == 'ma_crossover':
+        return ma_crossover_signals(close, **params)
+    if strat == 'mean_reversion':
+        return mean_reversion_signals(close, **params)
+    if strat == 'momentum':
+        return momentum_signals(close, held=held, **params)
+    raise ValueError("Unknown strat")
+
+
+# Full-history signal matrices for replays: row t equals the last-bar signal on close[:t+1]
+def _rolling(close, stat, window, cache):
+    """close.rolling(window).<stat>(), memoized in cache (any mapping) when given."""
+    key = (stat, window)
+    if cache is not None and key in cache:
+        return cache[key]
+    if stat == 'momentum':
+        value = close.pct_change(fill_method=None).rolling(window, min_periods=1).mean()
+    else:
+        value = getattr(close.rolling(window), stat)()
+    if cache is not None:
+        cache[key] = value
+    return value
+
+
+def signal_matrix(close, strat, params=None, cache=None):
+    """(time x ticker) frame of signals for every bar.
+
+    For momentum the matrix marks top-ranked names with 1 and everything else 0;
+    the sell leg depends on holdings, so the caller turns 0 into -1 for held names.
+    Pass a cache mapping to share rolling windows across calls on the same close.
+    """
+    params = params or {}
+    if strat == 'ma_crossover':
+        short = _rolling(close, 'mean', params.get('short_window', 50), cache)
+        long = _rolling(close, 'mean', params.get('long_window', 200), cache)
+        buy = (short.shift(1) <= long.shift(1)) & (short > long)
+        sell = (short.shift(1) >= long.shift(1)) & (short < long)
+    elif strat == 'mean_reversion':
+        period, z_threshold = params.get('period', 20), params.get('z_threshold', 2)
+        z = (close - _rolling(close, 'mean', period, cache)) / _rolling(close, 'std', period, cache)
+        buy, sell = z < -z_threshold, z > z_threshold
+    elif strat == 'momentum':
+        scores = _rolling(close, 'momentum', params.get('lookback', 10), cache)
+        buy = scores.rank(axis=1, ascending=False, method='first') <= params.get('top_n', 1)
+        sell = buy & False
+    else:
+        raise ValueError("Unknown strat")
+    return buy.astype(np.int64) - sell.astype(np.int64)
+
+
+# Momentum rebalancing: rank once per rebalance date, forward-fill weights in one pass
+def momentum_rebalance_scores(returns, lookback=10, freq='W'):
+    """Mean return over the last `lookback` bars before each rebalance date.
+
+    Rebalance dates are the resample(freq) labels after the first `lookback`
+    periods; each date is scored on bars strictly before the calendar day it
+    falls on, so there is no look-ahead.
+    """
+    dates = returns.resample(freq).first().index[lookback:]
+    means = returns.rolling(lookback, min_periods=1).mean()
+    rows = returns.index.searchsorted(dates - pd.Timedelta(days=1), side='right') - 1
+    valid = rows >= lookback - 1  # Needs `lookback` bars of history
+    scores = means.iloc[rows[valid]]
+    scores.index = dates[valid]
+    return scores
+
+
+def momentum_rebalance_weights(returns, lookback=10, top_n=3, freq='W'):
+    """(time x ticker) weights: 1/top_n in the top-ranked names, held until the next rebalance."""
+    scores = momentum_rebalance_scores(returns, lookback, freq)
+    top = scores.rank(axis=1, ascending=False, method='first') <= top_n
+    targets = top.astype(np.float64) / top_n
+    rows = returns.index.searchsorted(targets.index, side='left')  # First bar on/after the date
+    keep = rows < len(returns)
+    targets = targets[keep]
+    targets.index = returns.index[rows[keep]]
+    targets = targets[~targets.index.duplicated(keep='last')]
+    schedule = targets.reindex(returns.index)  # Sparse: NaN between rebalances
+    return schedule.ffill().fillna(0.0)
@@ -0,0 +1,174 @@
+"""Parallel parameter sweep over strategy windows.
+
+The close matrix is written once to a .npy file and every worker maps it
+read-only (np.load(mmap_mode='r')), so price data is never pickled per task.
+Combos are grouped by the window they share (long_window / period / lookback)
+and each worker keeps a small LRU of rolling results, so a window common to
+many combos is computed once per worker instead of once per combo. Groups
+larger than len(combos) / workers are split into chunks of that size, so a
+grid sharing two or three windows still keeps every core busy. Momentum
+signals on Adj Close (as momentum.py and the paper trader do) and fills at
+Close; the signal matrix is mapped the same way. Workers
+return equity curves; the parent scores them all in one vectorized
+common.analytics.performance call (return, CAGR, Sharpe, Sortino, drawdown).
+
+Usage (from the repo root):
+    python -m common.sweep --strat ma_crossover --tickers RELIANCE.NS,TCS.NS \
+        --grid short_window=10,20,50 --grid long_window=100,150,200
+"""
+import argparse
+import itertools
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from common.analytics import performance
+from common.backtest import run_backtest
+
+# Parameter every combo in a task shares, so its rolling window is reused
+GROUP_KEY = {'ma_crossover': 'long_window', 'mean_reversion': 'period', 'momentum': 'lookback'}
+SIGNAL_COLUMN = {'momentum': 'Adj Close'}  # Strats whose signals read another column than Close
+CACHE_SIZE = 32  # Rolling frames kept per worker
+
+
+class _LRU(OrderedDict):
+    """Bounded mapping for signal_matrix's rolling cache."""
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        self.move_to_end(key)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+def expand_grid(grid):
+    """{'a': [1, 2], 'b': [3]} -> [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _valid(strat, params):
+    if strat == 'ma_crossover':
+        return params.get('short_window', 50) < params.get('long_window', 200)
+    return True
+
+
+# Worker state: the shared price (and signal) matrices and the rolling cache
+_CLOSE = None
+_SIGNAL = None
+_CACHE = None
+
+
+def _init_worker(path, index_path, columns, signal_path=None):
+    global _CLOSE, _SIGNAL, _CACHE
+    index = pd.DatetimeIndex(np.load(index_path).astype('datetime64[ns]'))
+    _CLOSE = pd.DataFrame(np.load(path, mmap_mode='r'), index=index, columns=columns, copy=False)
+    _SIGNAL = None if signal_path is None else pd.DataFrame(np.load(signal_path, mmap_mode='r'), index=index,
+                                                            columns=columns, copy=False)
+    _CACHE = _LRU(CACHE_SIZE)
+
+
+def _run_group(strat, combos, config, mode, start):
+    rows = []
+    for params in combos:
+        result = run_backtest(_CLOSE, strat, params, config, mode=mode, signal_close=_SIGNAL, start=start,
+                              cache=_CACHE)
+        rows.append(({**params, 'final_value': result['final_value'], 'trades': len(result['trades'])},
+                     result['equity'].to_numpy()))
+    return rows
+
+
+def run_sweep(close, strat, grid, config=None, mode='vectorized', start=None, workers=None,
+              metric='total_return', out_path='output/sweep_results.csv', signal_close=None):
+    """Evaluate every combo in grid over close across a process pool; returns the ranked table.
+
+    signal_close (aligned with close) feeds the signals while fills use close.
+    """
+    combos = [p for p in expand_grid(grid) if _valid(strat, p)]
+    key = GROUP_KEY[strat]
+    groups = {}
+    for params in combos:
+        groups.setdefault(params.get(key), []).append(params)
+    size = max(-(-len(combos) // (workers or os.cpu_count() or 1)), 1)  # Ceil: one chunk per worker
+    tasks = [group[i:i + size] for group in groups.values() for i in range(0, len(group), size)]
+
+    tmp = tempfile.mkdtemp(prefix='sweep_')
+    try:
+        path, index_path = os.path.join(tmp, 'close.npy'), os.path.join(tmp, 'index.npy')
+        np.save(path, close.to_numpy(np.float64))
+        np.save(index_path, close.index.values.astype('datetime64[ns]').astype(np.int64))
+        signal_path = None
+        if signal_close is not None:
+            signal_path = os.path.join(tmp, 'signal.npy')
+            np.save(signal_path, signal_close.reindex(index=close.index, columns=close.columns).to_numpy(np.float64))
+        columns = list(close.columns)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(path, index_path, columns, signal_path)) as pool:
+            futures = [pool.submit(_run_group, strat, task, config, mode, start) for task in tasks]
+            rows = [row for future in futures for row in future.result()]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    # Score every equity curve in one vectorized pass (all share the evaluation index)
+    results = pd.DataFrame([row for row, _ in rows])
+    if rows:
+        index = close.index[close.index.searchsorted(pd.Timestamp(start)):] if start is not None else close.index
+        equity = pd.DataFrame(np.column_stack([curve for _, curve in rows]), index=index)
+        results = pd.concat([results, performance(equity).reset_index(drop=True)], axis=1)
+    if not results.empty:
+        results = results.sort_values(metric, ascending=False).reset_index(drop=True)
+        results.insert(0, 'rank', np.arange(1, len(results) + 1))
+    if out_path:
+        os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+        results.to_csv(out_path, index=False)
+    return results
+
+
+def _parse_grid(items):
+    """['short_window=10,20', 'z_threshold=1.5,2'] -> {'short_window': [10, 20], 'z_threshold': [1.5, 2.0]}"""
+    grid = {}
+    for item in items:
+        name, values = item.split('=', 1)
+        grid[name] = [float(v) if '.' in v else int(v) for v in values.split(',')]
+    return grid
+
+
+if __name__ == "__main__":
+    from common.data_store import MarketDataStore, period_start
+
+    parser = argparse.ArgumentParser(description="Grid-search strategy parameters over stored bars")
+    parser.add_argument('--strat', required=True, choices=sorted(GROUP_KEY))
+    parser.add_argument('--tickers', required=True, help="Comma-separated, e.g. RELIANCE.NS,TCS.NS")
+    parser.add_argument('--grid', action='append', required=True, help="name=v1,v2,... (repeatable)")
+    parser.add_argument('--period', default='1y', help="Evaluation window; earlier bars only warm up indicators")
+    parser.add_argument('--mode', default='vectorized', choices=['vectorized', 'event'])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--metric', default='total_return',
+                        choices=['total_return', 'cagr', 'sharpe', 'sortino', 'max_drawdown'], help="Ranking column")
+    parser.add_argument('--data-dir', default='output/market_data')
+    parser.add_argument('--out', default='output/sweep_results.csv')
+    args = parser.parse_args()
+
+    tickers = args.tickers.split(',')
+    store = MarketDataStore(args.data_dir)
+    store.refresh(tickers)
+    close = store.close_matrix(tickers)
+    signal_close = None
+    if args.strat in SIGNAL_COLUMN:
+        signal_close = store.close_matrix(tickers, column=SIGNAL_COLUMN[args.strat])
+    results = run_sweep(close, args.strat, _parse_grid(args.grid), mode=args.mode, start=period_start(args.period),
+                        workers=args.workers, metric=args.metric, out_path=args.out, signal_close=signal_close)
+    print(results.head(20).to_string(index=False))
+    print(f"\n{len(results)} combos ranked -> {args.out}")
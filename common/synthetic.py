@@ -0,0 +1,112 @@
+"""Deterministic synthetic OHLCV for offline runs and benchmarks.
+
+Closes follow geometric Brownian motion whose drift and volatility switch
+between market regimes (a Markov chain shared by every ticker: calm bull,
+volatile bear), with a per-ticker beta to the market factor plus idiosyncratic
+noise. Open/High/Low/Volume are derived from the close path so every bar is
+consistent (Low <= Open, Close <= High). A ticker's bars depend only on the
+seed and its name, not on which other tickers are generated with it.
+
+    bars = generate(synthetic_tickers(500), years=10)     # {'Open': (time x ticker) frame, ...}
+    store = MarketDataStore(root, SyntheticProvider(years=10))  # Fills the store offline
+"""
+import math
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from common.bars import TIMEFRAMES
+from common.data_store import COLUMNS, DataProvider, period_start
+
+TRADING_DAYS = 252
+SESSION_MINUTES = 375  # 09:15-15:30 IST
+
+# Annualized drift / volatility and the chance of staying in the regime each day
+REGIMES = [
+    {'name': 'bull', 'drift': 0.12, 'vol': 0.16, 'stay': 0.995},
+    {'name': 'bear', 'drift': -0.25, 'vol': 0.35, 'stay': 0.98},
+]
+
+
+def synthetic_tickers(n):
+    return [f"SYN{i:04d}.NS" for i in range(n)]
+
+
+def bar_index(start, days, interval='1d'):
+    """Business-day bar timestamps; intraday bars start at 09:15 every width minutes."""
+    days = pd.bdate_range(start, periods=days)
+    width = TIMEFRAMES[interval]
+    if width is None:
+        return days
+    offsets = pd.to_timedelta(9 * 60 + 15 + np.arange(math.ceil(SESSION_MINUTES / width)) * width, unit='min')
+    return pd.DatetimeIndex((days.values[:, None] + offsets.values[None, :]).ravel())
+
+
+def regime_path(bars, bars_per_day, seed=0, regimes=REGIMES):
+    """Regime number per bar; spells last a geometric number of days."""
+    rng = np.random.default_rng([seed, 0])
+    path = np.empty(bars, dtype=np.int64)
+    state, pos = 0, 0
+    while pos < bars:
+        days = rng.geometric(1 - regimes[state]['stay'])
+        path[pos:pos + days * bars_per_day] = state
+        pos += days * bars_per_day
+        others = [i for i in range(len(regimes)) if i != state]
+        state = others[rng.integers(len(others))] if others else state
+    return path
+
+
+def generate(tickers, years=1, interval='1d', start='2015-01-01', seed=0, regimes=REGIMES):
+    """{'Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume': (time x ticker) DataFrame}."""
+    tickers = list(tickers)
+    width = TIMEFRAMES[interval]
+    bars_per_day = 1 if width is None else math.ceil(SESSION_MINUTES / width)
+    index = bar_index(start, int(round(years * TRADING_DAYS)), interval)
+    n, dt = len(index), 1 / (TRADING_DAYS * bars_per_day)
+
+    # Market factor: shared regime drift/vol
+    state = regime_path(n, bars_per_day, seed, regimes)
+    drift = np.array([r['drift'] for r in regimes])[state] * dt
+    vol = np.array([r['vol'] for r in regimes])[state] * math.sqrt(dt)
+    market = drift - vol ** 2 / 2 + vol * np.random.default_rng([seed, 1]).standard_normal(n)
+
+    out = {col: np.empty((n, len(tickers))) for col in ('Open', 'High', 'Low', 'Close', 'Volume')}
+    for j, ticker in enumerate(tickers):
+        rng = np.random.default_rng([seed, 2, zlib.crc32(ticker.encode())])
+        beta, idio, price, base_volume = rng.uniform(0.6, 1.4), rng.uniform(0.1, 0.3), rng.uniform(50, 3000), rng.lognormal(12, 1)
+        bar_vol = np.sqrt((beta * vol) ** 2 + idio ** 2 * dt)
+        noise = rng.standard_normal((4, n))
+        log_ret = beta * market + idio * math.sqrt(dt) * noise[0] - idio ** 2 * dt / 2
+        close = price * np.exp(np.cumsum(log_ret))
+        open_ = np.concatenate([[price], close[:-1]]) * np.exp(0.2 * bar_vol * noise[1])
+        out['Close'][:, j] = close
+        out['Open'][:, j] = open_
+        out['High'][:, j] = np.maximum(open_, close) * np.exp(0.5 * bar_vol * np.abs(noise[2]))
+        out['Low'][:, j] = np.minimum(open_, close) * np.exp(-0.5 * bar_vol * np.abs(noise[3]))
+        out['Volume'][:, j] = np.round(base_volume / bars_per_day * np.exp(0.3 * noise[1] + np.abs(log_ret) / bar_vol))
+    frames = {col: pd.DataFrame(values, index=index, columns=tickers) for col, values in out.items()}
+    frames['Adj Close'] = frames['Close']
+    return {col: frames[col] for col in COLUMNS}
+
+
+class SyntheticProvider(DataProvider):
+    """Serves generate() bars through the store's provider interface (no network)."""
+
+    def __init__(self, years=5, start='2015-01-01', seed=0, regimes=REGIMES):
+        self.years = years
+        self.start = start
+        self.seed = seed
+        self.regimes = regimes
+
+    def fetch(self, tickers, interval, start=None, period=None):
+        bars = generate(tickers, self.years, interval, self.start, self.seed, self.regimes)
+        index = bars['Close'].index
+        if start is not None:
+            keep = index >= pd.Timestamp(start)
+        elif period is not None:
+            keep = index >= period_start(period, index[-1])
+        else:
+            keep = np.ones(len(index), dtype=bool)
+        return {t: pd.DataFrame({col: bars[col][t].to_numpy()[keep] for col in COLUMNS}, index=index[keep])
+                for t in tickers if keep.any()}
@@ -0,0 +1,276 @@
+"""Per-tick instrumentation: stage timers, counters, histograms and opt-in profiling.
+
+    METRICS = Telemetry()
+    METRICS.begin_tick()
+    with METRICS.timer('fetch'):
+        ...
+    METRICS.inc('orders_submitted_total', 3, portfolio='ma')
+    METRICS.end_tick()          # Appends the tick's stage times and counts to the metrics file
+
+Exports:
+- prometheus(): Prometheus text exposition of every counter, gauge and
+  histogram, served on a local port by serve() or written atomically by
+  write_textfile() (node_exporter textfile collector format);
+- a JSONL metrics file, one line per tick ({'timestamp', 'stages': {stage:
+  seconds}, 'counts': {name: delta}}), which the dashboard charts.
+
+TickProfiler wraps chosen ticks in cProfile (a .prof dump plus the top
+functions by cumulative time) or tracemalloc (top allocation growth since the
+previous captured tick, to spot memory that grows tick over tick).
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+# Histogram upper bounds in seconds (stage and tick durations)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format(name, labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return name
+    return name + '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+class Telemetry:
+    """Thread-safe counters, gauges and histograms keyed by (name, labels)."""
+
+    def __init__(self, prefix='stonks', buckets=DEFAULT_BUCKETS, metrics_file=None):
+        self.prefix = prefix
+        self.buckets = np.asarray(buckets, dtype=np.float64)
+        self.metrics_file = metrics_file
+        self.counters = {}    # (name, labels) -> value
+        self.gauges = {}
+        self.histograms = {}  # (name, labels) -> [bucket counts, sum, count]
+        self.tick = None      # {'stages', 'counts'} of the tick in progress
+        self._lock = threading.Lock()
+
+    # --- Recording ---
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+            if self.tick is not None:
+                self.tick['counts'][name] = self.tick['counts'].get(name, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [np.zeros(len(self.buckets), dtype=np.int64), 0.0, 0]
+            hist[0][self.buckets >= value] += 1  # Cumulative buckets, as Prometheus expects
+            hist[1] += value
+            hist[2] += 1
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """Time a block into stage_seconds{stage=...}; repeated stages in one tick add up."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.observe('stage_seconds', elapsed, stage=stage, **labels)
+            with self._lock:
+                if self.tick is not None:
+                    self.tick['stages'][stage] = self.tick['stages'].get(stage, 0.0) + elapsed
+
+    def begin_tick(self):
+        with self._lock:
+            self.tick = {'stages': {}, 'counts': {}, 'start': time.perf_counter()}
+
+    def end_tick(self, timestamp=None):
+        """Record the tick's duration and append its stage times / counts to metrics_file; returns the record."""
+        with self._lock:
+            tick, self.tick = self.tick, None
+        if tick is None:
+            return None
+        duration = time.perf_counter() - tick.pop('start')
+        self.observe('tick_seconds', duration)
+        self.set('last_tick_seconds', duration)
+        self.set('last_tick_timestamp_seconds', time.time())
+        record = {'timestamp': (timestamp or datetime.now()).isoformat(), 'duration': duration, **tick}
+        if self.metrics_file:
+            os.makedirs(os.path.dirname(self.metrics_file) or '.', exist_ok=True)
+            with open(self.metrics_file, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        return record
+
+    # --- Export ---
+    def prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            counters, gauges = dict(self.counters), dict(self.gauges)
+            histograms = {k: (v[0].copy(), v[1], v[2]) for k, v in self.histograms.items()}
+        for kind, values in (('counter', counters), ('gauge', gauges)):
+            for name in sorted({n for n, _ in values}):
+                full = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {full} {kind}")
+                lines += [f"{_format(full, labels)} {value}" for (n, labels), value in values.items() if n == name]
+        for name in sorted({n for n, _ in histograms}):
+            full = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {full} histogram")
+            for (n, labels), (counts, total, count) in histograms.items():
+                if n != name:
+                    continue
+                for bound, c in zip(self.buckets, counts):
+                    lines.append(f"{_format(full + '_bucket', labels, [('le', f'{bound:g}')])} {c}")
+                lines.append(f"{_format(full + '_bucket', labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{_format(full + '_sum', labels)} {total}")
+                lines.append(f"{_format(full + '_count', labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def serve(self, port=9108, host='127.0.0.1'):
+        """Serve /metrics from a daemon thread; returns the server."""
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = telemetry.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Scrapes would flood the trader's log
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def _tail_lines(path, n, block=65536):
+    """Last n lines of a file, read in blocks backwards from EOF (cost independent of file length)."""
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        data, pos = b'', end
+        while pos > 0 and data.count(b'\n') <= n:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    return data.decode('utf-8', errors='replace').splitlines()[-n:]
+
+
+def read_ticks(path, last=None):
+    """Metrics file -> DataFrame indexed by tick time with duration, stage.<name> and count.<name> columns.
+
+    With last, only the final `last` lines are read (seeking back from EOF).
+    """
+    if not path or not os.path.exists(path):
+        return pd.DataFrame()
+    if last:
+        lines = _tail_lines(path, last)
+    else:
+        with open(path, 'r') as f:
+            lines = f.readlines()
+    rows = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # Torn last line while the trader is writing
+        rows.append({'timestamp': record['timestamp'], 'duration': record['duration'],
+                     **{f"stage.{k}": v for k, v in record['stages'].items()},
+                     **{f"count.{k}": v for k, v in record['counts'].items()}})
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df = df.set_index('timestamp')
+    return df
+
+
+class TickProfiler:
+    """Opt-in capture of every `every`-th tick with cProfile or tracemalloc."""
+
+    def __init__(self, mode=None, every=1, out_dir='output/metrics/profiles', top=25, telemetry=None):
+        if mode not in (None, 'cprofile', 'tracemalloc'):
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.every = max(int(every), 1)
+        self.out_dir = out_dir
+        self.top = top
+        self.telemetry = telemetry
+        self.ticks = 0
+        self._snapshot = None  # Last captured tracemalloc snapshot
+
+    @contextmanager
+    def capture(self, label=None):
+        self.ticks += 1
+        if self.mode is None or (self.ticks - 1) % self.every:
+            yield
+            return
+        os.makedirs(self.out_dir, exist_ok=True)
+        label = f"{self.ticks:05d}_{label or datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if self.mode == 'cprofile':
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                self._dump_cprofile(profile, label)
+        else:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+            try:
+                yield
+            finally:
+                self._dump_tracemalloc(label)
+
+    def _dump_cprofile(self, profile, label):
+        path = os.path.join(self.out_dir, f"tick_{label}")
+        profile.dump_stats(path + '.prof')  # Open with snakeviz / pstats
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(self.top)
+        with open(path + '.txt', 'w') as f:
+            f.write(out.getvalue())
+        print(f"Tick profile -> {path}.prof")
+
+    def _dump_tracemalloc(self, label):
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        current, peak = tracemalloc.get_traced_memory()
+        if self.telemetry is not None:
+            self.telemetry.set('traced_memory_bytes', current)
+            self.telemetry.set('traced_memory_peak_bytes', peak)
+        if self._snapshot is None:
+            stats, title = snapshot.statistics('lineno')[:self.top], f"Top {self.top} allocations (first capture)"
+        else:
+            stats, title = snapshot.compare_to(self._snapshot, 'lineno')[:self.top], f"Top {self.top} growth since last capture"
+        self._snapshot = snapshot
+        path = os.path.join(self.out_dir, f"tick_{label}_memory.txt")
+        with open(path, 'w') as f:
+            f.write(f"{title}; traced {current / 1e6:.1f} MB (peak {peak / 1e6:.1f} MB)\n")
+            f.write('\n'.join(str(s) for s in stats) + '\n')
+        print(f"Tick memory ({current / 1e6:.1f} MB traced) -> {path}")
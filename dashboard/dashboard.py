@@ -10,28 +10,53 @@ from plotly.subplots import make_subplots
 import yfinance as yf
 import matplotlib.pyplot as plt
 import numpy as np
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common import analytics
+from common.data_store import period_start
+from common.journal import JournalTail
+from common.quotes import QuoteService
+from common.signal_store import SignalStore
+from common.telemetry import read_ticks
 
 # Config
 OUTPUT_DIR = 'output'
+JOURNAL_DIR = f"{OUTPUT_DIR}/journal"  # Written by paper_trader.py: one subdirectory per portfolio
+METRICS_FILE = f"{OUTPUT_DIR}/metrics/ticks.jsonl"  # Per-tick stage timings/counters from paper_trader.py
+SIGNALS_DIR = f"{OUTPUT_DIR}/signals"  # Per-bar signals dataset written by the strategy scripts
 STRATS = ['ma_crossover', 'mean_reversion', 'momentum', 'screener']
+SIGNAL_WINDOWS = ['3mo', '6mo', '1y', '2y', '5y', 'max']
+# Price-panel overlays, the column whose +1/-1 marks buys/sells, and the lower-panel columns per strategy
+SIGNAL_CHARTS = {
+    'ma_crossover': {'overlays': ['SMA_Short', 'SMA_Long'], 'events': 'Position', 'lower': ['Signal']},
+    'mean_reversion': {'overlays': ['Mean', 'Upper_Band', 'Lower_Band'], 'events': 'Signal', 'lower': ['Z_Score', 'Position']},
+    'momentum': {'overlays': [], 'events': 'Signal', 'lower': ['Score', 'Position']},
+}
 
-@st.cache_data(ttl=30)  # Cache for 30s
-def load_data(strat=None):
-    """Load portfolio, trades, and strat-specific data."""
-    # Portfolio: Latest JSON snapshot
-    json_files = glob.glob(f"{OUTPUT_DIR}/portfolio_*.json")
-    if json_files:
-        latest_json = max(json_files, key=os.path.getctime)
-        with open(latest_json, 'r') as f:
-            snapshot = json.load(f)
-        portfolio = snapshot['portfolio']
+@st.cache_resource  # One tail per portfolio per server process; every refresh parses only newly appended journal bytes
+def journal_tail(name):
+    return JournalTail(os.path.join(JOURNAL_DIR, name))
+
+def list_portfolios():
+    return sorted(os.path.basename(os.path.dirname(p)) for p in glob.glob(f"{JOURNAL_DIR}/*/state.json"))
+
+@st.cache_resource  # Shared across sessions: one batched quote request per TTL window
+def quote_service():
+    return QuoteService(ttl=30)
+
+def load_portfolio(name):
+    """Latest portfolio snapshot and all trades, read incrementally from the journal."""
+    state, trades_df, snapshots_df = journal_tail(name or 'default').poll()  # Empty tail until the trader runs
+    if state and state.get('snapshot'):
+        portfolio = {**state['snapshot'], 'trades': []}
     else:
         portfolio = {'cash': 100000, 'positions': {}, 'total_value': 100000, 'trades': []}
-    
-    # Trades CSV
-    trades_df = pd.read_csv(f"{OUTPUT_DIR}/trades.csv") if os.path.exists(f"{OUTPUT_DIR}/trades.csv") else pd.DataFrame()
-    
-    # Strat-specific: Load signals CSV or run quick fetch
+    return portfolio, trades_df.copy(deep=False), snapshots_df.copy(deep=False)  # Callers may add columns
+
+@st.cache_data(ttl=30)  # Cache for 30s
+def load_data(strat=None, ticker=None, window='1y'):
+    """Load strat-specific data: one ticker's slice of the signals dataset (partition + row-group pruned)."""
     if strat == 'screener':
         # Run quick Nifty screener (adapt from screener.py)
         import sys
@@ -39,29 +64,50 @@ def load_data(strat=None):
         from screener.screener import nifty_50_tickers  # Hypothetical import; adjust
         # Or hardcoded fetch
         data = yf.download(['TCS.NS', 'INFY.NS'], period='1d')  # Placeholder
-        screener_df = pd.DataFrame({'Ticker': ['TCS.NS'], 'ROE (%)': [45.2], 'Beta': [0.85]})
-    else:
-        signals_csv = glob.glob(f"{OUTPUT_DIR}/signals_*.csv")
-        screener_df = pd.read_csv(signals_csv[0]) if signals_csv else pd.DataFrame()
-    
-    # Plot files
-    plot_files = glob.glob(f"{OUTPUT_DIR}/*plot.png")
-    
-    return portfolio, trades_df, screener_df, plot_files
+        return pd.DataFrame({'Ticker': ['TCS.NS'], 'ROE (%)': [45.2], 'Beta': [0.85]})
+    if ticker is None:
+        return pd.DataFrame()
+    start = None if window == 'max' else period_start(window)
+    return SignalStore(SIGNALS_DIR).read(strat, ticker, start=start)
+
+def signal_chart(df, strat, ticker):
+    """Close with indicator overlays and buy/sell markers; signal state / scores underneath."""
+    spec = SIGNAL_CHARTS.get(strat, {'overlays': [], 'events': 'Signal', 'lower': ['Position']})
+    lower = [c for c in spec['lower'] if c in df]
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.05)
+    fig.add_trace(go.Scatter(x=df.index, y=df['Close'], name='Close'), row=1, col=1)
+    for col in spec['overlays']:
+        if col in df:
+            fig.add_trace(go.Scatter(x=df.index, y=df[col], name=col, opacity=0.8), row=1, col=1)
+    events = df[spec['events']] if spec['events'] in df else pd.Series(0, index=df.index)
+    for side, symbol, color, name in ((1, 'triangle-up', 'green', 'Buy'), (-1, 'triangle-down', 'red', 'Sell')):
+        hits = df[events == side]
+        fig.add_trace(go.Scatter(x=hits.index, y=hits['Close'], mode='markers', name=name,
+                                 marker=dict(symbol=symbol, size=11, color=color)), row=1, col=1)
+    for col in lower:
+        fig.add_trace(go.Scatter(x=df.index, y=df[col], name=col, line=dict(shape='hv')), row=2, col=1)
+    fig.update_layout(title=f"{ticker} {strat}", height=550, hovermode='x unified')
+    return fig
 
 # Sidebar: Controls
 st.sidebar.title("Dashboard Controls")
 selected_strat = st.sidebar.selectbox("Select Strategy", STRATS)
+selected_portfolio = st.sidebar.selectbox("Select Portfolio", list_portfolios() or [None])
+selected_ticker, selected_window = None, '1y'
+if selected_strat != 'screener':
+    selected_ticker = st.sidebar.selectbox("Signals Ticker", SignalStore(SIGNALS_DIR).tickers(selected_strat) or [None])
+    selected_window = st.sidebar.selectbox("Signals Window", SIGNAL_WINDOWS, index=SIGNAL_WINDOWS.index('1y'))
 refresh = st.sidebar.button("Refresh Data")
 if refresh:
     st.cache_data.clear()
 
 # Main Header
 st.title("🛡️ STONKS Algo Trading Dashboard")
-st.subheader(f"Strategy: {selected_strat} | Last Update: {datetime.now().strftime('%Y-%m-%d %H:%M:%S IST')}")
+st.subheader(f"Portfolio: {selected_portfolio} | Strategy: {selected_strat} | Last Update: {datetime.now().strftime('%Y-%m-%d %H:%M:%S IST')}")
 
 # Load data
-portfolio, trades_df, signals_df, plot_files = load_data(selected_strat)
+portfolio, trades_df, snapshots_df = load_portfolio(selected_portfolio)
+signals_df = load_data(selected_strat, selected_ticker, selected_window)
 
 # 1. Portfolio Overview (Metrics)
 col1, col2, col3, col4 = st.columns(4)
@@ -73,42 +119,73 @@ col4.metric("Positions", len([p for p in portfolio['positions'].values() if p['s
 # Positions Table
 if portfolio['positions']:
     pos_df = pd.DataFrame.from_dict(portfolio['positions'], orient='index')
-    pos_df['Value'] = pos_df['shares'] * [yf.Ticker(t.split('.')[0]).info.get('regularMarketPrice', 0) for t in pos_df.index]  # Approx current price
+    held = pos_df.index[pos_df['shares'] > 0]
+    prices = quote_service().get(held) if len(held) else pd.Series(dtype=float)  # One batched fetch, full '.NS' symbols
+    pos_df['Value'] = pos_df['shares'] * pos_df.index.map(prices)  # Blank without a fresh quote
     st.subheader("Current Positions")
     st.dataframe(pos_df)
+    unpriced = [t for t in held if t not in prices]
+    if unpriced:
+        st.caption(f"No fresh quote for: {', '.join(unpriced)}")
 
 # 2. Recent Trades Table
 st.subheader("Recent Trades")
 if not trades_df.empty:
-    trades_df['timestamp'] = pd.to_datetime(trades_df['timestamp'])
-    trades_df = trades_df.sort_values('timestamp', ascending=False).head(20)
-    st.dataframe(trades_df, use_container_width=True)
+    st.dataframe(trades_df.sort_values('timestamp', ascending=False).head(20), use_container_width=True)
 else:
     st.info("No trades yet. Run paper trader!")
 
-# 3. Equity Curve Plot
+# 3. Equity Curve Plot (mark-to-market: one snapshot per paper trader tick)
 st.subheader("Equity Curve")
-if not trades_df.empty:
-    trades_df['cumulative'] = trades_df['value'].cumsum() + 100000
-    fig = px.line(trades_df, x='timestamp', y='cumulative', title="Portfolio Growth")
+if len(snapshots_df) > 1:
+    equity = snapshots_df.set_index('timestamp')['total_value']
+    daily = equity.resample('1D').last().dropna()  # Ratios on daily closes; drawdown on every tick
+    stats = analytics.summary(daily, trades_df, 1 - snapshots_df['cash'] / snapshots_df['total_value'])
+    m1, m2, m3, m4, m5 = st.columns(5)
+    m1.metric("Max Drawdown", f"{analytics.drawdown(equity).min()*100:.2f}%")
+    m2.metric("Sharpe (daily)", f"{stats['sharpe']:.2f}" if len(daily) > 2 else "n/a")
+    m3.metric("Sortino (daily)", f"{stats['sortino']:.2f}" if len(daily) > 2 else "n/a")
+    m4.metric("Hit Rate", f"{stats['hit_rate']*100:.1f}%" if stats['hit_rate'] == stats['hit_rate'] else "n/a")
+    m5.metric("Exposure", f"{stats['exposure']*100:.0f}%")
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.75, 0.25], vertical_spacing=0.05)
+    fig.add_trace(go.Scatter(x=equity.index, y=equity, name='Equity'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=equity.index, y=analytics.drawdown(equity) * 100, name='Drawdown (%)',
+                             fill='tozeroy', line=dict(color='red')), row=2, col=1)
+    fig.update_layout(title="Portfolio Growth", height=500)
     st.plotly_chart(fig, use_container_width=True)
 else:
-    st.info("No equity data. Accumulate trades first.")
+    st.info("No equity data. Run the paper trader for a few ticks first.")
 
-# 4. Strategy Signals & Plot
+# 4. Strategy Signals & Chart
 st.subheader(f"{selected_strat.upper()} Signals")
-if not signals_df.empty:
-    st.dataframe(signals_df.head(10))
-    
-    # Display latest plot
-    strat_plot = [p for p in plot_files if selected_strat in p.lower()]
-    if strat_plot:
-        st.image(strat_plot[0], caption=f"{selected_strat} Plot")
+if selected_strat == 'screener':
+    st.dataframe(signals_df)  # Blue chips table
+elif not signals_df.empty:
+    st.plotly_chart(signal_chart(signals_df, selected_strat, selected_ticker), use_container_width=True)
+    events_col = SIGNAL_CHARTS.get(selected_strat, {}).get('events', 'Signal')
+    recent = signals_df[signals_df[events_col] != 0] if events_col in signals_df else signals_df
+    st.dataframe(recent.drop(columns='ticker').sort_index(ascending=False).head(10), use_container_width=True)
 else:
-    if selected_strat == 'screener':
-        st.dataframe(signals_df)  # Blue chips table
-    else:
-        st.warning("Run strategy script to generate signals.")
+    st.warning(f"No signals yet. Run the strategy script (e.g. --universe nifty50) to populate {SIGNALS_DIR}/.")
+
+# 5. Paper Trader Tick Metrics (stage timings and counters, one row per tick)
+st.subheader("Tick Metrics")
+ticks_df = read_ticks(METRICS_FILE, last=500)
+if not ticks_df.empty:
+    t1, t2, t3, t4 = st.columns(4)
+    t1.metric("Ticks", len(ticks_df))
+    t2.metric("Tick p50", f"{ticks_df['duration'].median()*1000:.0f} ms")
+    t3.metric("Tick p95", f"{ticks_df['duration'].quantile(0.95)*1000:.0f} ms")
+    t4.metric("Tick max", f"{ticks_df['duration'].max()*1000:.0f} ms")
+    stages = ticks_df.filter(like='stage.').rename(columns=lambda c: c[len('stage.'):]) * 1000
+    fig = px.bar(stages, x=stages.index, y=list(stages.columns), title="Time per Stage (ms)",
+                 labels={'value': 'ms', 'variable': 'Stage', 'x': 'Tick'})
+    st.plotly_chart(fig, use_container_width=True)
+    counts = ticks_df.filter(like='count.').rename(columns=lambda c: c[len('count.'):])
+    if not counts.empty:
+        st.dataframe(counts.sum().rename('Total over shown ticks').to_frame(), use_container_width=True)
+else:
+    st.info("No tick metrics yet. The paper trader writes them to output/metrics/ticks.jsonl.")
 
 # Footer
 st.sidebar.markdown("---")
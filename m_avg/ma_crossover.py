@@ -1,62 +1,152 @@
-import yfinance as yf
+"""MA crossover backtest for one ticker or a whole universe.
+
+    python m_avg/ma_crossover.py                                   # RELIANCE.NS, prints signals + stats
+    python m_avg/ma_crossover.py --universe nifty50 --plot         # every Nifty 50 name on a process pool
+    python m_avg/ma_crossover.py --universe nifty50 --walk-forward 252,63
+
+Import backtest() to run it from other code; nothing runs at import time.
+"""
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common import analytics
+from common.backtest import run_backtest
+from common.batch import (parse_walk_forward, resolve_tickers, run_universe, strategy_parser, walk_forward,
+                          walk_forward_summary)
+from common.data_store import MarketDataStore, period_start
+from common.signal_store import SIGNALS_DIR, SignalStore
 
 # Parameters
 TICKER = 'RELIANCE.NS'  # Example: Change to any NSE stock
 SHORT_WINDOW = 50       # Short-term SMA
 LONG_WINDOW = 200       # Long-term SMA
 PERIOD = '1y'           # Data period (1 year)
+DATA_DIR = 'output/market_data'  # Shared OHLCV store
+GRID = {'short_window': [10, 20, 50], 'long_window': [50, 100, 200]}  # Walk-forward search space
+
+
+def indicators(data, short_window=SHORT_WINDOW, long_window=LONG_WINDOW):
+    """SMAs, signal/position columns and simple (cost-free) strategy vs buy & hold returns."""
+    data = data.copy()
+    data['SMA_Short'] = data['Close'].rolling(window=short_window).mean()
+    data['SMA_Long'] = data['Close'].rolling(window=long_window).mean()
+
+    # Generate signals
+    data['Signal'] = np.where(data['SMA_Short'] > data['SMA_Long'], 1, 0)
+    data.iloc[:short_window, data.columns.get_loc('Signal')] = 0
+    data['Position'] = data['Signal'].diff()  # 1: Buy, -1: Sell
+
+    # Backtest: Simple returns (buy/hold on signal)
+    data['Returns'] = data['Close'].pct_change()
+    data['Strategy_Returns'] = data['Returns'] * data['Signal'].shift(1)
+    data['Cumulative_Strategy'] = (1 + data['Strategy_Returns']).cumprod()
+    data['Cumulative_BuyHold'] = (1 + data['Returns']).cumprod()
+    return data
+
+
+def plot(data, ticker, short_window, long_window, path, show=False):
+    buys = data[data['Position'] == 1].index
+    sells = data[data['Position'] == -1].index
+    fig = plt.figure(figsize=(12, 6))
+    plt.plot(data['Close'], label='Close Price', alpha=0.7)
+    plt.plot(data['SMA_Short'], label=f'SMA {short_window}', alpha=0.8)
+    plt.plot(data['SMA_Long'], label=f'SMA {long_window}', alpha=0.8)
+    plt.plot(buys, data['Close'][buys], '^', markersize=10, color='g', label='Buy')
+    plt.plot(sells, data['Close'][sells], 'v', markersize=10, color='r', label='Sell')
+    plt.title(f'{ticker} MA Crossover Strategy')
+    plt.legend()
+    plt.savefig(path)  # Saves plot
+    if show:
+        plt.show()  # Displays if running interactively
+    plt.close(fig)
+
+
+def backtest(ticker, short_window=SHORT_WINDOW, long_window=LONG_WINDOW, period=PERIOD, data_dir=DATA_DIR,
+             refresh=True, signals_dir=SIGNALS_DIR, plot_dir=None, show=False, verbose=False, walk=None,
+             metric='sharpe'):
+    """Simple and costed backtest of one ticker from the store; returns a row of stats.
+
+    Per-bar signals, positions and indicators go to the signals dataset under
+    signals_dir (strategy=ma_crossover/ticker=.../year=...).
+    walk=(train, test) adds walk-forward columns (GRID searched per window); plot_dir
+    saves <plot_dir>/ma_crossover_<ticker>_plot.png.
+    """
+    store = MarketDataStore(data_dir)
+    if refresh:
+        store.refresh([ticker])
+    data = store.history(ticker, start=period_start(period))
+    if data.empty:
+        raise ValueError(f"No data for {ticker}")
+    data = indicators(data, short_window, long_window)
+
+    if signals_dir:
+        SignalStore(signals_dir).write('ma_crossover', ticker,
+                                       data[['Close', 'SMA_Short', 'SMA_Long', 'Signal', 'Position']])
+
+    if verbose:
+        # Print signals
+        buys = data[data['Position'] == 1].index
+        sells = data[data['Position'] == -1].index
+        print("\nBuy Signals (Dates):")
+        for date in buys[-5:]:  # Last 5 buys
+            print(f"- {date.date()}: Price ₹{data.loc[date, 'Close']:.2f}")
+        print("\nSell Signals (Dates):")
+        for date in sells[-5:]:  # Last 5 sells
+            print(f"- {date.date()}: Price ₹{data.loc[date, 'Close']:.2f}")
+
+    # Costed backtest: paper trader sizing, next-open fills, costs and intrabar stop-loss (SMA warm-up from full stored history)
+    params = {'short_window': short_window, 'long_window': long_window}
+    bars = store.matrices([ticker], columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+    costed = run_backtest(bars['Close'], 'ma_crossover', params, start=period_start(period), bars=bars)
+    stats = analytics.summary(costed['equity'], costed['trades'], costed['exposure'])
+    row = {'strategy_return': data['Cumulative_Strategy'].iloc[-1] - 1,
+           'buyhold_return': data['Cumulative_BuyHold'].iloc[-1] - 1,
+           'costed_return': costed['total_return'], **stats, 'last_signal': int(data['Signal'].iloc[-1])}
+    if walk:
+        windows = walk_forward(bars['Close'], 'ma_crossover', GRID, *walk, bars=bars, metric=metric)
+        row.update(walk_forward_summary(windows))
+        if verbose:
+            print("\nWalk-forward windows:")
+            print(windows.to_string(index=False))
+    if plot_dir:
+        plot(data, ticker, short_window, long_window, os.path.join(plot_dir, f"ma_crossover_{ticker}_plot.png"), show)
+    return row
+
+
+if __name__ == "__main__":
+    parser = strategy_parser("MA crossover backtest over one or more tickers", [TICKER], PERIOD)
+    parser.add_argument('--short-window', type=int, default=SHORT_WINDOW)
+    parser.add_argument('--long-window', type=int, default=LONG_WINDOW)
+    args = parser.parse_args()
+    tickers = resolve_tickers(args)
+    if not args.show:
+        plt.switch_backend('Agg')  # Headless: workers never open windows
+
+    # Fetch data once for the universe (only bars missing from the local store are downloaded)
+    print(f"Fetching data for {len(tickers)} ticker(s)...")
+    MarketDataStore(args.data_dir).refresh(tickers)
+    results = run_universe(backtest, tickers, args.workers, short_window=args.short_window,
+                           long_window=args.long_window, period=args.period, data_dir=args.data_dir, refresh=False,
+                           signals_dir=args.signals_dir,
+                           plot_dir=args.out_dir if args.plot else None, show=args.show, verbose=len(tickers) == 1,
+                           walk=parse_walk_forward(args.walk_forward), metric=args.metric)
 
-# Fetch data
-print(f"Fetching data for {TICKER}...")
-data = yf.download(TICKER, period=PERIOD)
-if data.empty:
-    print("No data fetched. Check ticker.")
-    exit()
-
-# Compute SMAs
-data['SMA_Short'] = data['Close'].rolling(window=SHORT_WINDOW).mean()
-data['SMA_Long'] = data['Close'].rolling(window=LONG_WINDOW).mean()
-
-# Generate signals
-data['Signal'] = 0
-data['Signal'][SHORT_WINDOW:] = np.where(
-    data['SMA_Short'][SHORT_WINDOW:] > data['SMA_Long'][SHORT_WINDOW:], 1, 0
-)
-data['Position'] = data['Signal'].diff()  # 1: Buy, -1: Sell
-
-# Backtest: Simple returns (buy/hold on signal)
-data['Returns'] = data['Close'].pct_change()
-data['Strategy_Returns'] = data['Returns'] * data['Signal'].shift(1)
-data['Cumulative_Strategy'] = (1 + data['Strategy_Returns']).cumprod()
-data['Cumulative_BuyHold'] = (1 + data['Returns']).cumprod()
-
-# Print signals
-buys = data[data['Position'] == 1].index
-sells = data[data['Position'] == -1].index
-print("\nBuy Signals (Dates):")
-for date in buys[-5:]:  # Last 5 buys
-    print(f"- {date.date()}: Price ₹{data.loc[date, 'Close']:.2f}")
-print("\nSell Signals (Dates):")
-for date in sells[-5:]:  # Last 5 sells
-    print(f"- {date.date()}: Price ₹{data.loc[date, 'Close']:.2f}")
-
-# Performance
-total_return = data['Cumulative_Strategy'].iloc[-1] - 1
-buyhold_return = data['Cumulative_BuyHold'].iloc[-1] - 1
-print(f"\nStrategy Total Return: {total_return*100:.2f}%")
-print(f"Buy & Hold Return: {buyhold_return*100:.2f}%")
-
-# Plot
-plt.figure(figsize=(12, 6))
-plt.plot(data['Close'], label='Close Price', alpha=0.7)
-plt.plot(data['SMA_Short'], label=f'SMA {SHORT_WINDOW}', alpha=0.8)
-plt.plot(data['SMA_Long'], label=f'SMA {LONG_WINDOW}', alpha=0.8)
-plt.plot(buys, data['Close'][buys], '^', markersize=10, color='g', label='Buy')
-plt.plot(sells, data['Close'][sells], 'v', markersize=10, color='r', label='Sell')
-plt.title(f'{TICKER} MA Crossover Strategy')
-plt.legend()
-plt.savefig('ma_crossover_plot.png')  # Saves plot
-plt.show()  # Displays if running interactively
+    # Performance
+    if len(tickers) == 1 and 'error' not in results:
+        row = results.iloc[0]
+        print(f"\nStrategy Total Return: {row['strategy_return']*100:.2f}%")
+        print(f"Buy & Hold Return: {row['buyhold_return']*100:.2f}%")
+        print(f"Costed Backtest Return: {row['costed_return']*100:.2f}% ({int(row['trades'])} trades)")
+        print(f"CAGR: {row['cagr']*100:.2f}% | Sharpe: {row['sharpe']:.2f} | Sortino: {row['sortino']:.2f} | "
+              f"Max Drawdown: {row['max_drawdown']*100:.2f}% | Hit Rate: {row['hit_rate']*100:.1f}% | "
+              f"Exposure: {row['exposure']*100:.0f}% | Turnover: {row['turnover']:.1f}x/yr")
+    else:
+        print(results.sort_values('sharpe', ascending=False).round(4).to_string() if 'sharpe' in results else results)
+    os.makedirs(args.out_dir, exist_ok=True)
+    results.to_csv(os.path.join(args.out_dir, 'ma_crossover_results.csv'))
+    print(f"\nResults -> {os.path.join(args.out_dir, 'ma_crossover_results.csv')}")
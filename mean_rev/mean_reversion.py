@@ -1,68 +1,158 @@
-import yfinance as yf
+"""Z-score mean reversion backtest for one ticker or a whole universe.
+
+    python mean_rev/mean_reversion.py                                  # HDFCBANK.NS, prints trades + stats
+    python mean_rev/mean_reversion.py --universe nifty50 --plot        # every Nifty 50 name on a process pool
+    python mean_rev/mean_reversion.py --universe nifty50 --walk-forward 252,63
+
+Import backtest() to run it from other code; nothing runs at import time.
+"""
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common import analytics
+from common.backtest import run_backtest
+from common.batch import (parse_walk_forward, resolve_tickers, run_universe, strategy_parser, walk_forward,
+                          walk_forward_summary)
+from common.data_store import MarketDataStore, period_start
+from common.signal_store import SIGNALS_DIR, SignalStore
 
 # Parameters
 TICKER = 'HDFCBANK.NS'  # Example: Stable bank stock for range-bound testing
 PERIOD = 20             # Lookback for mean/std (days)
 Z_THRESHOLD = 2         # Oversold/overbought threshold
 PERIOD_DATA = '1y'      # Data fetch period
+DATA_DIR = 'output/market_data'  # Shared OHLCV store
+GRID = {'period': [10, 20, 40], 'z_threshold': [1.5, 2, 2.5]}  # Walk-forward search space
+
+
+def indicators(data, period=PERIOD, z_threshold=Z_THRESHOLD):
+    """Z-score, bands, signal/position columns and simple (cost-free) strategy vs buy & hold returns."""
+    data = data.copy()
+    # Compute rolling mean and std
+    data['Mean'] = data['Close'].rolling(window=period).mean()
+    data['Std'] = data['Close'].rolling(window=period).std()
+    data['Z_Score'] = (data['Close'] - data['Mean']) / data['Std']
+
+    # Bollinger Bands for visualization (mean ± z*std)
+    data['Upper_Band'] = data['Mean'] + (data['Std'] * z_threshold)
+    data['Lower_Band'] = data['Mean'] - (data['Std'] * z_threshold)
+
+    # Generate signals: 1=Buy (oversold), -1=Sell (overbought or revert), 0=Hold
+    data['Signal'] = 0
+    data.loc[data['Z_Score'] < -z_threshold, 'Signal'] = 1   # Buy oversold
+    data.loc[data['Z_Score'] > z_threshold, 'Signal'] = -1   # Sell overbought
+    # Exit on mean revert (from position)
+    data['Position'] = data['Signal'].replace(0, np.nan).ffill().fillna(0)
+    data.loc[(data['Position'] != 0) & (abs(data['Z_Score']) < 0.5), 'Signal'] = -data['Position']  # Close on near-mean
+
+    # Backtest returns (simple: hold position until signal change)
+    data['Returns'] = data['Close'].pct_change()
+    data['Strategy_Returns'] = data['Returns'] * data['Position'].shift(1)
+    data['Cumulative_Strategy'] = (1 + data['Strategy_Returns']).cumprod().fillna(1)
+    data['Cumulative_BuyHold'] = (1 + data['Returns']).cumprod().fillna(1)
+    return data
+
+
+def plot(data, ticker, z_threshold, path, show=False):
+    fig = plt.figure(figsize=(12, 6))
+    plt.plot(data['Close'], label='Close Price', alpha=0.7)
+    plt.plot(data['Upper_Band'], label='Upper Band', alpha=0.8)
+    plt.plot(data['Lower_Band'], label='Lower Band', alpha=0.8)
+    plt.plot(data['Mean'], label='Mean', alpha=0.8)
+    buys = data[data['Signal'] == 1].index
+    sells = data[data['Signal'] == -1].index
+    plt.plot(buys, data['Close'][buys], '^', markersize=10, color='g', label='Buy')
+    plt.plot(sells, data['Close'][sells], 'v', markersize=10, color='r', label='Sell')
+    plt.title(f'{ticker} Mean Reversion Strategy (Z-Score Threshold: ±{z_threshold})')
+    plt.legend()
+    plt.savefig(path)
+    if show:
+        plt.show()
+    plt.close(fig)
+
+
+def backtest(ticker, period=PERIOD, z_threshold=Z_THRESHOLD, period_data=PERIOD_DATA, data_dir=DATA_DIR,
+             refresh=True, signals_dir=SIGNALS_DIR, plot_dir=None, show=False, verbose=False, walk=None,
+             metric='sharpe'):
+    """Simple and costed backtest of one ticker from the store; returns a row of stats.
+
+    Per-bar signals, positions and indicators go to the signals dataset under
+    signals_dir (strategy=mean_reversion/ticker=.../year=...).
+    walk=(train, test) adds walk-forward columns (GRID searched per window); plot_dir
+    saves <plot_dir>/mean_reversion_<ticker>_plot.png.
+    """
+    store = MarketDataStore(data_dir)
+    if refresh:
+        store.refresh([ticker])
+    data = store.history(ticker, start=period_start(period_data))
+    if data.empty:
+        raise ValueError(f"No data for {ticker}")
+    data = indicators(data, period, z_threshold)
+
+    if signals_dir:
+        SignalStore(signals_dir).write('mean_reversion', ticker, data[['Close', 'Mean', 'Upper_Band', 'Lower_Band',
+                                                                        'Z_Score', 'Signal', 'Position']])
+
+    if verbose:
+        # Print recent signals
+        trades = data[data['Signal'] != 0].copy()
+        trades['Action'] = trades['Signal'].map({1: 'BUY', -1: 'SELL'})
+        print("\nRecent Trades:")
+        print(trades[['Action', 'Z_Score', 'Close']].tail(10).to_string())
+
+    # Costed backtest: paper trader sizing, next-open fills, costs and intrabar stop-loss
+    params = {'period': period, 'z_threshold': z_threshold}
+    bars = store.matrices([ticker], columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+    costed = run_backtest(bars['Close'], 'mean_reversion', params, start=period_start(period_data), bars=bars)
+    stats = analytics.summary(costed['equity'], costed['trades'], costed['exposure'])
+    row = {'strategy_return': data['Cumulative_Strategy'].iloc[-1] - 1,
+           'buyhold_return': data['Cumulative_BuyHold'].iloc[-1] - 1,
+           'costed_return': costed['total_return'], **stats, 'last_signal': int(data['Signal'].iloc[-1])}
+    if walk:
+        windows = walk_forward(bars['Close'], 'mean_reversion', GRID, *walk, bars=bars, metric=metric)
+        row.update(walk_forward_summary(windows))
+        if verbose:
+            print("\nWalk-forward windows:")
+            print(windows.to_string(index=False))
+    if plot_dir:
+        plot(data, ticker, z_threshold, os.path.join(plot_dir, f"mean_reversion_{ticker}_plot.png"), show)
+    return row
+
+
+if __name__ == "__main__":
+    parser = strategy_parser("Z-score mean reversion backtest over one or more tickers", [TICKER], PERIOD_DATA)
+    parser.add_argument('--lookback', type=int, default=PERIOD, help="Rolling mean/std window")
+    parser.add_argument('--z-threshold', type=float, default=Z_THRESHOLD)
+    args = parser.parse_args()
+    tickers = resolve_tickers(args)
+    if not args.show:
+        plt.switch_backend('Agg')  # Headless: workers never open windows
+
+    # Fetch data once for the universe (only bars missing from the local store are downloaded)
+    print(f"Fetching data for {len(tickers)} ticker(s)...")
+    MarketDataStore(args.data_dir).refresh(tickers)
+    results = run_universe(backtest, tickers, args.workers, period=args.lookback, z_threshold=args.z_threshold,
+                           period_data=args.period, data_dir=args.data_dir, refresh=False,
+                           signals_dir=args.signals_dir,
+                           plot_dir=args.out_dir if args.plot else None, show=args.show, verbose=len(tickers) == 1,
+                           walk=parse_walk_forward(args.walk_forward), metric=args.metric)
 
-# Fetch data
-print(f"Fetching data for {TICKER}...")
-data = yf.download(TICKER, period=PERIOD_DATA)
-if data.empty:
-    print("No data fetched. Check ticker.")
-    exit()
-
-# Compute rolling mean and std
-data['Mean'] = data['Close'].rolling(window=PERIOD).mean()
-data['Std'] = data['Close'].rolling(window=PERIOD).std()
-data['Z_Score'] = (data['Close'] - data['Mean']) / data['Std']
-
-# Bollinger Bands for visualization (mean ± 2*std)
-data['Upper_Band'] = data['Mean'] + (data['Std'] * Z_THRESHOLD)
-data['Lower_Band'] = data['Mean'] - (data['Std'] * Z_THRESHOLD)
-
-# Generate signals: 1=Buy (oversold), -1=Sell (overbought or revert), 0=Hold
-data['Signal'] = 0
-data.loc[data['Z_Score'] < -Z_THRESHOLD, 'Signal'] = 1   # Buy oversold
-data.loc[data['Z_Score'] > Z_THRESHOLD, 'Signal'] = -1   # Sell overbought
-# Exit on mean revert (from position)
-data['Position'] = data['Signal'].replace(to_replace=0, method='ffill').fillna(0)
-data.loc[(data['Position'] != 0) & (abs(data['Z_Score']) < 0.5), 'Signal'] = -data['Position']  # Close on near-mean
-
-# Backtest returns (simple: hold position until signal change)
-data['Returns'] = data['Close'].pct_change()
-data['Strategy_Returns'] = data['Returns'] * data['Position'].shift(1)
-data['Cumulative_Strategy'] = (1 + data['Strategy_Returns']).cumprod().fillna(1)
-data['Cumulative_BuyHold'] = (1 + data['Returns']).cumprod().fillna(1)
-
-# Print recent signals
-trades = data[data['Signal'] != 0].copy()
-trades['Action'] = trades['Signal'].map({1: 'BUY', -1: 'SELL'})
-print("\nRecent Trades:")
-print(trades[['Action', 'Z_Score', 'Close']].tail(10).to_string())
-
-# Performance
-total_return = data['Cumulative_Strategy'].iloc[-1] - 1
-buyhold_return = data['Cumulative_BuyHold'].iloc[-1] - 1
-print(f"\nStrategy Total Return: {total_return*100:.2f}%")
-print(f"Buy & Hold Return: {buyhold_return*100:.2f}%")
-
-# Plot
-plt.figure(figsize=(12, 6))
-plt.plot(data['Close'], label='Close Price', alpha=0.7)
-plt.plot(data['Upper_Band'], label='Upper Band', alpha=0.8)
-plt.plot(data['Lower_Band'], label='Lower Band', alpha=0.8)
-plt.plot(data['Mean'], label='Mean', alpha=0.8)
-buys = data[data['Signal'] == 1].index
-sells = data[data['Signal'] == -1].index
-plt.plot(buys, data['Close'][buys], '^', markersize=10, color='g', label='Buy')
-plt.plot(sells, data['Close'][sells], 'v', markersize=10, color='r', label='Sell')
-plt.title(f'{TICKER} Mean Reversion Strategy (Z-Score Threshold: ±{Z_THRESHOLD})')
-plt.legend()
-plt.savefig('mean_reversion_plot.png')
-plt.show()
\ No newline at end of file
+    # Performance
+    if len(tickers) == 1 and 'error' not in results:
+        row = results.iloc[0]
+        print(f"\nStrategy Total Return: {row['strategy_return']*100:.2f}%")
+        print(f"Buy & Hold Return: {row['buyhold_return']*100:.2f}%")
+        print(f"Costed Backtest Return: {row['costed_return']*100:.2f}% ({int(row['trades'])} trades)")
+        print(f"CAGR: {row['cagr']*100:.2f}% | Sharpe: {row['sharpe']:.2f} | Sortino: {row['sortino']:.2f} | "
+              f"Max Drawdown: {row['max_drawdown']*100:.2f}% | Hit Rate: {row['hit_rate']*100:.1f}% | "
+              f"Exposure: {row['exposure']*100:.0f}% | Turnover: {row['turnover']:.1f}x/yr")
+    else:
+        print(results.sort_values('sharpe', ascending=False).round(4).to_string() if 'sharpe' in results else results)
+    os.makedirs(args.out_dir, exist_ok=True)
+    results.to_csv(os.path.join(args.out_dir, 'mean_reversion_results.csv'))
+    print(f"\nResults -> {os.path.join(args.out_dir, 'mean_reversion_results.csv')}")
@@ -1,8 +1,16 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common import analytics
+from common.backtest import run_backtest
+from common.data_store import MarketDataStore, period_start
+from common.signal_store import SIGNALS_DIR, SignalStore
+from common.signals import momentum_rebalance_scores, momentum_rebalance_weights
 
 # Parameters
 TICKERS = ['RELIANCE.NS', 'HDFCBANK.NS', 'TCS.NS', 'INFY.NS', 'ITC.NS', 
@@ -11,37 +19,23 @@ LOOKBACK = 10          # Days for momentum ranking
 TOP_N = 3              # Long top N stocks
 REBALANCE_FREQ = 'W'   # Weekly rebalance (use 'D' for daily)
 PERIOD_DATA = '1y'     # Backtest period
+DATA_DIR = 'output/market_data'  # Shared OHLCV store
 
-# Fetch data
+# Fetch data (one delta fetch for the universe; history comes from the local store)
 print("Fetching data for universe...")
-data = yf.download(TICKERS, period=PERIOD_DATA)['Adj Close']
+store = MarketDataStore(DATA_DIR)
+store.refresh(TICKERS)
+data = store.close_matrix(TICKERS, column='Adj Close', start=period_start(PERIOD_DATA))
 if data.empty:
     print("No data fetched. Check tickers.")
     exit()
 
 # Compute daily returns
-returns = data.pct_change()
+returns = data.pct_change(fill_method=None)
 
-# Generate signals: Rank and select top N
+# Generate signals: Rank and select top N at each rebalance (one vectorized pass)
 portfolio_returns = pd.DataFrame(index=returns.index, columns=['Portfolio'])
-positions = pd.DataFrame(index=returns.index, columns=TICKERS).fillna(0)
-
-for date in returns.resample(REBALANCE_FREQ).first().index[LOOKBACK:]:
-    # Momentum: Past returns up to previous period
-    past_returns = returns.loc[:date - timedelta(days=1)].tail(LOOKBACK)
-    if len(past_returns) < LOOKBACK:
-        continue
-    
-    momentum_scores = past_returns.mean()  # Average return over lookback
-    top_stocks = momentum_scores.nlargest(TOP_N).index.tolist()
-    
-    # Equal weight positions (1/TOP_N for selected)
-    for ticker in TICKERS:
-        weight = 1.0 / TOP_N if ticker in top_stocks else 0
-        positions.loc[date:, ticker] = weight  # Forward fill until next rebalance
-    
-    # Forward fill positions to next rebalance
-    positions = positions.fillna(method='ffill')
+positions = momentum_rebalance_weights(returns, LOOKBACK, TOP_N, REBALANCE_FREQ)
 
 # Strategy returns: Weighted sum
 strategy_returns = (positions * returns).sum(axis=1)
@@ -50,10 +44,9 @@ benchmark_returns = (1 + returns.mean(axis=1)).cumprod().fillna(1)  # Equal-weig
 
 # Print recent rebalances
 print("\nRecent Rebalances (Top Stocks):")
-rebalance_dates = returns.resample(REBALANCE_FREQ).first().index[LOOKBACK:]
-for date in rebalance_dates[-5:]:  # Last 5
-    past_returns = returns.loc[:date - timedelta(days=1)].tail(LOOKBACK).mean()
-    top = past_returns.nlargest(TOP_N)
+rebalance_scores = momentum_rebalance_scores(returns, LOOKBACK, REBALANCE_FREQ)
+for date, scores in rebalance_scores.tail(5).iterrows():  # Last 5
+    top = scores.nlargest(TOP_N)
     print(f"{date.date()}: {top.to_dict()}")
 
 # Performance
@@ -62,6 +55,25 @@ benchmark_return = benchmark_returns.iloc[-1] - 1
 print(f"\nStrategy Total Return: {total_return*100:.2f}%")
 print(f"Equal-Weight Benchmark: {benchmark_return*100:.2f}%")
 
+# Costed backtest: paper trader sizing, next-open fills, costs and intrabar stop-loss (daily ranking, as live)
+bars = store.matrices(TICKERS, columns=['Open', 'Low', 'Close', 'Adj Close', 'Volume'])
+costed = run_backtest(bars['Close'], 'momentum', {'lookback': LOOKBACK, 'top_n': TOP_N},
+                      signal_close=bars['Adj Close'], start=period_start(PERIOD_DATA), bars=bars)
+print(f"Costed Backtest Return: {costed['total_return']*100:.2f}% ({len(costed['trades'])} trades)")
+stats = analytics.summary(costed['equity'], costed['trades'], costed['exposure'])
+print(f"CAGR: {stats['cagr']*100:.2f}% | Sharpe: {stats['sharpe']:.2f} | Sortino: {stats['sortino']:.2f} | "
+      f"Max Drawdown: {stats['max_drawdown']*100:.2f}% | Hit Rate: {stats['hit_rate']*100:.1f}% | "
+      f"Exposure: {stats['exposure']*100:.0f}% | Turnover: {stats['turnover']:.1f}x/yr")
+
+# Per-bar signals dataset: momentum score, target weight and rebalance buys/sells per ticker
+signal_store = SignalStore(SIGNALS_DIR)
+momentum_scores = returns.rolling(LOOKBACK, min_periods=1).mean()
+for ticker in data.columns:
+    signal_store.write('momentum', ticker, pd.DataFrame({
+        'Close': data[ticker], 'Score': momentum_scores[ticker], 'Position': positions[ticker],
+        'Signal': np.sign(positions[ticker].diff().fillna(positions[ticker])).astype(int)}))
+print(f"Signals -> {SIGNALS_DIR}/strategy=momentum/")
+
 # Plot
 plt.figure(figsize=(12, 6))
 plt.plot(portfolio_returns.index, portfolio_returns['Portfolio'], label='Momentum Portfolio', linewidth=2)
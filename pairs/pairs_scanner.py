@@ -0,0 +1,78 @@
+"""Scan every pair of a universe for cointegration and publish the tradable ones.
+
+    python pairs/pairs_scanner.py                                   # Nifty 50: 1,225 pairs
+    python pairs/pairs_scanner.py --tickers-file nifty500.txt       # ~125k pairs on a process pool
+    python pairs/pairs_scanner.py --universe blue_chips --top 10
+
+Ranked pairs go to output/pairs/pairs_latest.csv, which paper_trader.py reads
+for portfolios with strat 'pairs'. Reruns on unchanged bars load the cached scan.
+"""
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common.batch import resolve_tickers
+from common.data_store import MarketDataStore
+from common.pairs import critical_value, rank_pairs, scan_pairs, select_pairs, write_pairs
+from common.screen import NIFTY_50
+
+# Parameters
+LOOKBACK = 252          # Bars the hedge ratio and cointegration test are fit on
+Z_WINDOW = 20           # Bars for the live spread z-score
+ENTRY_Z = 2             # Signal when the spread is this many std from its mean
+EXIT_Z = 0.5
+SIGNIFICANCE = 0.01     # Engle-Granger level (0.01, 0.05 or 0.10); ~125k pairs need a strict one
+MAX_HALF_LIFE = 30      # Bars; slower spreads tie up capital too long
+MIN_CORR = 0.8          # Correlation of log prices over the lookback
+TOP_N = 10              # Pairs shown with live signals (no ticker in two pairs)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cointegration scan over every pair of a universe")
+    parser.add_argument('--tickers', default=','.join(NIFTY_50), help="Comma-separated (default: Nifty 50)")
+    parser.add_argument('--universe', help="'nifty50' or a published screener universe (output/universes/)")
+    parser.add_argument('--tickers-file', help="One ticker per line, e.g. Nifty 500 constituents")
+    parser.add_argument('--lookback', type=int, default=LOOKBACK)
+    parser.add_argument('--z-window', type=int, default=Z_WINDOW)
+    parser.add_argument('--significance', type=float, default=SIGNIFICANCE, choices=[0.01, 0.05, 0.10])
+    parser.add_argument('--max-half-life', type=float, default=MAX_HALF_LIFE)
+    parser.add_argument('--min-corr', type=float, default=MIN_CORR)
+    parser.add_argument('--top', type=int, default=TOP_N)
+    parser.add_argument('--workers', type=int, default=None, help="Processes (default: one per CPU)")
+    parser.add_argument('--no-cache', action='store_true', help="Rescan even if these bars were scanned before")
+    parser.add_argument('--data-dir', default='output/market_data')
+    parser.add_argument('--out-dir', default='output')
+    args = parser.parse_args()
+
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers = [line.strip() for line in f if line.strip()]
+    else:
+        tickers = resolve_tickers(args)
+
+    # Fetch data once for the universe (only bars missing from the local store are downloaded)
+    print(f"Fetching data for {len(tickers)} tickers...")
+    store = MarketDataStore(args.data_dir)
+    store.refresh(tickers)
+    close = store.close_matrix(tickers, bars=args.lookback)
+
+    # Scan: hedge ratios, Dickey-Fuller t and spread z-scores for every pair
+    pairs_dir = os.path.join(args.out_dir, 'pairs')
+    scan = scan_pairs(close, args.lookback, args.z_window, workers=args.workers,
+                      cache_dir=None if args.no_cache else os.path.join(pairs_dir, 'cache'))
+    ranked = rank_pairs(scan, args.significance, min(len(close), args.lookback), args.max_half_life, args.min_corr)
+    print(f"{len(scan)} pairs scanned over {min(len(close), args.lookback)} bars; {len(ranked)} cointegrated at "
+          f"{args.significance:.0%} (t < {critical_value(args.significance, min(len(close), args.lookback)):.2f})")
+
+    # Live spread signals for the top pairs (a = cheap leg when z < 0)
+    chosen = select_pairs(ranked, args.top)
+    if not chosen.empty:
+        chosen['signal'] = np.select([chosen['z'] <= -ENTRY_Z, chosen['z'] >= ENTRY_Z, chosen['z'].abs() <= EXIT_Z],
+                                     ['BUY ' + chosen['a'], 'BUY ' + chosen['b'], 'EXIT'], default='HOLD')
+        print("\nTop Pairs:")
+        print(chosen[['rank', 'a', 'b', 'beta', 'adf_t', 'half_life', 'corr', 'z', 'signal']].round(3).to_string(index=False))
+        print(f"\nPairs saved: {write_pairs(ranked, out_dir=pairs_dir)}")
+    else:
+        print("No cointegrated pairs today. Try a looser --significance or --max-half-life.")
@@ -1,203 +1,479 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import schedule
-import time
-from datetime import datetime, time as dt_time
+import asyncio
+from datetime import date, datetime, timedelta, time as dt_time
 import os
-import json
+import sys
+import math
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common import analytics, execution, risk
+from common.bars import TIMEFRAMES, BarAggregator
+from common.data_store import COLUMNS, EXCHANGE_TZ, MarketDataStore
+from common.fundamentals import FundamentalsCache
+from common.journal import Journal, JournalTail
+from common.pairs import load_pairs, select_pairs, spread_signals
+from common.quotes import QuoteService
+from common.scheduler import MarketScheduler, in_market_hours
+from common.screen import load_universe
+from common.indicators import CrossoverDetector, RollingStats
+from common.signals import bars_needed, compute_signals
+from common.telemetry import Telemetry, TickProfiler
 
 # Config (move to YAML later)
 CONFIG = {
     'initial_cash': 100000,
     'brokerage_fee': 0.001,  # 0.1%
-    'slippage': 0.0005,       # 0.05%
+    'stt': 0.001,             # 0.1% securities transaction tax, both sides
+    'slippage_bps': 5,        # 0.05% against the order
+    'max_volume_pct': 0.1,    # Fill at most 10% of the live bar's volume (partial fills)
+    'fill_at': 'close',       # 'close': fill at this tick's quote; 'next_open': queue for the next tick's quote
     'max_position_size': 0.1, # 10% of portfolio per trade
     'stop_loss_pct': 0.02,    # 2% stop-loss
+    'trailing_stop_pct': None, # e.g. 0.05: also exit 5% below the highest quote since entry
+    # Portfolio-level sizing (common/risk.py): all of a tick's buys are sized together
+    'sizing': 'fixed',        # 'fixed' (max_position_size each) or 'volatility' (target_vol / ATR, capped)
+    'vol_method': 'atr',      # 'atr' or 'std' of close returns, over vol_window bars
+    'vol_window': 14,
+    'target_vol': 0.002,      # Equity fraction one position may move per bar
+    'max_gross_exposure': 1.0, # Invested <= 100% of portfolio value
+    'max_sector_exposure': None, # e.g. 0.3 per sector
+    'sectors': None,          # {ticker: sector}; None reads the screener's fundamentals cache when sector caps are on
     'tickers': ['RELIANCE.NS'], # Universe; expand via screener
-    'strat': 'ma_crossover',  # 'ma_crossover', 'mean_reversion', 'momentum'
-    'check_interval_min': 5,  # Run every 5 min
+    'universe': None,         # e.g. 'blue_chips': load tickers from the screener's latest universe file
+    'strat': 'ma_crossover',  # 'ma_crossover', 'mean_reversion', 'momentum', 'pairs'
+    'strat_params': {},       # Overrides for the strat's defaults, e.g. {'short_window': 20}
+    # 'pairs' trades the top_n pairs published by pairs/pairs_scanner.py (params: top_n, z_window, entry_z, exit_z);
+    # long-only: buys the cheap leg when the spread z-score crosses entry_z, sells held legs once it is back inside exit_z
+    'pairs_dir': 'output/pairs',
+    'signal_mode': 'batch',   # 'batch' (whole-universe matrix) or 'streaming' (O(1) per-ticker state)
+    'check_interval_min': 5,  # Tick on every 5-min bar boundary from market_open (IST)
+    'bar_settle_sec': 2,      # Wait after the boundary for the closing bar to publish
+    'tick_deadline_sec': None, # Tick overrun threshold; None = 80% of the interval
     'market_open': dt_time(9, 15),
     'market_close': dt_time(15, 30),
-    'output_dir': 'output'
+    'output_dir': 'output',
+    'data_dir': 'output/market_data',  # Shared OHLCV store (see common/data_store.py)
+    'data_interval': '1d',
+    'fetch_chunk': 25,        # Tickers per provider request; chunks are fetched concurrently
+    'quote_ttl_sec': 30,      # Prices younger than this are served from the in-process quote cache
+    'journal_dir': 'output/journal',  # One append-only log per portfolio under here (see common/journal.py)
+    'trades_in_memory': 500,  # Recent trades kept in portfolio.trades; full history is in the journal
+    # Instrumentation (common/telemetry.py): per-stage timers, counters, histograms
+    'metrics_file': 'output/metrics/ticks.jsonl',         # One line of stage times/counts per tick (charted by the dashboard)
+    'metrics_textfile': 'output/metrics/paper_trader.prom', # Prometheus text, rewritten each tick; None to skip
+    'metrics_port': None,     # e.g. 9108: serve Prometheus text on http://127.0.0.1:<port>/metrics
+    'profile': None,          # None, 'cprofile' or 'tracemalloc': capture ticks to output/metrics/profiles/
+    'profile_every': 1,       # Capture every Nth tick
+    # Strategy variants traded side by side on shared data. Each spec: name, strat, optional params,
+    # tickers (default: the universe above), timeframe ('5m', '15m', '1h', '1d': bars aggregated
+    # from one shared 1m feed; default daily store bars) and execution overrides (initial_cash, ...).
+    # None runs a single portfolio from strat/strat_params.
+    'portfolios': None,
 }
 
 # Ensure output dir
 os.makedirs(CONFIG['output_dir'], exist_ok=True)
 
-# Portfolio state (global for simplicity; use class for multi-user)
-portfolio = {
-    'cash': CONFIG['initial_cash'],
-    'positions': {ticker: {'shares': 0, 'avg_price': 0} for ticker in CONFIG['tickers']},
-    'total_value': CONFIG['initial_cash'],
-    'trades': []  # List of dicts: {'timestamp', 'action', 'ticker', 'shares', 'price', 'value'}
-}
+# Screener-published universe overrides the hardcoded tickers
+if CONFIG['universe']:
+    CONFIG['tickers'] = load_universe(CONFIG['universe'], out_dir=os.path.join(CONFIG['output_dir'], 'universes'))
+
+# Instrumentation: stage timers and counters per tick, optional per-tick profiles
+TELEMETRY = Telemetry(metrics_file=CONFIG['metrics_file'])
+PROFILER = TickProfiler(CONFIG['profile'], CONFIG['profile_every'],
+                        os.path.join(CONFIG['output_dir'], 'metrics', 'profiles'), telemetry=TELEMETRY)
+
+# Market data: refreshed once per tick, signal functions only read from it
+STORE = MarketDataStore(CONFIG['data_dir'], fetch_chunk=CONFIG['fetch_chunk'])
+
+def _refresh(tickers, interval):
+    """Delta refresh of the store, counted in rows and stored bytes"""
+    rows = sum(STORE.refresh(tickers, interval).values())
+    TELEMETRY.inc('store_fetches_total', interval=interval)
+    TELEMETRY.inc('store_rows_written_total', rows, interval=interval)
+    TELEMETRY.inc('store_bytes_written_total', rows * (len(COLUMNS) + 1) * 8, interval=interval)  # Timestamp + OHLCV columns
+    return rows
+
+def _store_quotes(tickers):
+    """Quote fetch: the live bar of the store (refreshed once per tick by PaperTrader.tick) is the price"""
+    return STORE.latest(tickers, CONFIG['data_interval'])
+
+QUOTES = QuoteService(_store_quotes, ttl=CONFIG['quote_ttl_sec'])
+
+# Intraday timeframes whose ring is seeded from the store's own bars (yfinance serves 1h / 1d history)
+SEED_TIMEFRAMES = ('1h', '1d')
+
+# Streaming indicator state per (strat, ticker, params): seeded once, then O(1) per bar
+INDICATORS = {}
+
+def _advance(key, ticker, make, seed_bars):
+    """Feed bars stored since the indicator's last bar; returns the indicator or None."""
+    state = INDICATORS.get(key)
+    if state is None:
+        data = STORE.history(ticker, CONFIG['data_interval'], bars=seed_bars, columns=['Close'])
+        if data.empty:
+            return None
+        INDICATORS[key] = [make().seed(data['Close'].to_numpy()), data.index[-1]]
+        return INDICATORS[key][0]
+    indicator, last_ts = state
+    data = STORE.history(ticker, CONFIG['data_interval'], start=last_ts, columns=['Close'])
+    for ts, close in zip(data.index, data['Close'].to_numpy()):
+        if ts == last_ts:
+            indicator.replace_last(close)  # Live bar revised since the last tick
+        else:
+            indicator.update(close)
+    if len(data):
+        state[1] = data.index[-1]
+    return indicator
 
 # Strat signal functions (import/adapt from your scripts)
 def get_ma_crossover_signal(ticker, short_window=50, long_window=200):
     """Returns signal: 1=buy, -1=sell, 0=hold"""
-    data = yf.download(ticker, period='6mo')  # Enough history
-    data['SMA_Short'] = data['Close'].rolling(short_window).mean()
-    data['SMA_Long'] = data['Close'].rolling(long_window).mean()
-    if len(data) < long_window:
-        return 0
-    prev_short = data['SMA_Short'].iloc[-2]
-    prev_long = data['SMA_Long'].iloc[-2]
-    curr_short = data['SMA_Short'].iloc[-1]
-    curr_long = data['SMA_Long'].iloc[-1]
-    if prev_short <= prev_long and curr_short > curr_long:
-        return 1  # Buy
-    elif prev_short >= prev_long and curr_short < curr_long:
-        return -1  # Sell
-    return 0
+    detector = _advance(('ma_crossover', ticker, short_window, long_window), ticker,
+                        lambda: CrossoverDetector(short_window, long_window), long_window + 1)
+    return 0 if detector is None else detector.signal
 
 def get_mean_reversion_signal(ticker, period=20, z_threshold=2):
     """Adapt from mean_reversion.py"""
-    data = yf.download(ticker, period='6mo')
-    data['Mean'] = data['Close'].rolling(period).mean()
-    data['Std'] = data['Close'].rolling(period).std()
-    data['Z_Score'] = (data['Close'] - data['Mean']) / data['Std']
-    if len(data) < period:
-        return 0
-    z = data['Z_Score'].iloc[-1]
+    stats = _advance(('mean_reversion', ticker, period), ticker, lambda: RollingStats(period), period)
+    z = math.nan if stats is None else stats.zscore
     if z < -z_threshold:
         return 1
     elif z > z_threshold:
         return -1
     return 0
 
-def get_momentum_signal(tickers, lookback=10, top_n=1):
-    """Adapt from momentum.py; returns dict of signals per ticker"""
-    data = yf.download(tickers, period='3mo')['Adj Close']
-    returns = data.pct_change().tail(lookback).mean()
-    top = returns.nlargest(top_n).index.tolist()
-    signals = {t: 1 if t in top else 0 for t in tickers}
-    # Sell if not in top anymore (simplified)
-    for t in tickers:
-        if signals[t] == 0 and portfolio['positions'][t]['shares'] > 0:
-            signals[t] = -1
-    return signals
-
-# Signal dispatcher
-def get_signals():
-    if CONFIG['strat'] == 'ma_crossover':
-        return {t: get_ma_crossover_signal(t) for t in CONFIG['tickers']}
-    elif CONFIG['strat'] == 'mean_reversion':
-        return {t: get_mean_reversion_signal(t) for t in CONFIG['tickers']}
-    elif CONFIG['strat'] == 'momentum':
-        return get_momentum_signal(CONFIG['tickers'])
-    raise ValueError("Unknown strat")
-
-# Simulate execution
-def execute_trade(ticker, action, price, shares):
-    pos = portfolio['positions'][ticker]
-    value = abs(shares * price * (1 + CONFIG['slippage']))
-    value += value * CONFIG['brokerage_fee']  # Fee on value
-    
-    if action == 'buy' and portfolio['cash'] >= value:
-        pos['shares'] += shares
-        pos['avg_price'] = (pos['avg_price'] * pos['shares'] - shares * price + shares * price) / pos['shares']  # Weighted avg
-        portfolio['cash'] -= value
-        portfolio['trades'].append({
-            'timestamp': datetime.now(),
-            'action': 'BUY',
-            'ticker': ticker,
-            'shares': shares,
-            'price': price,
-            'value': -value
-        })
-        print(f"BUY {shares} {ticker} @ ₹{price:.2f} (Cash left: ₹{portfolio['cash']:.2f})")
-    elif action == 'sell' and pos['shares'] >= shares:
-        portfolio['cash'] += value
-        pos['shares'] -= shares
-        if pos['shares'] == 0:
-            pos['avg_price'] = 0
-        portfolio['trades'].append({
-            'timestamp': datetime.now(),
-            'action': 'SELL',
-            'ticker': ticker,
-            'shares': shares,
-            'price': price,
-            'value': value
-        })
-        print(f"SELL {shares} {ticker} @ ₹{price:.2f} (Cash: ₹{portfolio['cash']:.2f})")
-    else:
-        print(f"Trade rejected: Insufficient { 'cash' if action=='buy' else 'shares' }")
-
-# Check stops
-def check_stop_loss(ticker, current_price):
-    pos = portfolio['positions'][ticker]
-    if pos['shares'] > 0 and current_price < pos['avg_price'] * (1 - CONFIG['stop_loss_pct']):
-        execute_trade(ticker, 'sell', current_price, pos['shares'])
-        print(f"STOP-LOSS triggered for {ticker}")
+# Multi-portfolio engine: one quote fetch, one close matrix and one signal pass per strat/params per tick
+def _key(strat, params):
+    return strat, tuple(sorted(params.items()))
+
+class PaperTrader:
+    """Hosts many Portfolio instances (own strat, params, universe, costs) in one loop."""
+
+    def __init__(self, config, specs=None):
+        self.config = config
+        self.portfolios = []
+        self.universes = {}  # name -> tickers the strat trades (a portfolio's arrays may also hold resumed names)
+        self.configs = {}    # name -> CONFIG with the portfolio's execution overrides
+        self.journals = {}
+        self.pending = {}    # name -> (idx, side, shares) queued for the next tick when fill_at='next_open'
+        self.metrics = {}    # name -> analytics.RunningMetrics over per-tick snapshots
+        self.timeframes = {} # name -> intraday timeframe, or None for daily store bars
+        self.acted = {}      # name -> start of the last intraday bar the portfolio traded on
+        self.bars = None     # BarAggregator over the 1m feed when any portfolio is intraday
+        self.closed = {}     # timeframe -> start of its newest closed bar
+        self.cold = set()    # Intraday portfolios warned about a window not yet full
+        self.pairs = {}      # name -> pairs traded by a 'pairs' portfolio (a, b, beta, alpha)
+        session = (datetime.combine(date.min, config['market_close']) - datetime.combine(date.min, config['market_open']))
+        self.ticks_per_year = (session // timedelta(minutes=config['check_interval_min']) + 1) * analytics.PERIODS_PER_YEAR
+        for spec in specs or [{'name': config['strat'], 'strat': config['strat'], 'params': config['strat_params']}]:
+            self.add_portfolio(**spec)
+        self._init_bars()
+
+    def add_portfolio(self, name, strat, params=None, tickers=None, timeframe=None, **overrides):
+        config = {**self.config, **overrides}
+        if strat == 'pairs':  # Universe = legs of the scanner's top pairs (unless tickers are given)
+            pairs = select_pairs(load_pairs(out_dir=config['pairs_dir']), (params or {}).get('top_n', 5))
+            if pairs.empty:
+                print(f"{name}: no published pairs in {config['pairs_dir']}; run pairs/pairs_scanner.py")
+            self.pairs[name] = pairs
+            tickers = tickers or list(dict.fromkeys(list(pairs['a']) + list(pairs['b'])))
+        tickers = list(tickers or self.config['tickers'])
+        if config['max_sector_exposure'] is not None and config['sectors'] is None:
+            # Sector caps need a sector per ticker; the screener caches them with the fundamentals
+            cache = FundamentalsCache(os.path.join(config['output_dir'], 'fundamentals.json'))
+            config['sectors'] = cache.table(tickers, ['sector'])['sector'].dropna().to_dict()
+        portfolio = execution.new_portfolio(tickers, config['initial_cash'], name=name, strat=strat,
+                                            params=params, max_trades=config['trades_in_memory'])
+        # Own journal per portfolio; resume from its last snapshot + trades logged after it
+        journal = Journal(os.path.join(self.config['journal_dir'], name))
+        restored = journal.recover(config['initial_cash'])
+        if restored:
+            portfolio.restore(restored)
+            print(f"Resumed {name} from journal: ₹{portfolio.total_value:.2f}")
+        metrics = analytics.RunningMetrics(self.ticks_per_year)
+        _, _, snapshots = JournalTail(journal.root).poll()  # Replay past marks so drawdown/Sharpe span restarts
+        for cash, total_value in zip(snapshots['cash'], snapshots['total_value']):
+            metrics.update(total_value, total_value - cash)
+        self.metrics[name] = metrics
+        self.portfolios.append(portfolio)
+        self.universes[name] = tickers
+        self.configs[name] = config
+        self.journals[name] = journal
+        self.timeframes[name] = timeframe
+        return portfolio
+
+    def _init_bars(self):
+        """One aggregator for every intraday portfolio; each timeframe is subscribed to once."""
+        intraday = [p for p in self.portfolios if self.timeframes[p.name]]
+        if not intraday:
+            return
+        tickers = list(dict.fromkeys(t for p in intraday for t in self.universes[p.name]))
+        timeframes = sorted({self.timeframes[p.name] for p in intraday}, key=lambda tf: TIMEFRAMES[tf] or 24 * 60)  # 1d: one bar per session
+        capacity = max(bars_needed(p.strat, p.params) for p in intraday) + 2
+        self.bars = BarAggregator(tickers, timeframes, capacity, self.config['market_open'], self.config['market_close'])
+        for timeframe in timeframes:
+            self.bars.subscribe(timeframe, lambda tf, buffer, bar_time: self.closed.__setitem__(tf, bar_time))
+
+    def _update_bars(self, now):
+        """Delta-refresh 1m bars once for all intraday tickers and stream the elapsed minutes in."""
+        now = pd.Timestamp(now)
+        _refresh(self.bars.tickers, '1m')
+        if self.bars.last_update is None:
+            # Warm-up: 1h / 1d rings come from the store's own history (the 1m backfill is only ~7 days);
+            # 1m history fills whatever the ring still lacks, at least the forming bar
+            session = (self.bars.session_close - self.bars.session_open) // 60 // 10**9
+            rows = 0
+            for timeframe, width in self.bars.widths.items():
+                if timeframe in SEED_TIMEFRAMES and not len(self.bars[timeframe]):
+                    _refresh(self.bars.tickers, timeframe)
+                    self.bars.seed(timeframe, STORE.matrices(self.bars.tickers, timeframe,
+                                                             bars=self.bars.capacity + 1), now)
+                rows = max(rows, (width or session) * max(self.bars.capacity - len(self.bars[timeframe]), 1))
+            start = None
+        else:
+            start, rows = pd.Timestamp(self.bars.last_update), None
+        minutes = STORE.matrices(self.bars.tickers, '1m', start=start, bars=rows)
+        TELEMETRY.inc('bars_fed_total', self.bars.feed(minutes, until=now))
+        self.bars.flush(now)
+
+    def tracked(self):
+        """Union of every universe and held position, in first-seen order."""
+        tickers = []
+        for portfolio in self.portfolios:
+            tickers += self.universes[portfolio.name] + portfolio.held()
+        return list(dict.fromkeys(tickers))
+
+    def _close_matrices(self, tickers):
+        """One store read per price column, deep enough for the hungriest strat."""
+        bars = {}
+        for portfolio in self.portfolios:
+            if self.timeframes[portfolio.name]:
+                continue  # Reads the bar aggregator
+            if portfolio.strat in ('ma_crossover', 'mean_reversion') and self.config['signal_mode'] == 'streaming':
+                continue  # Indicators read only the new bars themselves
+            column = 'Adj Close' if portfolio.strat == 'momentum' else 'Close'
+            bars[column] = max(bars.get(column, 0), bars_needed(portfolio.strat, portfolio.params))
+        return {column: STORE.close_matrix(tickers, self.config['data_interval'], column=column, bars=n)
+                for column, n in bars.items()}
+
+    def _volatility(self, portfolio, tickers, shared):
+        """Per-ticker volatility for 'volatility' sizing (None otherwise); one estimate per window/method/bars."""
+        config = self.configs[portfolio.name]
+        if config['sizing'] != 'volatility':
+            return None
+        timeframe = self.timeframes[portfolio.name]
+        key = ('vol', config['vol_method'], config['vol_window'], timeframe)
+        if key not in shared:
+            n = config['vol_window'] + 1
+            if timeframe:
+                buffer = self.bars[timeframe]
+                high, low, close = (buffer.frame(field, n, closed_only=True) for field in ('high', 'low', 'close'))
+            else:
+                bars = STORE.matrices(tickers, self.config['data_interval'], columns=['High', 'Low', 'Close'], bars=n)
+                high, low, close = bars['High'], bars['Low'], bars['Close']
+            shared[key] = risk.volatility(close, high, low, config['vol_window'], config['vol_method'])
+        return shared[key]
+
+    def _bar_signals(self, portfolio, shared):
+        """Signals on the newest closed intraday bar, once per bar; zeros until one closes and the window is full."""
+        universe, timeframe = self.universes[portfolio.name], self.timeframes[portfolio.name]
+        bar_time = self.closed.get(timeframe)
+        if bar_time is None or self.acted.get(portfolio.name) == bar_time:
+            return pd.Series(0, index=universe, dtype=np.int64)
+        buffer, needed = self.bars[timeframe], bars_needed(portfolio.strat, portfolio.params)
+        if len(buffer) - buffer.forming < needed:
+            if portfolio.name not in self.cold:
+                print(f"Warning: {portfolio.name} has {len(buffer) - buffer.forming}/{needed} closed {timeframe} bars; "
+                      f"not trading until warm")
+                self.cold.add(portfolio.name)
+            return pd.Series(0, index=universe, dtype=np.int64)
+        self.cold.discard(portfolio.name)
+        self.acted[portfolio.name] = bar_time
+        close = self.bars[timeframe].frame('close', bars_needed(portfolio.strat, portfolio.params), closed_only=True).ffill()
+        if portfolio.strat == 'pairs':
+            return self._pair_signals(portfolio, close[universe])
+        if portfolio.strat == 'momentum':
+            held = [portfolio.shares_of(t) > 0 for t in universe]
+            return compute_signals(close[universe], 'momentum', portfolio.params, held=held)
+        key = _key(portfolio.strat, portfolio.params) + (timeframe, bar_time)
+        if key not in shared:
+            shared[key] = compute_signals(close, portfolio.strat, portfolio.params)
+        return shared[key].reindex(universe, fill_value=0)
+
+    def _signals(self, portfolio, tickers, closes, shared):
+        """Series of signals over the portfolio's universe; ma/mr passes are shared across portfolios."""
+        if self.timeframes[portfolio.name]:
+            return self._bar_signals(portfolio, shared)
+        universe = self.universes[portfolio.name]
+        if portfolio.strat == 'pairs':  # Legs depend on holdings
+            return self._pair_signals(portfolio, closes['Close'][universe])
+        if portfolio.strat == 'momentum':  # Ranking depends on the universe and holdings
+            held = [portfolio.shares_of(t) > 0 for t in universe]
+            return compute_signals(closes['Adj Close'][universe], 'momentum', portfolio.params, held=held)
+        key = _key(portfolio.strat, portfolio.params)
+        if key not in shared:
+            if self.config['signal_mode'] == 'streaming':
+                signal_fn = get_ma_crossover_signal if portfolio.strat == 'ma_crossover' else get_mean_reversion_signal
+                shared[key] = pd.Series({t: signal_fn(t, **portfolio.params) for t in tickers},
+                                        dtype=np.int64)
+            else:
+                shared[key] = compute_signals(closes['Close'], portfolio.strat, portfolio.params)
+        return shared[key].reindex(universe, fill_value=0)
+
+    def _pair_signals(self, portfolio, close):
+        """Live spread z-score signals on each of the portfolio's pairs; sells only for held legs."""
+        params = {k: v for k, v in portfolio.params.items() if k != 'top_n'}
+        held = [portfolio.shares_of(t) > 0 for t in close.columns]
+        return spread_signals(close, self.pairs[portfolio.name], held=held, **params)
+
+    def fill(self, portfolio, orders, price, volume, label='', timestamp=None):
+        """Fill (idx, side, shares) at price/volume aligned to portfolio.tickers; journal and print the fills."""
+        idx, side, shares = orders
+        if not len(idx):
+            return []
+        TELEMETRY.inc('orders_submitted_total', len(idx), portfolio=portfolio.name)
+        trades = execution.fill_orders(portfolio, self.configs[portfolio.name], idx, side, shares,
+                                       price[idx], volume[idx], timestamp)
+        journal = self.journals[portfolio.name]
+        for trade in trades:
+            journal.record_trade(trade)
+            print(f"[{portfolio.name}] {label}{trade['action']} {trade['shares']} {trade['ticker']} "
+                  f"@ ₹{trade['price']:.2f} (₹{abs(trade['value']):.2f} incl. ₹{trade['fees']:.2f} costs)")
+        if trades:
+            print(f"[{portfolio.name}] Cash: ₹{portfolio.cash:.2f}")
+        filled = {t['ticker']: t['shares'] for t in trades}
+        short = 0
+        for i, n in zip(idx, shares):
+            ticker = portfolio.tickers[i]
+            if filled.get(ticker, 0) < n:
+                short += 1
+                print(f"[{portfolio.name}] {ticker}: filled {filled.get(ticker, 0)}/{n} "
+                      f"(cash, holdings or volume cap)")
+        TELEMETRY.inc('orders_filled_total', len(trades), portfolio=portfolio.name)
+        TELEMETRY.inc('orders_rejected_total', len(idx) - len(trades), portfolio=portfolio.name)
+        TELEMETRY.inc('orders_partial_total', short - (len(idx) - len(trades)), portfolio=portfolio.name)
+        return trades
+
+    def tick(self, now=None):
+        """One pass over every portfolio; fills and snapshots are stamped with now (naive exchange time)."""
+        now = pd.Timestamp.now(tz=EXCHANGE_TZ).tz_localize(None).to_pydatetime() if now is None else now
+        # One delta refresh of the store per tick for every portfolio; signals and quotes read it
+        tracked = self.tracked()
+        with TELEMETRY.timer('refresh'):
+            _refresh(tracked, self.config['data_interval'])
+        with TELEMETRY.timer('quotes'):
+            prices = QUOTES.get(tracked)
+        with TELEMETRY.timer('market_data'):
+            volumes = STORE.latest(tracked, self.config['data_interval'], column='Volume')  # Live bar so far
+            closes = self._close_matrices(tracked)
+            TELEMETRY.inc('rows_processed_total', sum(frame.size for frame in closes.values()))
+        if self.bars is not None:
+            with TELEMETRY.timer('bars'):
+                self._update_bars(now)
+        shared = {}
+        for portfolio in self.portfolios:
+            config = self.configs[portfolio.name]
+            price = prices.reindex(portfolio.tickers).to_numpy(np.float64)
+            volume = volumes.reindex(portfolio.tickers).to_numpy(np.float64)
+            with TELEMETRY.timer('fills'):
+                if portfolio.name in self.pending:  # Last tick's orders at this tick's quote
+                    self.fill(portfolio, self.pending.pop(portfolio.name), price, volume, timestamp=now)
+
+                # Stops first; the quote is both the bar's open and low here, so stops fill at the quote
+                idx, _ = execution.stop_orders(portfolio, config, price, price)
+                self.fill(portfolio, (idx, np.full(len(idx), -1), portfolio.shares[idx]), price, volume, 'STOP-LOSS ',
+                          timestamp=now)
+                risk.update_peaks(portfolio, price)  # Trailing stops follow the highest quote since entry
+                execution.mark_to_market(portfolio, prices)
+            print(f"[{portfolio.name}] Portfolio Value: ₹{portfolio.total_value:.2f} "
+                  f"(P&L: ₹{portfolio.total_value - config['initial_cash']:.2f})")
+
+            # Generate & act on signals
+            with TELEMETRY.timer('signals'):
+                signals = self._signals(portfolio, tracked, closes, shared)
+            with TELEMETRY.timer('sizing'):
+                vol = self._volatility(portfolio, tracked, shared)
+                orders = execution.orders_from_signals(portfolio, config, signals, prices, vol)
+            if config['fill_at'] == 'next_open':
+                self.pending[portfolio.name] = orders  # Not journaled: a restart drops unfilled orders
+            else:
+                with TELEMETRY.timer('fills'):
+                    self.fill(portfolio, orders, prices.reindex(portfolio.tickers).to_numpy(np.float64), volume,
+                              timestamp=now)
+
+            # Journal snapshot: a few appended lines per tick, fsync'd once
+            with TELEMETRY.timer('journal'):
+                self.journals[portfolio.name].snapshot(portfolio, now)
+            stats = self.metrics[portfolio.name].update(portfolio.total_value, portfolio.total_value - portfolio.cash)
+            TELEMETRY.set('portfolio_value', portfolio.total_value, portfolio=portfolio.name)
+            TELEMETRY.set('portfolio_cash', portfolio.cash, portfolio=portfolio.name)
+            TELEMETRY.set('trades_in_memory', len(portfolio.trades), portfolio=portfolio.name)
+            print(f"[{portfolio.name}] Drawdown: {stats.drawdown*100:.2f}% (max {stats.max_drawdown*100:.2f}%) | "
+                  f"Sharpe: {stats.sharpe:.2f} | Sortino: {stats.sortino:.2f}")
+
+TRADER = PaperTrader(CONFIG, CONFIG['portfolios'])
 
 # Main trading loop function
-def run_paper_trade():
-    now = datetime.now().time()
-    if not (CONFIG['market_open'] <= now <= CONFIG['market_close']):
+def run_paper_trade(boundary=None):
+    now = SCHEDULER.now()
+    # Hours are checked on the bar boundary: the scheduler fires settle_sec after it, so the close tick runs past 15:30
+    if not in_market_hours(boundary or now, CONFIG['market_open'], CONFIG['market_close'], SCHEDULER.weekdays):
         print(f"Outside market hours: {now}")
         return
     
-    print(f"\n--- Paper Trade Check: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---")
-    
-    # Fetch current prices
-    prices = yf.download(CONFIG['tickers'], period='1d', interval='5m')['Close'].iloc[-1]
-    
-    # Update portfolio value
-    portfolio['total_value'] = portfolio['cash']
-    for ticker, pos in portfolio['positions'].items():
-        if pos['shares'] > 0:
-            current_price = prices[ticker]
-            check_stop_loss(ticker, current_price)  # Check SL first
-            portfolio['total_value'] += pos['shares'] * current_price
-    
-    print(f"Portfolio Value: ₹{portfolio['total_value']:.2f} (P&L: ₹{portfolio['total_value'] - CONFIG['initial_cash']:.2f})")
-    
-    # Generate & act on signals
-    signals = get_signals()
-    for ticker, signal in signals.items():
-        if signal == 0:
-            continue
-        current_price = prices[ticker]
-        pos = portfolio['positions'][ticker]
-        max_shares = int((portfolio['total_value'] * CONFIG['max_position_size']) / current_price)
-        
-        if signal == 1 and pos['shares'] == 0:  # Buy if flat
-            shares = min(max_shares, int(max_shares))  # Full size
-            execute_trade(ticker, 'buy', current_price, shares)
-        elif signal == -1 and pos['shares'] > 0:  # Sell if held
-            execute_trade(ticker, 'sell', current_price, pos['shares'])
-    
-    # Export snapshot
-    snapshot = {'timestamp': datetime.now().isoformat(), 'portfolio': portfolio.copy()}
-    with open(f"{CONFIG['output_dir']}/portfolio_{datetime.now().strftime('%Y%m%d_%H%M')}.json", 'w') as f:
-        json.dump(snapshot, f, default=str)
-    pd.DataFrame(portfolio['trades']).to_csv(f"{CONFIG['output_dir']}/trades.csv", index=False)
+    print(f"\n--- Paper Trade Check: {now.strftime('%Y-%m-%d %H:%M:%S')} ---")
+    TELEMETRY.begin_tick()
+    try:
+        with PROFILER.capture(now.strftime('%Y%m%d_%H%M%S')):
+            TRADER.tick(now.replace(tzinfo=None))  # Exchange clock, naive like the store's bars
+    except Exception:
+        TELEMETRY.inc('tick_errors_total')
+        raise
+    finally:
+        record = TELEMETRY.end_tick(now.replace(tzinfo=None))
+        if CONFIG['metrics_textfile']:
+            TELEMETRY.write_textfile(CONFIG['metrics_textfile'])
+    print("Stages: " + ", ".join(f"{stage} {sec*1000:.0f}ms" for stage, sec in record['stages'].items())
+          + f" | tick {record['duration']*1000:.0f}ms")
 
 # Plot equity curve (run manually or post-session)
 def plot_equity_curve():
-    trades_df = pd.DataFrame(portfolio['trades'])
-    if trades_df.empty:
-        return
-    trades_df['cumulative_value'] = trades_df['value'].cumsum() + CONFIG['initial_cash']
-    plt.figure(figsize=(10, 5))
-    plt.plot(trades_df['timestamp'], trades_df['cumulative_value'])
-    plt.title('Paper Trading Equity Curve')
-    plt.xlabel('Time')
-    plt.ylabel('Portfolio Value (₹)')
-    plt.savefig(f"{CONFIG['output_dir']}/equity_curve.png")
-    plt.close()
-    print("Equity plot saved.")
-
-# Scheduler
-schedule.every(CONFIG['check_interval_min']).minutes.do(run_paper_trade)
+    """Mark-to-market equity and drawdown per portfolio from its journaled trades and stored closes."""
+    for portfolio in TRADER.portfolios:
+        _, trades_df, _ = JournalTail(TRADER.journals[portfolio.name].root).poll()
+        if trades_df.empty:
+            continue
+        tickers = list(trades_df['ticker'].unique())
+        close = STORE.close_matrix(tickers, CONFIG['data_interval'])
+        close = close.iloc[max(close.index.searchsorted(trades_df['timestamp'].min(), side='right') - 1, 0):]  # From the first trade's bar
+        curve = analytics.equity_from_trades(trades_df, close, portfolio.initial_cash)
+        stats = analytics.summary(curve['equity'], trades_df, curve['invested'] / curve['equity'])
+        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 7), sharex=True, gridspec_kw={'height_ratios': [3, 1]})
+        ax1.plot(curve.index, curve['equity'])
+        ax1.set_title(f"Paper Trading Equity Curve: {portfolio.name} "
+                      f"(Sharpe {stats['sharpe']:.2f}, max DD {stats['max_drawdown']*100:.1f}%)")
+        ax1.set_ylabel('Portfolio Value (₹)')
+        ax2.fill_between(curve.index, analytics.drawdown(curve['equity']) * 100, 0, color='r', alpha=0.3)
+        ax2.set_ylabel('Drawdown (%)')
+        ax2.set_xlabel('Time')
+        fig.savefig(f"{CONFIG['output_dir']}/equity_curve_{portfolio.name}.png")
+        plt.close(fig)
+        print(f"Equity plot saved for {portfolio.name}.")
+
+# Scheduler: ticks on exchange bar boundaries with a per-tick deadline (see common/scheduler.py)
+SCHEDULER = MarketScheduler(run_paper_trade, CONFIG['check_interval_min'], CONFIG['market_open'],
+                            CONFIG['market_close'], deadline_sec=CONFIG['tick_deadline_sec'],
+                            settle_sec=CONFIG['bar_settle_sec'])
 
 # Run loop
 if __name__ == "__main__":
     print("Starting Paper Trading Engine...")
-    print(f"Strat: {CONFIG['strat']} | Tickers: {CONFIG['tickers']} | Initial Cash: ₹{CONFIG['initial_cash']}")
-    run_paper_trade()  # Initial run
-    while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check scheduler every min
\ No newline at end of file
+    if CONFIG['metrics_port']:
+        TELEMETRY.serve(CONFIG['metrics_port'])
+        print(f"Metrics on http://127.0.0.1:{CONFIG['metrics_port']}/metrics")
+    for portfolio in TRADER.portfolios:
+        print(f"{portfolio.name}: {portfolio.strat} {portfolio.params} | Tickers: {TRADER.universes[portfolio.name]} | Initial Cash: ₹{portfolio.initial_cash}")
+    asyncio.run(SCHEDULER.run())
@@ -1,49 +1,54 @@
-import yfinance as yf
 import pandas as pd
+import os
+import sys
 
-# Latest Nifty 50 constituents (as of Nov 4, 2025; update if needed via NSE site)
-nifty_50_tickers = [
-    'RELIANCE.NS', 'HDFCBANK.NS', 'BHARTIARTL.NS', 'TCS.NS', 'ICICIBANK.NS',
-    'SBIN.NS', 'BAJFINANCE.NS', 'INFY.NS', 'HINDUNILVR.NS', 'LT.NS',
-    'ITC.NS', 'MARUTI.NS', 'M&M.NS', 'KOTAKBANK.NS', 'HCLTECH.NS',
-    'SUNPHARMA.NS', 'AXISBANK.NS', 'ULTRACEMCO.NS', 'BAJAJFINSV.NS', 'TITAN.NS',
-    'NTPC.NS', 'ONGC.NS', 'ADANIPORTS.NS', 'ZOMATO.NS', 'BEL.NS',
-    'JSWSTEEL.NS', 'ADANIENT.NS', 'POWERGRID.NS', 'WIPRO.NS', 'BAJAJ-AUTO.NS',
-    'NESTLEIND.NS', 'ASIANPAINT.NS', 'COALINDIA.NS', 'TATASTEEL.NS', 'INDIGO.NS',
-    'SBILIFE.NS', 'GRASIM.NS', 'JIOFIN.NS', 'EICHERMOT.NS', 'HINDALCO.NS',
-    'TRENT.NS', 'HDFCLIFE.NS', 'TATAMOTORS.NS', 'SHRIRAMFIN.NS', 'TECHM.NS',
-    'CIPLA.NS', 'TATACONSUM.NS', 'APOLLOHOSP.NS', 'MAXHEALTH.NS', 'DRREDDY.NS'
-]
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common.fundamentals import FundamentalsCache
+from common.screen import NIFTY_50, F, Screen, ScreenTable, write_universe
 
-# Screen results
-results = []
+nifty_50_tickers = NIFTY_50  # Default screen universe (common/screen.py)
 
-for ticker in nifty_50_tickers:
-    try:
-        stock = yf.Ticker(ticker)
-        info = stock.info  # Fetches latest fundamentals
-        
-        # Extract key metrics
-        net_income = info.get('netIncomeToCommon', 0)  # In actual currency units (INR)
-        roe = info.get('returnOnEquity', 0) * 100  # Convert to percentage
-        beta = info.get('beta', float('inf'))  # Market beta
-        
-        # Apply filters
-        if net_income > 0 and roe > 15 and beta < 1:
-            results.append({
-                'Ticker': ticker,
-                'ROE (%)': round(roe, 2),
-                'Beta': round(beta, 2),
-                'Net Income (₹ Cr)': round(net_income / 1e7, 2)  # Convert to Crores for readability
-            })
-    except Exception as e:
-        print(f"Error fetching {ticker}: {e}")
-        continue
+# Parameters
+TICKERS_FILE = None       # Optional universe file, one ticker per line (e.g. Nifty 500); default Nifty 50
+CACHE_PATH = 'output/fundamentals.json'  # Per-field TTL cache; re-screens skip the network
+MAX_WORKERS = 8           # Concurrent yfinance requests
+FIELDS = ['netIncomeToCommon', 'returnOnEquity', 'beta', 'sector']  # Screened + sector for paper trader caps
+MIN_ROE = 15              # %
+MAX_BETA = 1
+UNIVERSE_NAME = 'blue_chips'  # Published to output/universes/ for paper_trader.py CONFIG['universe']
 
-# Display results as a table
-if results:
-    df = pd.DataFrame(results)
+if TICKERS_FILE:
+    with open(TICKERS_FILE) as f:
+        tickers = [line.strip() for line in f if line.strip()]
+else:
+    tickers = nifty_50_tickers
+
+# Fetch fundamentals (only tickers with stale fields hit yfinance)
+cache = FundamentalsCache(CACHE_PATH, max_workers=MAX_WORKERS)
+stale = [t for t in tickers if cache.stale(t, FIELDS)]
+fetched = cache.refresh(stale, FIELDS)
+failed = sorted(set(stale) - set(fetched))
+print(f"Fundamentals: {len(fetched)} fetched, {len(tickers) - len(stale)} from cache, {len(failed)} failed")
+if failed:
+    print(f"Failed (stale cached values used where present): {', '.join(failed)}")
+table = ScreenTable(cache.table(tickers, ['netIncomeToCommon', 'returnOnEquity', 'beta']))
+
+# Screen: vectorized predicates over the cached table
+blue_chips = Screen(
+    UNIVERSE_NAME,
+    where=(F('netIncomeToCommon') > 0) & (F('returnOnEquity') * 100 > MIN_ROE) & (F('beta') < MAX_BETA),
+    select={
+        'ROE (%)': F('returnOnEquity') * 100,
+        'Beta': F('beta'),
+        'Net Income (₹ Cr)': F('netIncomeToCommon') / 1e7  # Convert to Crores for readability
+    }
+)
+df = blue_chips.run(table).round(2)
+
+# Display results as a table and publish the universe
+if not df.empty:
     print("Low-Risk Blue Chip Stocks (Nifty 50 Screen):")
-    print(df.to_string(index=False))
+    print(df.reset_index().to_string(index=False))
+    print(f"Universe saved: {write_universe(UNIVERSE_NAME, df.index, blue_chips)}")
 else:
-    print("No stocks matched the criteria today. Try adjusting thresholds!")
\ No newline at end of file
+    print("No stocks matched the criteria today. Try adjusting thresholds!")
@@ -0,0 +1,112 @@
+"""MarketDataStore.refresh and slicing against FileProvider CSVs (no network).
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common.data_store import COLUMNS, FileProvider, MarketDataStore
+
+
+def bars(start, n, base=100.0):
+    """n business-day bars from start with Close = base, base + 1, ..."""
+    index = pd.bdate_range(start, periods=n, name='Date').as_unit('ns')  # The store's resolution
+    close = base + np.arange(n, dtype=np.float64)
+    return pd.DataFrame({'Open': close - 0.5, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Adj Close': close, 'Volume': 1000.0}, index=index)
+
+
+def write_csv(root, ticker, df, interval='1d'):
+    df.to_csv(os.path.join(root, f"{ticker}_{interval}.csv"))
+
+
+@pytest.fixture
+def env(tmp_path):
+    csv_dir = tmp_path / 'csv'
+    csv_dir.mkdir()
+    provider = FileProvider(str(csv_dir))
+    return str(csv_dir), provider, MarketDataStore(str(tmp_path / 'store'), provider)
+
+
+def test_first_refresh_backfills_every_bar(env):
+    csv_dir, provider, store = env
+    write_csv(csv_dir, 'AAA.NS', bars('2024-01-01', 30))
+    write_csv(csv_dir, 'BBB.NS', bars('2024-01-01', 20, base=50))
+
+    assert store.refresh(['AAA.NS', 'BBB.NS']) == {'AAA.NS': 30, 'BBB.NS': 20}
+    assert provider.calls == [(['AAA.NS', 'BBB.NS'], '1d', None, '5y')]  # One backfill batch
+    pd.testing.assert_frame_equal(store.history('AAA.NS'), bars('2024-01-01', 30)[COLUMNS], check_freq=False)
+    assert store.last_timestamp('BBB.NS') == pd.Timestamp('2024-01-26')
+
+
+def test_refresh_appends_only_the_delta(env):
+    csv_dir, provider, store = env
+    write_csv(csv_dir, 'AAA.NS', bars('2024-01-01', 30))
+    store.refresh(['AAA.NS'])
+    write_csv(csv_dir, 'AAA.NS', bars('2024-01-01', 35))
+
+    assert store.refresh(['AAA.NS']) == {'AAA.NS': 6}  # The last stored bar is rewritten with the 5 new ones
+    assert provider.calls[-1] == (['AAA.NS'], '1d', pd.Timestamp('2024-02-09'), None)
+    history = store.history('AAA.NS')
+    assert len(history) == 35 and history.index.is_unique
+    assert history['Close'].tolist() == list(np.arange(100.0, 135.0))
+
+
+def test_refresh_overwrites_a_revised_last_bar(env):
+    csv_dir, _, store = env
+    df = bars('2024-01-01', 10)
+    write_csv(csv_dir, 'AAA.NS', df)
+    store.refresh(['AAA.NS'])
+    df.iloc[-1, df.columns.get_loc('Close')] = 250.0  # Live bar closed somewhere else
+    write_csv(csv_dir, 'AAA.NS', df)
+
+    assert store.refresh(['AAA.NS']) == {'AAA.NS': 1}
+    history = store.history('AAA.NS')
+    assert len(history) == 10
+    assert history['Close'].iloc[-1] == 250.0
+    assert history['Close'].iloc[-2] == 108.0
+
+
+def test_torn_write_is_truncated_on_next_append(env):
+    csv_dir, _, store = env
+    write_csv(csv_dir, 'AAA.NS', bars('2024-01-01', 10))
+    store.refresh(['AAA.NS'])
+    for name in ('ts', 'close', 'volume'):  # A crash after the column writes, before meta.json
+        with open(os.path.join(store._dir('AAA.NS', '1d'), f"{name}.bin"), 'ab') as f:
+            f.write(b'\xff' * 12)
+
+    assert len(store.history('AAA.NS')) == 10  # meta.json is the commit point
+    write_csv(csv_dir, 'AAA.NS', bars('2024-01-01', 12))
+    store.refresh(['AAA.NS'])
+    for col in ['ts'] + COLUMNS:
+        assert os.path.getsize(store._col_path('AAA.NS', '1d', col)) == 12 * 8
+    assert store.history('AAA.NS')['Close'].tolist() == list(np.arange(100.0, 112.0))
+
+
+def test_history_and_close_matrix_slicing(env):
+    csv_dir, _, store = env
+    write_csv(csv_dir, 'AAA.NS', bars('2024-01-01', 30))
+    write_csv(csv_dir, 'BBB.NS', bars('2024-01-08', 25, base=50))  # Starts a week later
+    store.refresh(['AAA.NS', 'BBB.NS'])
+
+    window = store.history('AAA.NS', start='2024-01-03', end='2024-01-10', columns=['Close'])
+    assert list(window.columns) == ['Close']
+    assert window.index[0] == pd.Timestamp('2024-01-03') and window.index[-1] == pd.Timestamp('2024-01-10')
+    assert store.history('AAA.NS', bars=5)['Close'].tolist() == [125.0, 126.0, 127.0, 128.0, 129.0]
+    assert store.history('AAA.NS', end='2024-01-05', bars=2)['Close'].tolist() == [103.0, 104.0]
+    assert store.history('AAA.NS', start='2030-01-01').empty
+
+    wide = store.close_matrix(['AAA.NS', 'BBB.NS'])
+    assert list(wide.columns) == ['AAA.NS', 'BBB.NS'] and len(wide) == 30
+    assert wide['BBB.NS'].isna().sum() == 5  # Outer join: BBB missing its first week
+    tail = store.close_matrix(['AAA.NS', 'BBB.NS'], bars=3)
+    assert len(tail) == 3 and tail.notna().all().all()
+    assert tail.index[-1] == pd.Timestamp('2024-02-09')
+    ranged = store.close_matrix(['AAA.NS', 'BBB.NS'], start='2024-01-08', end='2024-01-12')
+    assert ranged['AAA.NS'].tolist() == [105.0, 106.0, 107.0, 108.0, 109.0]
+    assert ranged['BBB.NS'].tolist() == [50.0, 51.0, 52.0, 53.0, 54.0]
@@ -0,0 +1,58 @@
+"""Batch fills (common/execution.py): costs, volume caps and cash limits."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common import execution
+from common.portfolio import Portfolio
+
+CONFIG = {**execution.EXECUTION_DEFAULTS, 'slippage_bps': 0, 'brokerage_fee': 0.001, 'stt': 0.0,
+          'max_volume_pct': 0.1}
+
+
+def test_buy_pays_price_and_fees():
+    portfolio = Portfolio(['AAA.NS'], 10000)
+    trades = execution.fill_orders(portfolio, CONFIG, [0], [1], [10], [100.0])
+    assert trades[0]['shares'] == 10
+    assert portfolio.cash == pytest.approx(10000 - 1000 - 1.0)
+    assert portfolio.shares[0] == 10 and portfolio.avg_price[0] == 100.0
+
+
+def test_volume_cap_partially_fills():
+    portfolio = Portfolio(['AAA.NS', 'BBB.NS'], 100000)
+    trades = execution.fill_orders(portfolio, CONFIG, [0, 1], [1, 1], [100, 100], [10.0, 10.0],
+                                   volume=[250, np.nan])  # 10% of 250 bars; no volume = no cap
+    assert [t['shares'] for t in trades] == [25, 100]
+    assert portfolio.shares.tolist() == [25, 100]
+
+
+def test_volume_cap_can_cancel_an_order():
+    portfolio = Portfolio(['AAA.NS'], 100000)
+    assert execution.fill_orders(portfolio, CONFIG, [0], [1], [10], [10.0], volume=[5]) == []
+    assert portfolio.shares[0] == 0 and portfolio.cash == 100000
+
+
+def test_buys_fill_in_order_while_cash_lasts():
+    portfolio = Portfolio(['AAA.NS', 'BBB.NS', 'CCC.NS'], 1500)
+    trades = execution.fill_orders(portfolio, CONFIG, [0, 1, 2], [1, 1, 1], [10, 10, 1], [100.0, 100.0, 100.0])
+    assert [t['ticker'] for t in trades] == ['AAA.NS']  # Cash runs out at BBB; later buys are not taken
+    assert portfolio.cash == pytest.approx(1500 - 1001.0)
+
+
+def test_sells_settle_before_buys():
+    portfolio = Portfolio(['AAA.NS', 'BBB.NS'], 0)
+    portfolio.shares[0], portfolio.avg_price[0] = 10, 100.0
+    trades = execution.fill_orders(portfolio, CONFIG, [1, 0], [1, -1], [5, 50], [150.0, 100.0])
+    assert sorted((t['action'], t['shares']) for t in trades) == [('BUY', 5), ('SELL', 10)]  # Sell capped at holding
+    assert portfolio.shares.tolist() == [0, 5]
+    assert portfolio.avg_price[0] == 0.0
+    assert portfolio.cash == pytest.approx(1000 - 1.0 - 750 - 0.75)
+
+
+def test_orders_without_a_price_are_dropped():
+    portfolio = Portfolio(['AAA.NS'], 10000)
+    assert execution.fill_orders(portfolio, CONFIG, [0], [1], [10], [np.nan]) == []
+    assert portfolio.cash == 10000
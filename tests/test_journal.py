@@ -0,0 +1,100 @@
+"""Journal recovery and compaction (common/journal.py)."""
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common.journal import Journal, JournalTail, apply_trade, journal_path, read_state
+from common.portfolio import Portfolio
+
+CASH = 100000.0
+
+
+def trade(ticker, action, shares, price):
+    value = -shares * price if action == 'BUY' else shares * price
+    return {'timestamp': '2026-01-01T10:00:00', 'action': action, 'ticker': ticker, 'shares': shares,
+            'price': price, 'value': value, 'fees': 0.0}
+
+
+def replay(trades):
+    state = {'cash': CASH, 'positions': {}}
+    for t in trades:
+        apply_trade(state, t)
+    return state
+
+
+def portfolio_from(state):
+    portfolio = Portfolio([], state['cash'])
+    for ticker, pos in state['positions'].items():
+        i = portfolio.add_ticker(ticker)
+        portfolio.shares[i], portfolio.avg_price[i] = pos['shares'], pos['avg_price']
+    return portfolio
+
+
+TRADES = [trade('AAA.NS', 'BUY', 10, 100.0), trade('BBB.NS', 'BUY', 5, 200.0), trade('AAA.NS', 'BUY', 10, 110.0),
+          trade('BBB.NS', 'SELL', 5, 210.0), trade('CCC.NS', 'BUY', 3, 50.0)]
+
+
+def test_recover_replays_trades_logged_after_the_last_snapshot(tmp_path):
+    journal = Journal(str(tmp_path), sync_every=1)
+    for t in TRADES[:3]:
+        journal.record_trade(t)
+    journal.snapshot(portfolio_from(replay(TRADES[:3])))
+    for t in TRADES[3:]:
+        journal.record_trade(t)
+    journal.close()
+
+    recovered = Journal(str(tmp_path)).recover(CASH)
+    expected = replay(TRADES)
+    assert recovered['cash'] == expected['cash']
+    assert {t: p for t, p in recovered['positions'].items() if p['shares']} == \
+        {t: p for t, p in expected['positions'].items() if p['shares']}
+    assert recovered['positions']['AAA.NS'] == {'shares': 20, 'avg_price': 105.0}
+
+
+def test_torn_last_line_is_ignored_and_truncated(tmp_path):
+    journal = Journal(str(tmp_path), sync_every=1)
+    for t in TRADES[:2]:
+        journal.record_trade(t)
+    journal.close()
+    path = journal_path(str(tmp_path), 0)
+    with open(path, 'ab') as f:
+        f.write(json.dumps({'type': 'trade', **TRADES[2]}).encode()[:30])  # Crash mid-write
+
+    reopened = Journal(str(tmp_path))
+    assert reopened.recover(CASH)['cash'] == replay(TRADES[:2])['cash']
+    reopened.record_trade(TRADES[2])
+    reopened.close()
+    assert Journal(str(tmp_path)).recover(CASH)['cash'] == replay(TRADES[:3])['cash']
+
+
+def test_compaction_keeps_every_trade_and_the_latest_snapshot(tmp_path):
+    journal = Journal(str(tmp_path), compact_every=2)
+    for i, t in enumerate(TRADES):
+        journal.record_trade(t)
+        journal.snapshot(portfolio_from(replay(TRADES[:i + 1])))  # Compacts after every second snapshot
+    journal.close()
+
+    state = read_state(str(tmp_path))
+    assert state['generation'] == 2
+    assert os.path.exists(journal_path(str(tmp_path), 2))
+    assert not os.path.exists(journal_path(str(tmp_path), 0))
+    _, trades, snapshots = JournalTail(str(tmp_path)).poll()
+    assert len(trades) == len(TRADES)
+    assert len(snapshots) == 2  # Compacted one + the one after it
+    assert Journal(str(tmp_path)).recover(CASH)['cash'] == replay(TRADES)['cash']
+
+
+def test_interrupted_compaction_keeps_the_committed_generation(tmp_path):
+    journal = Journal(str(tmp_path))
+    for t in TRADES[:2]:
+        journal.record_trade(t)
+    journal.snapshot(portfolio_from(replay(TRADES[:2])))
+    journal.close()
+    with open(journal_path(str(tmp_path), 1), 'w') as f:  # Next generation written, state.json never repointed
+        f.write('{"type": "trade"')
+
+    reopened = Journal(str(tmp_path))
+    assert reopened.generation == 0
+    assert not os.path.exists(journal_path(str(tmp_path), 1))
+    assert reopened.recover(CASH)['cash'] == replay(TRADES[:2])['cash']
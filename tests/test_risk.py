@@ -0,0 +1,59 @@
+"""Portfolio-level sizing (common/risk.py size_buys): every cap scales all candidates pro rata."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common import execution, risk
+from common.portfolio import Portfolio
+
+CONFIG = {**execution.EXECUTION_DEFAULTS, 'slippage_bps': 0, 'brokerage_fee': 0.0, 'stt': 0.0,
+          'max_position_size': 0.1}
+TICKERS = ['AAA.NS', 'BBB.NS', 'CCC.NS', 'DDD.NS']
+
+
+def portfolio(cash, held=None):
+    """held: {ticker: (shares, price)}; total_value = cash + held value."""
+    p = Portfolio(TICKERS, cash)
+    for ticker, (shares, price) in (held or {}).items():
+        i = p.index[ticker]
+        p.shares[i], p.avg_price[i] = shares, price
+    p.total_value = cash + float(p.shares @ p.avg_price)
+    return p
+
+
+def size(p, config, idx, price, vol=None, sell_idx=None):
+    marks = np.where(p.shares > 0, p.avg_price, np.nan)
+    return risk.size_buys(p, config, idx, np.asarray(price, dtype=np.float64), marks, vol, sell_idx).tolist()
+
+
+def test_fixed_weight_per_candidate():
+    assert size(portfolio(100000), CONFIG, [0, 1, 2], [100.0, 50.0, 1000.0]) == [100, 200, 10]
+
+
+def test_gross_exposure_scales_every_buy_alike():
+    p = portfolio(10000, {'DDD.NS': (900, 100.0)})  # 90% invested of 100k
+    shares = size(p, CONFIG, [0, 1, 2], [10.0, 10.0, 10.0])
+    assert shares == [333, 333, 333]  # 10k of room over 30k of targets, not 1000 to the first signal
+
+
+def test_cash_left_scales_buys_and_counts_sell_proceeds():
+    config = {**CONFIG, 'max_gross_exposure': 2.0}
+    p = portfolio(5000, {'DDD.NS': (950, 100.0)})
+    assert size(p, config, [0, 1], [10.0, 10.0]) == [250, 250]  # 5k cash over 20k of targets
+    assert size(p, config, [0, 1], [10.0, 10.0], sell_idx=[3]) == [1000, 1000]  # Selling DDD frees 95k
+
+
+def test_sector_cap_only_scales_its_own_sector():
+    config = {**CONFIG, 'max_sector_exposure': 0.15,
+              'sectors': {'AAA.NS': 'Bank', 'BBB.NS': 'Bank', 'CCC.NS': 'IT', 'DDD.NS': 'IT'}}
+    assert size(portfolio(100000), config, [0, 1, 2], [10.0, 10.0, 10.0]) == [750, 750, 1000]
+
+
+def test_volatility_targeting_caps_at_max_position_size():
+    config = {**CONFIG, 'sizing': 'volatility', 'target_vol': 0.002}
+    vol = np.array([0.01, 0.04, np.nan])  # NaN (no history) sizes as fixed
+    assert size(portfolio(100000), config, [0, 1, 2], [10.0, 10.0, 10.0], vol) == [1000, 500, 1000]
+    assert risk.target_weights(config, vol) == pytest.approx([0.1, 0.05, 0.1])
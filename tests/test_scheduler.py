@@ -0,0 +1,56 @@
+"""Bar-boundary scheduling (common/scheduler.py): alignment, deadlines and coalescing."""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from datetime import time as dt_time
+from zoneinfo import ZoneInfo
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common.scheduler import MarketScheduler, in_market_hours, next_boundary
+
+IST = ZoneInfo('Asia/Kolkata')
+OPEN, CLOSE = dt_time(9, 15), dt_time(15, 30)
+FIVE = timedelta(minutes=5)
+
+
+def ist(*args):
+    return datetime(*args, tzinfo=IST)
+
+
+def test_next_boundary_aligns_to_the_session_open():
+    assert next_boundary(ist(2026, 10, 16, 9, 0), FIVE, OPEN, CLOSE) == ist(2026, 10, 16, 9, 15)
+    assert next_boundary(ist(2026, 10, 16, 9, 15), FIVE, OPEN, CLOSE) == ist(2026, 10, 16, 9, 15)
+    assert next_boundary(ist(2026, 10, 16, 9, 16, 30), FIVE, OPEN, CLOSE) == ist(2026, 10, 16, 9, 20)
+    assert next_boundary(ist(2026, 10, 16, 15, 30), FIVE, OPEN, CLOSE) == ist(2026, 10, 16, 15, 30)
+
+
+def test_next_boundary_rolls_past_the_close_and_weekends():
+    assert next_boundary(ist(2026, 10, 16, 15, 31), FIVE, OPEN, CLOSE) == ist(2026, 10, 19, 9, 15)  # Fri -> Mon
+    assert next_boundary(ist(2026, 10, 17, 11, 0), FIVE, OPEN, CLOSE) == ist(2026, 10, 19, 9, 15)   # Saturday
+
+
+def test_close_tick_is_in_market_hours_on_its_boundary():
+    assert in_market_hours(ist(2026, 10, 16, 15, 30), OPEN, CLOSE)
+    assert not in_market_hours(ist(2026, 10, 16, 15, 30, 2), OPEN, CLOSE)  # Wall clock of the settled tick
+    assert not in_market_hours(ist(2026, 10, 17, 10, 0), OPEN, CLOSE)
+
+
+def test_overrunning_tick_is_flagged_and_boundaries_during_it_are_skipped():
+    boundaries = []
+
+    def tick(boundary):
+        boundaries.append(boundary)
+        if len(boundaries) == 1:
+            time.sleep(1.6)  # Past its 0.3s deadline and the next boundary
+
+    scheduler = MarketScheduler(tick, 0.5 / 60, dt_time(0, 0), dt_time(23, 59, 59), deadline_sec=0.3,
+                                settle_sec=0, weekdays=range(7))
+    asyncio.run(scheduler.run(max_ticks=4))
+
+    assert scheduler.metrics.overruns == 1
+    assert scheduler.metrics.skipped >= 1
+    assert len(boundaries) + scheduler.metrics.skipped >= 4
+    assert boundaries == sorted(set(boundaries))  # Never the same boundary twice, never out of order
+    assert all((b - boundaries[0]) % scheduler.interval == timedelta(0) for b in boundaries)
@@ -0,0 +1,81 @@
+"""Streaming indicators (common/indicators.py) against the batch signals (common/signals.py)."""
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Repo root for common/
+from common.indicators import CrossoverDetector, RollingStats
+from common.signals import ma_crossover_signals, mean_reversion_signals, signal_matrix
+
+SHORT, LONG = 5, 20
+PERIOD, Z = 10, 1.5
+
+
+def prices(n=300, tickers=('AAA', 'BBB', 'CCC'), seed=7):
+    """Random-walk closes, one column per ticker."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.02, (n, len(tickers)))
+    index = pd.bdate_range('2024-01-01', periods=n, name='Date')
+    return pd.DataFrame(100 * np.exp(steps.cumsum(axis=0)), index=index, columns=list(tickers))
+
+
+def mean_reversion_signal(stats):
+    """The paper trader's rule on a streaming z-score."""
+    z = stats.zscore
+    return 1 if z < -Z else -1 if z > Z else 0
+
+
+def test_crossover_detector_matches_batch_bar_by_bar():
+    close = prices()
+    streamed = pd.DataFrame(0, index=close.index, columns=close.columns)
+    for ticker in close:
+        detector = CrossoverDetector(SHORT, LONG)
+        for t, value in enumerate(close[ticker].to_numpy()):
+            streamed.iloc[t, close.columns.get_loc(ticker)] = detector.update(value)
+    matrix = signal_matrix(close, 'ma_crossover', {'short_window': SHORT, 'long_window': LONG})
+
+    assert (streamed != 0).to_numpy().sum() > 0  # Some crosses to compare
+    assert (streamed.to_numpy() == matrix.to_numpy()).all()
+    for t in range(LONG, len(close), 17):
+        batch = ma_crossover_signals(close.iloc[:t + 1], SHORT, LONG)
+        assert list(batch) == list(streamed.iloc[t])
+
+
+def test_rolling_stats_matches_batch_bar_by_bar():
+    close = prices()
+    streamed = pd.DataFrame(0, index=close.index, columns=close.columns)
+    for ticker in close:
+        stats = RollingStats(PERIOD)
+        for t, value in enumerate(close[ticker].to_numpy()):
+            stats.update(value)
+            streamed.iloc[t, close.columns.get_loc(ticker)] = mean_reversion_signal(stats)
+    matrix = signal_matrix(close, 'mean_reversion', {'period': PERIOD, 'z_threshold': Z})
+
+    assert (streamed == 1).to_numpy().sum() > 0 and (streamed == -1).to_numpy().sum() > 0
+    assert (streamed.to_numpy() == matrix.to_numpy()).all()
+    for t in range(PERIOD, len(close), 17):
+        batch = mean_reversion_signals(close.iloc[:t + 1], PERIOD, Z)
+        assert list(batch) == list(streamed.iloc[t])
+
+
+def test_seed_and_replace_last_match_a_fresh_window():
+    values = prices(n=60)['AAA'].to_numpy()
+    revised = values.copy()
+    revised[-1] *= 1.05  # Live bar moves after it was first seen
+
+    stats = RollingStats(PERIOD).seed(values[:-1])
+    stats.update(values[-1])
+    stats.replace_last(revised[-1])
+    fresh = RollingStats(PERIOD).seed(revised)
+    tail = revised[-PERIOD:]
+    assert math.isclose(stats.zscore, fresh.zscore, rel_tol=1e-9)
+    assert math.isclose(stats.zscore, (tail[-1] - tail.mean()) / tail.std(ddof=1), rel_tol=1e-9)
+
+    detector = CrossoverDetector(SHORT, LONG).seed(values)
+    detector.replace_last(revised[-1])
+    assert detector.signal == CrossoverDetector(SHORT, LONG).seed(revised).signal
+    assert math.isclose(detector.short.value, revised[-SHORT:].mean(), rel_tol=1e-12)
+    assert math.isclose(detector.long.value, revised[-LONG:].mean(), rel_tol=1e-12)